@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Parser for Adobe Analytics Workspace CSV exports
+
+Workspace exports are a comment header (report suite, date range, segments)
+followed by one or more blocks, each introduced by a line of '#' characters
+and '# <title>' lines, then a header row and data rows:
+
+    ##############################################
+    # Freeform table
+    # Segments: Tree Users
+    "Step","Unique Visitors","Visits"
+    "Portrait Pedigree Views","1557708","2301920"
+    "Toggle Ancestors Button: Open","1047944","1385020"
+
+`parse_export` reads a file in a single streaming pass and returns a tidy
+table with one row per (block, row label, value column), so the layout can
+change, blocks can move, and a file can hold any number of segments, date
+ranges and breakdowns. `funnel_metrics` then recognises the pedigree funnels
+by their step labels rather than by line position.
+"""
+
+import argparse
+import csv
+import glob
+import re
+from pathlib import Path
+
+import pandas as pd
+
+PEDIGREE_STEP = 'Portrait Pedigree Views'
+ANCESTORS_STEP = 'Toggle Ancestors Button: Open'
+SIBLINGS_STEP = 'Toggle Siblings Button: Open'
+
+TABLE_COLUMNS = ['source_file', 'date_range', 'segment', 'block', 'block_title',
+                 'step_index', 'step', 'series', 'value']
+
+_NUMBER = re.compile(r'^-?[\d,]*\.?\d+%?$')
+
+
+def _parse_number(cell):
+    cell = cell.strip()
+    if not _NUMBER.match(cell):
+        return None
+    if cell.endswith('%'):
+        return float(cell[:-1].replace(',', '')) / 100
+    return float(cell.replace(',', ''))
+
+
+def _comment_field(line):
+    """('Date', 'Nov 5, 2025 - Feb 2, 2026') for a '# Date: ...' comment line"""
+    body = line.lstrip('#').strip()
+    if ':' not in body:
+        return None, body
+    key, value = body.split(':', 1)
+    return key.strip().lower(), value.strip().strip('"')
+
+
+def parse_export(file_path):
+    """
+    Parse one Workspace CSV export into a DataFrame with TABLE_COLUMNS.
+
+    Each data row contributes one record per numeric value column. Comment
+    metadata ('# Date:', '# Segments:') seen before the first table applies
+    to every table in the file; metadata between tables applies to the next
+    table only. The last untitled comment line before a table is its title.
+    """
+    source = Path(file_path).name
+    file_meta = {'date': 'Unknown', 'segments': 'All Visits'}
+    pending_meta = {}
+    pending_title = ''
+    seen_table = False
+    block = -1
+    block_meta = {}
+    block_title = ''
+    header = None
+    step_index = 0
+    records = []
+
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped:
+                header = None
+                continue
+
+            if stripped.startswith('#'):
+                header = None
+                if not stripped.strip('#=-').strip():
+                    continue  # separator line
+                key, value = _comment_field(stripped)
+                if key in ('date', 'segment', 'segments'):
+                    target = pending_meta if seen_table else file_meta
+                    target['segments' if key.startswith('segment') else 'date'] = value
+                elif key is None:
+                    pending_title = value
+                continue
+
+            row = next(csv.reader([stripped]))
+            if header is None:
+                # A new table starts; its first row is the header unless it
+                # already holds numbers
+                block += 1
+                block_meta = {**file_meta, **pending_meta}
+                block_title = pending_title
+                pending_meta = {}
+                pending_title = ''
+                seen_table = True
+                step_index = 0
+                if not any(_parse_number(cell) is not None for cell in row[1:]):
+                    header = [cell.strip() for cell in row]
+                    continue
+                header = [''] + ['Value'] * (len(row) - 1)
+
+            label = row[0].strip()
+            found = False
+            for column, cell in zip(header[1:], row[1:]):
+                value = _parse_number(cell)
+                if value is None:
+                    continue
+                found = True
+                records.append((source, block_meta['date'], block_meta['segments'], block, block_title,
+                                step_index, label, column or 'Value', value))
+            if found:
+                step_index += 1
+
+    table = pd.DataFrame.from_records(records, columns=TABLE_COLUMNS)
+    return table.astype({'block': 'int32', 'step_index': 'int32', 'value': 'float64'})
+
+
+def load_exports(paths):
+    """Parse many exports (paths or glob patterns) into one table"""
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(str(path))) if glob.has_magic(str(path)) else [path])
+    tables = [parse_export(file) for file in files]
+    if not tables:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+def funnel_metrics(table, series=None):
+    """
+    Pedigree funnel metrics per (source_file, date_range, segment).
+
+    Funnel steps are recognised by label and by the step before them:
+    pedigree views is the first step; ancestors toggled follows pedigree
+    views; siblings toggled total follows pedigree views directly; siblings
+    after ancestors follows the ancestors step. `series` picks the value
+    column (default: the first column of each block).
+    """
+    if table.empty:
+        return pd.DataFrame(columns=['source_file', 'date_range', 'segment'])
+
+    if series is None:
+        first_series = table.groupby(['source_file', 'block'])['series'].transform('first')
+        table = table[table['series'] == first_series]
+    else:
+        table = table[table['series'] == series]
+
+    table = table.sort_values(['source_file', 'block', 'step_index'])
+    previous = table.groupby(['source_file', 'block', 'series'])['step'].shift()
+    table = table.assign(previous_step=previous)
+
+    def first_value(rows, step, after):
+        matches = rows[(rows['step'] == step) & (rows['previous_step'] == after)]
+        return int(matches['value'].iloc[0]) if len(matches) else 0
+
+    results = []
+    for (source_file, date_range, segment), rows in table.groupby(['source_file', 'date_range', 'segment'], sort=False):
+        pedigree = rows[(rows['step'] == PEDIGREE_STEP) & (rows['step_index'] == 0)]
+        pedigree_views = int(pedigree['value'].iloc[0]) if len(pedigree) else 0
+        ancestors_toggled = first_value(rows, ANCESTORS_STEP, PEDIGREE_STEP)
+        siblings_toggled_total = first_value(rows, SIBLINGS_STEP, PEDIGREE_STEP)
+        siblings_after_ancestors = first_value(rows, SIBLINGS_STEP, ANCESTORS_STEP)
+        results.append({
+            'source_file': source_file,
+            'date_range': date_range,
+            'segment': segment,
+            'pedigree_views': pedigree_views,
+            'ancestors_toggled': ancestors_toggled,
+            'siblings_toggled_total': siblings_toggled_total,
+            'siblings_after_ancestors': siblings_after_ancestors,
+            'sibling_pct_all_users': (siblings_toggled_total / pedigree_views * 100) if pedigree_views > 0 else 0,
+            'sibling_pct_ancestor_users': (siblings_after_ancestors / ancestors_toggled * 100) if ancestors_toggled > 0 else 0,
+        })
+    return pd.DataFrame(results)
+
+
+FUNNEL_COUNTS = ['pedigree_views', 'ancestors_toggled', 'siblings_toggled_total', 'siblings_after_ancestors']
+
+
+def parse_adobe_analytics(file_path):
+    """
+    Funnel metrics of a single export as a dict, in the shape the business
+    case summary JSON uses (the first segment when a file has several).
+
+    Raises ValueError if any funnel step cannot be found, rather than
+    reporting it as zero.
+    """
+    metrics = funnel_metrics(parse_export(file_path))
+    if metrics.empty:
+        raise ValueError(f"No pedigree funnel found in {file_path}")
+    missing = [key for key in FUNNEL_COUNTS if metrics.iloc[0][key] == 0]
+    if missing:
+        raise ValueError(f"Funnel steps not found in {file_path}: {', '.join(missing)}")
+    web_metrics = metrics.iloc[0].drop(['source_file', 'segment']).to_dict()
+    for key in FUNNEL_COUNTS:
+        web_metrics[key] = int(web_metrics[key])
+    for key in ('sibling_pct_all_users', 'sibling_pct_ancestor_users'):
+        web_metrics[key] = float(web_metrics[key])
+    return web_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize pedigree funnels from Adobe Analytics exports')
+    parser.add_argument('files', nargs='*', default=['data/analytics/adobe/*.csv'],
+                        help='Export CSVs or glob patterns (default: data/analytics/adobe/*.csv)')
+    parser.add_argument('--output', help='Write the funnel summary to this CSV file')
+    args = parser.parse_args()
+
+    metrics = funnel_metrics(load_exports(args.files))
+    print(f"Parsed {metrics['source_file'].nunique() if len(metrics) else 0} exports")
+    print(metrics.to_string(index=False))
+    if args.output:
+        metrics.to_csv(args.output, index=False)
+        print(f"Saved funnel summary to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
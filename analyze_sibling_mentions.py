@@ -3,89 +3,406 @@
 Analysis of Google Play Store reviews to identify sibling-related mentions
 """
 
-import pandas as pd
+import argparse
 import glob
+import json
+import os
 from pathlib import Path
 
+import pandas as pd
+
+from keyword_taxonomy import BASE_LANGUAGE, SIBLING_TAXONOMY, LanguageIndex
+from near_duplicates import NearDuplicateIndex, dedup_counts, near_duplicate_clusters
+from profiling import add_profile_arguments, finish_profile, iterate, profile_from_args, stage
+from review_frame import compact_reviews, load_compact, memory_report, memory_usage
+from review_loader import (
+    ANALYSIS_COLUMNS, DEFAULT_CHUNKSIZE, MENTION_COLUMNS, ReviewStats, has_text, iter_review_chunks, mention_rows,
+    scan_exports_parallel,
+)
+from review_trends import trend_summary
+
 # Display settings
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_colwidth', 150)
 
-print("=" * 80)
-print("FamilySearch Android App - Sibling Feature Analysis")
-print("=" * 80)
-
-# Load all CSV files
-csv_files = sorted(glob.glob('data/feedback/android/*.csv'))
-print(f"\n1. DATA LOADING")
-print(f"   Found {len(csv_files)} CSV files")
-print(f"   Date range: {Path(csv_files[0]).stem.split('_')[-1]} to {Path(csv_files[-1]).stem.split('_')[-1]}")
-
-# Load all files into a single dataframe
-dfs = []
-for file in csv_files:
-    try:
-        df = pd.read_csv(file, encoding='utf-16')
-        dfs.append(df)
-    except Exception as e:
-        print(f"   Error loading {file}: {e}")
-
-# Combine all dataframes
-all_reviews = pd.concat(dfs, ignore_index=True)
-print(f"   Total reviews loaded: {len(all_reviews):,}")
-
-# Basic statistics
-print(f"\n2. REVIEW STATISTICS")
-print(f"   Total reviews: {len(all_reviews):,}")
-print(f"   Reviews with text: {all_reviews['Review Text'].notna().sum():,}")
-print(f"   Reviews without text: {all_reviews['Review Text'].isna().sum():,}")
-
-# Filter for reviews that have actual text content
-reviews_with_text = all_reviews[all_reviews['Review Text'].notna() & (all_reviews['Review Text'].str.strip() != '')].copy()
-print(f"   Reviews with text content: {len(reviews_with_text):,}")
-print(f"   Percentage with text: {len(reviews_with_text)/len(all_reviews)*100:.1f}%")
-
-print(f"\n   Top 10 Languages:")
-for lang, count in all_reviews['Reviewer Language'].value_counts().head(10).items():
-    print(f"      {lang}: {count:,}")
-
-# Define search terms for sibling-related mentions
-sibling_keywords = [
-    'sibling', 'siblings',
-    'brother', 'brothers', 'sister', 'sisters',
-    'aunt', 'aunts', 'uncle', 'uncles',
-    'nephew', 'nephews', 'niece', 'nieces',
-    'cousin', 'cousins'
-]
-
-# Create search pattern (case insensitive)
-pattern = '|'.join(sibling_keywords)
-
-# Search for sibling mentions in review text
-sibling_mentions = reviews_with_text[reviews_with_text['Review Text'].str.contains(pattern, case=False, na=False)].copy()
-
-print(f"\n3. SIBLING RELATIONSHIP MENTIONS")
-print(f"   Reviews mentioning siblings/related family: {len(sibling_mentions):,}")
-print(f"   Percentage of ALL reviews: {len(sibling_mentions)/len(all_reviews)*100:.2f}%")
-print(f"   Percentage of reviews WITH text: {len(sibling_mentions)/len(reviews_with_text)*100:.2f}%")
-
-# Display sample of sibling-related reviews
-print(f"\n4. SAMPLE REVIEWS (First 10)")
-print("=" * 80)
-for i, (idx, row) in enumerate(sibling_mentions.head(10).iterrows(), 1):
-    print(f"\n   Review #{i}")
-    print(f"   Date: {row['Review Submit Date and Time']}")
-    print(f"   Rating: {row['Star Rating']} stars")
-    print(f"   Language: {row['Reviewer Language']}")
-    print(f"   Review: {row['Review Text']}")
-    print("-" * 80)
-
-# Save sibling-related reviews to CSV
+# Search terms for sibling-related mentions, per review language
+sibling_keywords = SIBLING_TAXONOMY[BASE_LANGUAGE]
+
+# Ways to analyze the Play Console CSV exports (see analyze_exports)
+ANALYSIS_MODES = ['batch', 'compact', 'stream', 'parallel', 'cache']
+
 output_file = 'data/sibling_mentions.csv'
-sibling_mentions.to_csv(output_file, index=False, encoding='utf-8')
-print(f"\n5. OUTPUT")
-print(f"   Saved {len(sibling_mentions):,} reviews to {output_file}")
+trends_file = 'data/processed/review_trends.json'
+counts_file = 'data/processed/review_counts.json'
+
+
+def percent(part, whole):
+    return part / whole * 100 if whole else 0
+
+
+def print_languages(language_counts):
+    print(f"\n   Top 10 Languages:")
+    for lang, count in language_counts:
+        print(f"      {lang}: {count:,}")
+
+
+def print_mention_stats(mention_count, total_count, text_count, dedup=None):
+    print(f"\n3. SIBLING RELATIONSHIP MENTIONS")
+    print(f"   Reviews mentioning siblings/related family: {mention_count:,}")
+    print(f"   Percentage of ALL reviews: {percent(mention_count, total_count):.2f}%")
+    print(f"   Percentage of reviews WITH text: {percent(mention_count, text_count):.2f}%")
+    if dedup:
+        raw, distinct, clusters = dedup
+        print(f"   After removing near-duplicates: {distinct:,} distinct "
+              f"({raw - distinct:,} repeats across {clusters:,} clusters)")
+
+
+def mark_duplicates(sibling_mentions):
+    """
+    Add a 'Duplicate Cluster' column grouping near-identical review texts;
+    returns the (raw, distinct, clusters) counts
+    """
+    with stage('dedup', rows_in=len(sibling_mentions)) as s:
+        sibling_mentions['Duplicate Cluster'] = near_duplicate_clusters(sibling_mentions['Review Text'])
+        counts = dedup_counts(sibling_mentions['Duplicate Cluster'])
+        s.rows_out = counts[1]
+    return counts
+
+
+def print_samples(sibling_mentions):
+    print(f"\n4. SAMPLE REVIEWS (First 10)")
+    print("=" * 80)
+    for i, (idx, row) in enumerate(sibling_mentions.head(10).iterrows(), 1):
+        print(f"\n   Review #{i}")
+        print(f"   Date: {row['Review Submit Date and Time']}")
+        print(f"   Rating: {row['Star Rating']} stars")
+        print(f"   Language: {row['Reviewer Language']}")
+        print(f"   Review: {row['Review Text']}")
+        print("-" * 80)
+
+
+def load_csv_files(csv_files):
+    """Load every export into one DataFrame"""
+    dfs = []
+    for file in csv_files:
+        try:
+            with stage('decode') as s:
+                df = pd.read_csv(file, encoding='utf-16', dtype={'App Version Name': str})
+                s.rows_out = len(df)
+            dfs.append(df)
+        except Exception as e:
+            print(f"   Error loading {file}: {e}")
+
+    # Combine all dataframes
+    with stage('concat', rows_in=sum(len(df) for df in dfs)):
+        return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame(columns=ANALYSIS_COLUMNS)
+
+
+def analyze_batch(all_reviews, matcher, dedup=False):
+    """Search all reviews in a single pass; returns their ReviewStats"""
+    print(f"   Total reviews loaded: {len(all_reviews):,}")
+
+    # Basic statistics
+    print(f"\n2. REVIEW STATISTICS")
+    print(f"   Total reviews: {len(all_reviews):,}")
+    print(f"   Reviews with text: {all_reviews['Review Text'].notna().sum():,}")
+    print(f"   Reviews without text: {all_reviews['Review Text'].isna().sum():,}")
+
+    # Filter for reviews that have actual text content
+    with stage('filter_text', rows_in=len(all_reviews)) as s:
+        text_mask = has_text(all_reviews)
+        reviews_with_text = all_reviews[text_mask].copy()
+        s.rows_out = len(reviews_with_text)
+    print(f"   Reviews with text content: {len(reviews_with_text):,}")
+    print(f"   Percentage with text: {percent(len(reviews_with_text), len(all_reviews)):.1f}%")
+
+    print_languages(all_reviews['Reviewer Language'].value_counts().head(10).items())
+
+    # Search for sibling mentions in review text
+    with stage('match', rows_in=len(reviews_with_text)) as s:
+        sibling_mentions = matcher.filter_reviews(reviews_with_text)
+        s.rows_out = len(sibling_mentions)
+    dedup_stats = mark_duplicates(sibling_mentions) if dedup else None
+    print_mention_stats(len(sibling_mentions), len(all_reviews), len(reviews_with_text), dedup_stats)
+    print_samples(sibling_mentions)
+
+    # Save sibling-related reviews to CSV
+    write_mentions(sibling_mentions)
+    print(f"\n5. OUTPUT")
+    print(f"   Saved {len(sibling_mentions):,} reviews to {output_file}")
+
+    # The same totals the other modes accumulate, so review_counts.json always matches the mentions just written
+    with stage('stats', rows_in=len(all_reviews)):
+        stats = ReviewStats()
+        stats.update(all_reviews, text_mask, all_reviews.index.isin(sibling_mentions.index))
+    save_counts(stats)
+    save_trends(stats.trends)
+    return stats
+
+
+def write_mentions(sibling_mentions, chunk_num=None):
+    """
+    Write the mentions CSV in MENTION_COLUMNS, whichever mode found them;
+    `chunk_num` > 0 appends a chunk without the header
+    """
+    with stage('write_csv', rows_in=len(sibling_mentions)):
+        append = bool(chunk_num)
+        mention_rows(sibling_mentions).to_csv(output_file, index=False, encoding='utf-8',
+                                              mode='a' if append else 'w', header=not append)
+
+
+def analyze_streaming(chunks, matcher, dedup=False):
+    """
+    Search reviews chunk by chunk, accumulating statistics as we go and
+    appending matches to the output file, so memory stays flat; returns the
+    accumulated ReviewStats
+    """
+    stats = ReviewStats()
+    samples = []
+    # Cluster ids are only final once every chunk is in, so streaming reports counts only
+    duplicates = NearDuplicateIndex() if dedup else None
+
+    for chunk_num, chunk in enumerate(iterate('decode', chunks)):
+        with stage('filter_text', rows_in=len(chunk)) as s:
+            text_mask = has_text(chunk)
+            reviews_with_text = chunk[text_mask]
+            s.rows_out = len(reviews_with_text)
+        with stage('match', rows_in=len(reviews_with_text)) as s:
+            mentions = matcher.filter_reviews(reviews_with_text)
+            s.rows_out = len(mentions)
+        with stage('stats', rows_in=len(chunk)):
+            stats.update(chunk, text_mask, chunk.index.isin(mentions.index))
+        if duplicates is not None:
+            with stage('dedup', rows_in=len(mentions)):
+                duplicates.add(mentions['Review Text'])
+
+        write_mentions(mentions, chunk_num)
+        if sum(len(s) for s in samples) < 10:
+            samples.append(mentions)
+
+    if not samples:
+        # No export decoded: still replace the previous run's mentions
+        write_mentions(pd.DataFrame(columns=MENTION_COLUMNS))
+
+    dedup_stats = None
+    if duplicates is not None:
+        dedup_stats = dedup_counts(pd.Series(duplicates.clusters()))
+    samples = pd.concat(samples, ignore_index=True) if samples else pd.DataFrame(columns=MENTION_COLUMNS)
+    report_totals(stats, samples, dedup_stats)
+    return stats
+
+
+def analyze_parallel(csv_files, taxonomy, workers, chunksize, dedup=False):
+    """Decode and search the exports across a pool of worker processes"""
+    # Decoding and matching happen in the workers; this stage's CPU time is only the parent's
+    with stage('scan') as s:
+        stats, sibling_mentions = scan_exports_parallel(csv_files, taxonomy, workers=workers, chunksize=chunksize)
+        s.rows_in, s.rows_out = stats.total, len(sibling_mentions)
+    dedup_stats = mark_duplicates(sibling_mentions) if dedup else None
+    write_mentions(sibling_mentions)
+    report_totals(stats, sibling_mentions, dedup_stats)
+    return stats
+
+
+def analyze_cached(csv_files, taxonomy, cache_dir, workers, chunksize, dedup=False):
+    """Decode only exports missing from the results cache and merge with the cached partials"""
+    # Deferred so the other modes do not depend on the cache module
+    from results_cache import scan_exports_cached
+
+    with stage('scan') as s:
+        stats, sibling_mentions, rescanned = scan_exports_cached(csv_files, taxonomy, cache_dir,
+                                                                 workers=workers, chunksize=chunksize)
+        s.rows_in, s.rows_out = stats.total, len(sibling_mentions)
+    print(f"   Decoded {len(rescanned)} new or changed files, {len(csv_files) - len(rescanned)} from cache")
+    dedup_stats = mark_duplicates(sibling_mentions) if dedup else None
+    write_mentions(sibling_mentions)
+    report_totals(stats, sibling_mentions, dedup_stats)
+    return stats
+
+
+def analyze_sources(root, taxonomy, workers, chunksize, dedup=False):
+    """
+    Decode and search the exports of every review source under `root`
+    (Play Console, App Store Connect) in parallel, sharded by source and
+    app, and merge the per-shard aggregates
+    """
+    # Deferred so the Play Console-only modes do not depend on the adapters
+    from review_sources import count_summary, find_exports, merge_shards, print_shards, scan_shards
+
+    exports = find_exports(root)
+    print(f"   Found {len(exports)} exports under {root}")
+    with stage('scan', rows_in=len(exports)) as s:
+        shards, errors = scan_shards(exports, taxonomy, workers=workers, chunksize=chunksize)
+        s.rows_out = sum(shard.stats.mentions for shard in shards.values())
+    for path, error in errors:
+        print(f"   Error loading {path}: {error}")
+
+    with stage('merge_shards', rows_in=len(shards)):
+        stats, platforms = merge_shards(shards)
+        mentions = [shard.mention_rows() for shard in shards.values()] or [pd.DataFrame(columns=MENTION_COLUMNS)]
+        sibling_mentions = pd.concat(mentions, ignore_index=True)
+    print_shards(shards, platforms)
+
+    dedup_stats = mark_duplicates(sibling_mentions) if dedup else None
+    write_mentions(sibling_mentions)
+    report_totals(stats, sibling_mentions, dedup_stats, sources={
+        'platforms': {platform: count_summary(totals) for platform, totals in sorted(platforms.items())},
+        'shards': [shard.to_dict() for shard in shards.values()],
+    })
+    return stats
+
+
+def analyze_exports(csv_files, taxonomy, mode='batch', matcher=None, workers=None, chunksize=DEFAULT_CHUNKSIZE,
+                    dedup=False, cache_dir='data/cache/sibling_mentions'):
+    """
+    Analyze Play Console CSV exports in one of ANALYSIS_MODES, writing the
+    mentions, counts and trends; returns the ReviewStats. `workers` None
+    means one per CPU.
+    """
+    if mode == 'cache':
+        return analyze_cached(csv_files, taxonomy, cache_dir, workers, chunksize, dedup)
+    if mode == 'parallel':
+        return analyze_parallel(csv_files, taxonomy, workers, chunksize, dedup)
+
+    matcher = matcher or LanguageIndex(taxonomy)
+    if mode == 'stream':
+        return analyze_streaming(iter_review_chunks(csv_files, chunksize=chunksize), matcher, dedup)
+    if mode == 'compact':
+        with stage('decode') as s:
+            all_reviews, raw_bytes = load_compact(csv_files)
+            s.rows_out = len(all_reviews)
+        print(f"   {memory_report(raw_bytes, all_reviews)}")
+        return analyze_batch(all_reviews, matcher, dedup)
+    if mode == 'batch':
+        return analyze_batch(load_csv_files(csv_files), matcher, dedup)
+    raise ValueError(f"Unknown analysis mode {mode!r}; expected one of {ANALYSIS_MODES}")
+
+
+def report_totals(stats, sibling_mentions, dedup=None, sources=None):
+    """Print the analysis sections from accumulated ReviewStats"""
+    print(f"   Total reviews loaded: {stats.total:,}")
+
+    print(f"\n2. REVIEW STATISTICS")
+    print(f"   Total reviews: {stats.total:,}")
+    print(f"   Reviews with text: {stats.text_present:,}")
+    print(f"   Reviews without text: {stats.text_missing:,}")
+    print(f"   Reviews with text content: {stats.with_text:,}")
+    print(f"   Percentage with text: {percent(stats.with_text, stats.total):.1f}%")
+
+    print_languages(stats.top_languages(10))
+
+    print_mention_stats(stats.mentions, stats.total, stats.with_text, dedup)
+    print_samples(sibling_mentions)
+
+    print(f"\n5. OUTPUT")
+    print(f"   Saved {stats.mentions:,} reviews to {output_file}")
+    save_counts(stats, sources)
+    save_trends(stats.trends)
+
+
+def save_counts(stats, sources=None):
+    """
+    Write the review totals the business case notebook divides the mention
+    count by; `sources` adds the per-platform and per-shard counts
+    """
+    os.makedirs(os.path.dirname(counts_file), exist_ok=True)
+    with open(counts_file, 'w') as f:
+        json.dump({
+            'total_reviews': stats.total,
+            'reviews_with_text': stats.with_text,
+            'sibling_mentions': stats.mentions,
+            **(sources or {}),
+        }, f, indent=2)
+    print(f"   Saved review counts to {counts_file}")
+
+
+def save_trends(trends):
+    """Write the monthly/yearly/per-version trend summary for the business case notebook"""
+    os.makedirs(os.path.dirname(trends_file), exist_ok=True)
+    with stage('trend_summary', rows_in=len(trends)):
+        summary = trend_summary(trends)
+    with open(trends_file, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"   Saved review trends to {trends_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stream', action='store_true',
+                        help='Process exports in fixed-size chunks instead of loading them all at once')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f'Rows per chunk in streaming mode (default: {DEFAULT_CHUNKSIZE:,})')
+    parser.add_argument('--store', metavar='DIR',
+                        help='Read reviews from a Parquet review store (see review_store.py) instead of the CSV exports')
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help='Decode and search CSV exports in parallel across N processes (0 = one per CPU)')
+    parser.add_argument('--cache', nargs='?', const='data/cache/sibling_mentions', metavar='DIR',
+                        help='Reuse per-file results cached in DIR and only decode new or changed exports '
+                             '(default DIR: data/cache/sibling_mentions)')
+    parser.add_argument('--sources', nargs='?', const='data/feedback', metavar='DIR',
+                        help='Scan every review source under DIR (Play Console and App Store Connect exports, '
+                             'any app) in parallel shards per source and app (default DIR: data/feedback)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Hold reviews in compact dtypes (categoricals, small ints, Arrow strings) '
+                             'and report the memory saved')
+    parser.add_argument('--dedup', action='store_true',
+                        help='Cluster near-duplicate mention texts (MinHash/LSH) and report raw and distinct counts')
+    parser.add_argument('--english-only', action='store_true',
+                        help='Match only the English keywords, whatever the review language')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profile_from_args('analyze_sibling_mentions', args)
+
+    # Each review is matched against its own language's keywords plus English
+    taxonomy = {BASE_LANGUAGE: sibling_keywords} if args.english_only else SIBLING_TAXONOMY
+    matcher = LanguageIndex(taxonomy)
+
+    print("=" * 80)
+    print("FamilySearch Android App - Sibling Feature Analysis")
+    print("=" * 80)
+
+    print(f"\n1. DATA LOADING")
+    if args.sources:
+        analyze_sources(args.sources, taxonomy, args.workers or None, args.chunksize, args.dedup)
+    elif args.store:
+        # pyarrow is only needed when reading from the store
+        from review_store import iter_store_chunks, read_reviews
+
+        print(f"   Reading review store {args.store}")
+        if args.stream:
+            analyze_streaming(iter_store_chunks(args.store, columns=ANALYSIS_COLUMNS, chunksize=args.chunksize),
+                              matcher, args.dedup)
+        else:
+            with stage('decode') as s:
+                all_reviews = read_reviews(args.store, columns=ANALYSIS_COLUMNS)
+                s.rows_out = len(all_reviews)
+            if args.compact:
+                raw_bytes = memory_usage(all_reviews)
+                with stage('compact', rows_in=len(all_reviews)):
+                    all_reviews = compact_reviews(all_reviews)
+                print(f"   {memory_report(raw_bytes, all_reviews)}")
+            analyze_batch(all_reviews, matcher, args.dedup)
+    else:
+        # Load all CSV files
+        csv_files = sorted(glob.glob('data/feedback/android/*.csv'))
+        print(f"   Found {len(csv_files)} CSV files")
+        if csv_files:
+            print(f"   Date range: {Path(csv_files[0]).stem.split('_')[-1]} to {Path(csv_files[-1]).stem.split('_')[-1]}")
+
+        if args.cache:
+            mode = 'cache'
+        elif args.workers is not None:
+            mode = 'parallel'
+        else:
+            mode = 'stream' if args.stream else 'compact' if args.compact else 'batch'
+        analyze_exports(csv_files, taxonomy, mode, matcher, args.workers or None, args.chunksize, args.dedup,
+                        args.cache)
+
+    print("\n" + "=" * 80)
+    print("Analysis complete!")
+    print("=" * 80)
+    finish_profile()
+
 
-print("\n" + "=" * 80)
-print("Analysis complete!")
-print("=" * 80)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark the sibling-mention analysis pipeline
+
+Runs analyze_sibling_mentions.analyze_exports over a directory of Play
+Console exports, once per mode, and records wall time, CPU time, row counts,
+throughput and peak RSS, plus the per-stage numbers (decode, filter, match,
+write, ...) that the analysis reports through profiling.py, to a JSON
+results file so runs can be compared over time. Every mode runs in its own
+fresh process and temporary working directory, so peak RSS is measured per
+mode rather than cumulatively and the cache mode starts cold. A mode that
+raises, or whose process dies, is recorded with its error and the remaining
+modes still run.
+
+Usage:
+    python benchmarks/generate_reviews.py --reviews 1000000 --output /tmp/bench/data/feedback/android
+    python benchmarks/bench_pipeline.py --data /tmp/bench/data/feedback/android
+    python benchmarks/bench_pipeline.py --data /tmp/bench/data/feedback/android --modes batch stream --repeat 3
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from analyze_sibling_mentions import ANALYSIS_MODES, analyze_exports
+from keyword_taxonomy import SIBLING_TAXONOMY
+from profiling import start_profile
+from review_loader import DEFAULT_CHUNKSIZE
+
+MODES = ANALYSIS_MODES
+DEFAULT_RESULTS = 'benchmarks/results'
+POLL_SECONDS = 1.0
+
+
+def run_mode(mode, csv_files, chunksize, workers, results):
+    """Run one mode end to end in this process and put its measurements, or its error, on `results`"""
+    try:
+        results.put(measure_mode(mode, csv_files, chunksize, workers))
+    except Exception as e:
+        traceback.print_exc()
+        results.put({'mode': mode, 'error': f'{type(e).__name__}: {e}'})
+
+
+def measure_mode(mode, csv_files, chunksize, workers):
+    """Run one mode end to end and return its measurements"""
+    # Allocation tracing would slow the stages down, so only peak RSS is measured
+    profiler = start_profile(f'bench_{mode}', trace_memory=False)
+    csv_files = [os.path.abspath(file) for file in csv_files]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The analysis writes its outputs (and the cache mode its cache) under data/
+        os.chdir(tmp_dir)
+        os.makedirs('data')
+        try:
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                stats = analyze_exports(csv_files, SIBLING_TAXONOMY, mode, workers=workers, chunksize=chunksize)
+        finally:
+            os.chdir(cwd)
+    measured = profiler.results()
+
+    return {
+        'mode': mode,
+        'wall_s': measured['wall_s'],
+        # Worker CPU time is not included for the parallel and cache modes
+        'cpu_s': measured['cpu_s'],
+        'rows_in': stats.total,
+        'rows_out': stats.mentions,
+        'rows_per_s': round(stats.total / measured['wall_s']) if measured['wall_s'] else None,
+        'peak_rss_mb': measured['peak_rss_mb'],
+        'stages': measured['stages'],
+    }
+
+
+def benchmark(mode, csv_files, chunksize, workers):
+    """
+    Run `mode` in a fresh spawned process and return its measurements, or
+    a record with its 'error' if it failed or the process died
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_mode, args=(mode, csv_files, chunksize, workers, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=POLL_SECONDS)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                # The result may have landed between the timeout and the check
+                try:
+                    result = results.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    result = {'mode': mode, 'error': f'process exited with code {process.exitcode}'}
+                break
+    process.join()
+    return result
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def dataset(csv_files):
+    return {
+        'files': len(csv_files),
+        'bytes': sum(os.path.getsize(file) for file in csv_files),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sibling-mention analysis pipeline')
+    parser.add_argument('--data', default='benchmarks/data/feedback/android',
+                        help='Directory of Play Console CSV exports (default: benchmarks/data/feedback/android)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES,
+                        help=f'Modes to benchmark (default: {" ".join(MODES)})')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per mode (default: 1)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f'Rows per chunk for the stream, parallel and cache modes '
+                             f'(default: {DEFAULT_CHUNKSIZE:,})')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes for the parallel and cache modes (default: one per CPU)')
+    parser.add_argument('--output', help=f'Results file (default: {DEFAULT_RESULTS}/bench_<timestamp>.json)')
+    args = parser.parse_args()
+
+    csv_files = sorted(glob.glob(os.path.join(args.data, '*.csv')))
+    if not csv_files:
+        parser.error(f"No CSV files found in {args.data}; generate some with benchmarks/generate_reviews.py")
+
+    print("=" * 80)
+    print("Sibling Mention Pipeline Benchmark")
+    print("=" * 80)
+    data = dataset(csv_files)
+    print(f"   {data['files']} files, {data['bytes'] / 1024**2:,.1f} MB in {args.data}")
+
+    runs = []
+    for mode in args.modes:
+        for repeat in range(args.repeat):
+            result = benchmark(mode, csv_files, args.chunksize, args.workers)
+            result['repeat'] = repeat
+            runs.append(result)
+            if 'error' in result:
+                print(f"\n   {mode} (run {repeat + 1}/{args.repeat}): failed, {result['error']}")
+                continue
+            stages = ', '.join(f"{stage['stage']} {stage['wall_s']:.2f}s"
+                               for stage in result['stages'] if stage['depth'] == 0)
+            print(f"\n   {mode} (run {repeat + 1}/{args.repeat}): {result['wall_s']:.2f}s, "
+                  f"{result['rows_per_s']:,} rows/s, peak RSS {result['peak_rss_mb']:,.0f} MB")
+            print(f"      {stages}")
+            print(f"      {result['rows_in']:,} reviews -> {result['rows_out']:,} mentions")
+
+    timestamp = time.strftime('%Y%m%dT%H%M%S')
+    output = args.output or os.path.join(DEFAULT_RESULTS, f'bench_{timestamp}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'timestamp': timestamp,
+            'environment': environment(),
+            'dataset': {**data, 'path': args.data, 'chunksize': args.chunksize, 'workers': args.workers},
+            'runs': runs,
+        }, f, indent=2)
+    print(f"\n   Saved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
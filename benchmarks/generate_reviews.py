@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Google Play Console review exports for benchmarking
+
+Writes UTF-16 CSVs with the exact Play Console header, one file per month,
+so the analysis pipeline can be timed at any size without the real
+(git-ignored) exports. Text is drawn from a per-language pool of generated
+reviews with realistic lengths, about 40% of reviews have text, and a small
+share of them mention a sibling keyword.
+
+Usage:
+    python benchmarks/generate_reviews.py --reviews 1000000 --months 36 --output /tmp/bench/data/feedback/android
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_taxonomy import SIBLING_TAXONOMY
+from review_loader import EXPORT_COLUMNS
+
+PACKAGE_NAME = 'org.familysearch.mobile'
+START_MONTH = pd.Timestamp('2023-01-01')
+
+# Share of reviews per language, roughly matching the real exports
+LANGUAGE_WEIGHTS = {'en': 0.62, 'es': 0.14, 'pt': 0.09, 'de': 0.04, 'fr': 0.03, 'it': 0.02, 'nl': 0.01,
+                    'ja': 0.02, 'ko': 0.02, 'ru': 0.01}
+
+FILLER_WORDS = {
+    'en': 'the app is great but it keeps crashing when I open my family tree and search records love it please fix login slow'.split(),
+    'es': 'la aplicación es muy buena pero se cierra cuando abro mi árbol familiar y busco registros por favor arreglen'.split(),
+    'pt': 'o aplicativo é muito bom mas fecha quando abro minha árvore familiar e procuro registros por favor corrijam'.split(),
+    'de': 'die App ist toll aber sie stürzt ab wenn ich meinen Stammbaum öffne und Datensätze suche bitte beheben'.split(),
+    'fr': "l'application est super mais elle plante quand j'ouvre mon arbre généalogique et cherche des archives".split(),
+    'it': "l'app è ottima ma si blocca quando apro il mio albero genealogico e cerco i documenti per favore".split(),
+    'nl': 'de app is geweldig maar crasht als ik mijn stamboom open en naar records zoek graag oplossen'.split(),
+}
+
+DEVICES = ['barbet', 'dandelion', 'a52q', 'bluejay', 'oriole', 'panther', 'redfin', 'sunfish', 'x1q', 'beyond1']
+VERSIONS = [f'4.{minor}.{patch}' for minor in range(6, 10) for patch in range(0, 12)]
+
+TEXT_SHARE = 0.4
+MENTION_SHARE = 0.005  # of reviews with text
+POOL_SIZE = 2000
+
+
+def text_pool(language, rng):
+    """Distinct review texts for one language, with log-normal word counts"""
+    words = np.array(FILLER_WORDS.get(language, FILLER_WORDS['en']))
+    keywords = SIBLING_TAXONOMY.get(language, SIBLING_TAXONOMY['en'])
+    lengths = np.clip(rng.lognormal(mean=3.0, sigma=0.8, size=POOL_SIZE).astype(int), 1, 120)
+    texts = []
+    for i, length in enumerate(lengths):
+        review = list(rng.choice(words, size=length))
+        # The last few pool entries mention a sibling keyword
+        if i >= POOL_SIZE * (1 - MENTION_SHARE):
+            review.insert(rng.integers(0, len(review) + 1), str(rng.choice(keywords)))
+        review[0] = review[0].capitalize()
+        texts.append(' '.join(review) + '.')
+    return np.array(texts, dtype=object)
+
+
+def month_bounds(month):
+    """Epoch millis of the start of `month` (counted from START_MONTH) and of the next one"""
+    start = START_MONTH + pd.DateOffset(months=month)
+    end = START_MONTH + pd.DateOffset(months=month + 1)
+    return start.value // 1_000_000, end.value // 1_000_000
+
+
+def generate_month(month, rows, pools, rng):
+    """Synthetic reviews submitted in one month, as a DataFrame with the export header"""
+    languages = np.array(list(LANGUAGE_WEIGHTS))
+    weights = np.array(list(LANGUAGE_WEIGHTS.values()))
+    review_languages = rng.choice(languages, size=rows, p=weights / weights.sum())
+
+    texts = np.full(rows, None, dtype=object)
+    has_text = rng.random(rows) < TEXT_SHARE
+    for language in languages:
+        mask = has_text & (review_languages == language)
+        pool = pools[language if language in pools else 'en']
+        picks = rng.integers(0, len(pool), size=mask.sum())
+        texts[mask] = pool[picks]
+
+    month_start, month_end = month_bounds(month)
+    submitted = np.sort(rng.integers(month_start, month_end, size=rows))
+    updated = submitted + np.where(rng.random(rows) < 0.1, rng.integers(0, 86_400_000, size=rows), 0)
+    version_index = np.minimum(month // 3 + rng.integers(0, 4, size=rows), len(VERSIONS) - 1)
+    ratings = rng.choice([1, 2, 3, 4, 5], size=rows, p=[0.14, 0.05, 0.08, 0.15, 0.58])
+    review_ids = [f'{value:032x}' for value in rng.integers(0, 2**63, size=rows, dtype=np.int64)]
+
+    def iso(millis):
+        return pd.to_datetime(millis, unit='ms').strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    df = pd.DataFrame({
+        'Package Name': PACKAGE_NAME,
+        'App Version Code': 41000 + version_index,
+        'App Version Name': np.array(VERSIONS)[version_index],
+        'Reviewer Language': review_languages,
+        'Device': rng.choice(DEVICES, size=rows),
+        'Review Submit Date and Time': iso(submitted),
+        'Review Submit Millis Since Epoch': submitted,
+        'Review Last Update Date and Time': iso(updated),
+        'Review Last Update Millis Since Epoch': updated,
+        'Star Rating': ratings,
+        'Review Title': None,
+        'Review Text': texts,
+        'Developer Reply Date and Time': None,
+        'Developer Reply Millis Since Epoch': None,
+        'Developer Reply Text': None,
+        'Review Link': [
+            'http://play.google.com/console/developers/8264880723452882397/app/4972259123017277510/'
+            f'user-feedback/review-details?reviewId={review_id}&corpus=PUBLIC_REVIEWS'
+            for review_id in review_ids
+        ],
+    })
+    return df[EXPORT_COLUMNS]
+
+
+def generate(output_dir, reviews, months, seed=0, chunksize=200_000):
+    """Write `reviews` synthetic reviews spread over `months` monthly files"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    pools = {language: text_pool(language, rng) for language in FILLER_WORDS}
+    per_month = np.full(months, reviews // months)
+    per_month[: reviews % months] += 1
+
+    files = []
+    for month, rows in enumerate(per_month):
+        stamp = (START_MONTH + pd.DateOffset(months=month)).strftime('%Y%m')
+        path = os.path.join(output_dir, f'reviews_reviews_{PACKAGE_NAME}_{stamp}.csv')
+        # One handle per file so the UTF-16 BOM is written only once
+        with open(path, 'w', encoding='utf-16', newline='') as f:
+            for start in range(0, rows, chunksize):
+                chunk = generate_month(month, min(chunksize, rows - start), pools, rng)
+                chunk.to_csv(f, index=False, header=start == 0)
+        files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic Play Console review exports')
+    parser.add_argument('--reviews', type=int, default=10_000, help='Total reviews to generate (default: 10,000)')
+    parser.add_argument('--months', type=int, default=36, help='Monthly files to spread them over (default: 36)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--output', default='benchmarks/data/feedback/android',
+                        help='Output directory (default: benchmarks/data/feedback/android)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    files = generate(args.output, args.reviews, args.months, args.seed)
+    size = sum(os.path.getsize(path) for path in files)
+    print(f"Generated {args.reviews:,} reviews in {len(files)} files ({size / 1024**2:,.1f} MB) "
+          f"in {time.perf_counter() - start:.1f}s")
+    print(f"Location: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
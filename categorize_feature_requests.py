@@ -1,34 +1,221 @@
 #!/usr/bin/env python3
 """
 Categorize sibling-related reviews to identify feature requests
+
+Streams data/sibling_mentions.csv in chunks and pages through the reviews
+that have no label yet, one at a time, saving each label to a persistent
+label store (see label_store.py) as soon as it is made. Rerunning resumes
+where the last session stopped, so a session costs time proportional to
+the unlabelled reviews rather than to the whole file.
+
+Usage:
+    python categorize_feature_requests.py                 # label unlabelled reviews interactively
+    python categorize_feature_requests.py --prelabel      # rule-based pre-labels first, then confirm them
+    python categorize_feature_requests.py --list --page 2 # print a page of unlabelled reviews
+    python categorize_feature_requests.py --summary       # label counts only
+    python categorize_feature_requests.py --compact-labels  # drop relabelled reviews' superseded lines
 """
 
+import argparse
+import sys
+
 import pandas as pd
 
-print("=" * 80)
-print("Categorizing Sibling-Related Reviews")
-print("=" * 80)
+from label_store import CATEGORIES, DEFAULT_LABELS, LabelStore, prelabel, review_keys
+from profiling import add_profile_arguments, finish_profile, iterate, profile_from_args, stage
+from review_loader import MENTION_DTYPES
+
+input_file = 'data/sibling_mentions.csv'
+
+DEFAULT_CHUNKSIZE = 10_000
+DEFAULT_PAGE_SIZE = 20
+
+# Columns shown to the reviewer, renamed so itertuples gives readable attributes
+DISPLAY_COLUMNS = {
+    'Review Submit Date and Time': 'date',
+    'Star Rating': 'rating',
+    'Reviewer Language': 'language',
+    'Matched Keywords': 'keywords',
+    'Review Text': 'text',
+}
+
+# Single-key answers at the prompt
+KEYS = {'f': 'feature_request', 'n': 'navigation_issue', 'o': 'other', 'u': 'unsure'}
+
 
-# Load the sibling mentions
-sibling_mentions = pd.read_csv('data/sibling_mentions.csv')
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Chunks of the mentions file, each with a 'key' column identifying the review"""
+    for chunk in iterate('decode', pd.read_csv(path, chunksize=chunksize, dtype=MENTION_DTYPES)):
+        with stage('review_keys', rows_in=len(chunk)):
+            chunk['key'] = review_keys(chunk)
+        yield chunk
 
-print(f"\nTotal sibling-related reviews: {len(sibling_mentions)}")
-print("\n" + "=" * 80)
-print("ALL REVIEWS WITH SIBLING/FAMILY MENTIONS")
-print("=" * 80)
 
-# Display all reviews for manual categorization
-for i, (idx, row) in enumerate(sibling_mentions.iterrows(), 1):
+def iter_unlabelled(path, store, chunksize=DEFAULT_CHUNKSIZE, include_rules=True):
+    """
+    (key, row) for each review not yet in `store`, where `row` is a named
+    tuple of the DISPLAY_COLUMNS. With `include_rules=False`, reviews that
+    only have a rule pre-label are yielded too, so they can be confirmed.
+    """
+    labelled = store.labelled_keys(include_rules)
+    for chunk in iter_chunks(path, chunksize):
+        with stage('filter_unlabelled', rows_in=len(chunk)) as s:
+            pending = chunk[~chunk['key'].isin(labelled)]
+            columns = [column for column in DISPLAY_COLUMNS if column in pending]
+            rows = pending[columns].rename(columns=DISPLAY_COLUMNS)
+            s.rows_out = len(rows)
+        yield from zip(pending['key'], rows.itertuples(index=False, name='Review'))
+
+
+def prelabel_reviews(path, store, chunksize=DEFAULT_CHUNKSIZE):
+    """Apply the rule-based pre-labels to unlabelled reviews, one chunk at a time"""
+    labelled = 0
+    for chunk in iter_chunks(path, chunksize):
+        with stage('prelabel', rows_in=len(chunk)) as s:
+            pending = chunk[~chunk['key'].isin(list(store.labels))]
+            labels = prelabel(pending['Review Text']).dropna()
+            s.rows_out = len(labels)
+        with stage('save_labels', rows_in=len(labels)):
+            store.add_many(zip(pending.loc[labels.index, 'key'], labels), source='rule')
+        labelled += len(labels)
+    return labelled
+
+
+def print_review(number, row, suggestion=None):
     print(f"\n{'='*80}")
-    print(f"Review #{i}")
+    print(f"Review #{number}")
     print(f"{'='*80}")
-    print(f"Date: {row['Review Submit Date and Time']}")
-    print(f"Rating: {row['Star Rating']} stars")
-    print(f"Language: {row['Reviewer Language']}")
+    print(f"Date: {row.date}")
+    print(f"Rating: {row.rating} stars")
+    print(f"Language: {row.language}")
+    if hasattr(row, 'keywords'):
+        print(f"Matched: {row.keywords}")
     print(f"\nReview Text:")
-    print(f"{row['Review Text']}")
+    print(f"{row.text}")
+    if suggestion:
+        print(f"\nSuggested: {CATEGORIES[suggestion['category']]}")
     print()
 
-print("\n" + "=" * 80)
-print("Review complete - see all 23 reviews above")
-print("=" * 80)
+
+def ask(suggestion=None):
+    """Read a category from the reviewer: a category, 'skip', or 'quit'"""
+    options = ', '.join(f"[{key}] {CATEGORIES[category]}" for key, category in KEYS.items())
+    default = ' [Enter] accept suggestion,' if suggestion else ''
+    while True:
+        try:
+            answer = input(f"{options},{default} [s] skip, [q] quit: ").strip().lower()
+        except EOFError:
+            return 'quit'
+        if answer in KEYS:
+            return KEYS[answer]
+        if not answer and suggestion:
+            return suggestion['category']
+        if answer in ('s', 'q'):
+            return {'s': 'skip', 'q': 'quit'}[answer]
+
+
+def review_session(path, store, page_size=DEFAULT_PAGE_SIZE, chunksize=DEFAULT_CHUNKSIZE, confirm_rules=False):
+    """Label unlabelled reviews one at a time until they run out or the reviewer quits"""
+    labelled = skipped = 0
+    for number, (key, row) in enumerate(iter_unlabelled(path, store, chunksize, include_rules=not confirm_rules), 1):
+        if number % page_size == 1 or page_size == 1:
+            print(f"\n--- Page {(number - 1) // page_size + 1} ({len(store):,} labelled so far) ---")
+        suggestion = store.get(key)
+        print_review(number, row, suggestion)
+        answer = ask(suggestion)
+        if answer == 'quit':
+            print("   Stopping; labels so far are saved")
+            break
+        if answer == 'skip':
+            skipped += 1
+            continue
+        store.add(key, answer)
+        labelled += 1
+    return labelled, skipped
+
+
+def list_page(path, store, page, page_size=DEFAULT_PAGE_SIZE, chunksize=DEFAULT_CHUNKSIZE):
+    """Print one page of unlabelled reviews without prompting"""
+    first = (page - 1) * page_size + 1
+    shown = 0
+    for number, (key, row) in enumerate(iter_unlabelled(path, store, chunksize), 1):
+        if number < first:
+            continue
+        if number >= first + page_size:
+            break
+        print_review(number, row)
+        shown += 1
+    return shown
+
+
+def print_summary(store):
+    print(f"\nLabels in {store.path}: {len(store):,}")
+    counts = store.counts()
+    for category, description in CATEGORIES.items():
+        manual = counts.get((category, 'manual'), 0)
+        rule = counts.get((category, 'rule'), 0)
+        print(f"   {description}: {manual + rule:,} ({manual:,} manual, {rule:,} rule-based)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Categorize sibling-related reviews')
+    parser.add_argument('--input', default=input_file, help=f'Sibling mentions CSV (default: {input_file})')
+    parser.add_argument('--labels', default=DEFAULT_LABELS, help=f'Label store (default: {DEFAULT_LABELS})')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f'Reviews per page (default: {DEFAULT_PAGE_SIZE})')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f'Rows read from the input at a time (default: {DEFAULT_CHUNKSIZE:,})')
+    parser.add_argument('--prelabel', action='store_true',
+                        help='Pre-label unlabelled reviews with keyword rules, then review the rule labels')
+    parser.add_argument('--confirm-rules', action='store_true',
+                        help='Also show reviews that only have a rule-based label, to confirm or override it')
+    parser.add_argument('--list', action='store_true', help='Print a page of unlabelled reviews instead of prompting')
+    parser.add_argument('--page', type=int, default=1, help='Page to print with --list (default: 1)')
+    parser.add_argument('--summary', action='store_true', help='Only print the label counts')
+    parser.add_argument('--compact-labels', action='store_true',
+                        help='Rewrite the label store with only the latest label per review, then print the counts')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profile_from_args('categorize_feature_requests', args)
+
+    print("=" * 80)
+    print("Categorizing Sibling-Related Reviews")
+    print("=" * 80)
+
+    with stage('load_labels') as s:
+        store = LabelStore(args.labels)
+        s.rows_out = len(store)
+    print(f"\nLabel store: {args.labels} ({len(store):,} labelled)")
+
+    if args.compact_labels:
+        with stage('compact_labels', rows_in=store.lines) as s:
+            dropped = store.compact()
+            s.rows_out = store.lines
+        print(f"   Compacted {args.labels}: dropped {dropped:,} superseded lines")
+
+    if args.summary or args.compact_labels:
+        print_summary(store)
+        finish_profile()
+        return
+
+    if args.prelabel:
+        added = prelabel_reviews(args.input, store, args.chunksize)
+        print(f"   Pre-labelled {added:,} reviews with keyword rules")
+
+    if args.list or not sys.stdin.isatty():
+        shown = list_page(args.input, store, args.page, args.page_size, args.chunksize)
+        print(f"\nShowed {shown:,} unlabelled reviews (page {args.page}, {args.page_size} per page)")
+    else:
+        labelled, skipped = review_session(args.input, store, args.page_size, args.chunksize,
+                                           confirm_rules=args.confirm_rules or args.prelabel)
+        print(f"\n   Labelled {labelled:,} reviews this session, skipped {skipped:,}")
+
+    print_summary(store)
+    print("\n" + "=" * 80)
+    print("Review complete")
+    print("=" * 80)
+    finish_profile()
+
+
+if __name__ == "__main__":
+    main()
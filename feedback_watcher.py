@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Watch a project's export folders and refresh its summary as exports land
+
+A long-running asyncio service for one project directory. It polls
+
+    data/feedback/**/*.csv, *.json  review exports from every store (review_sources.py)
+    data/analytics/adobe/*.csv      Adobe Analytics Workspace exports
+
+and processes each new or changed file once it has stopped growing: its
+size and mtime must hold still for `settle` seconds, so a file that is still
+being copied in is not read half-written. Only that file is processed:
+
+- a review export is decoded and matched in a bounded process pool (at most
+  `workers` files at once, however many land together) by the adapter of its
+  source, and its ReviewStats and mentions are kept per (source, app) shard.
+  Play Console exports go through the results cache shared with
+  `analyze_sibling_mentions.py --cache`, as one shard per file for the
+  package in its name; App Store Connect exports are split by app
+- an Adobe export is parsed; the newest one with a complete pedigree funnel
+  gives the headline web figures, and every export and segment is kept for
+  the per-segment intervals
+
+After each batch of finished files, the per-file partials are merged in file
+order and the outputs are written: the mentions CSV, review_counts.json
+(with the per-platform and per-shard counts, like
+`analyze_sibling_mentions.py --sources`), review_trends.json and the summary
+JSON that report_content.json names. The summary keeps its narrative fields
+and gets fresh figures and confidence intervals (rate_intervals.py). Every file is written to a
+temporary name and renamed over the old one, so readers never see a torn
+file. With --render the report and slides are re-rendered too.
+
+Usage:
+    python feedback_watcher.py projects/sibling-feature
+    python feedback_watcher.py projects/sibling-feature --workers 2 --settle 5 --render
+    python feedback_watcher.py projects/sibling-feature --once     # catch up, write outputs and exit
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from keyword_taxonomy import SIBLING_TAXONOMY
+from report_content import CONTENT_FILE
+from review_loader import _init_worker, mention_rows, scan_export
+from review_sources import DEFAULT_ROOT, Shard, count_summary, detect_source, merge_shards, scan_source_file
+from review_trends import trend_summary
+
+FEEDBACK_DIR = DEFAULT_ROOT
+REVIEW_SUFFIXES = ('.csv', '.json')
+ANALYTICS_DIR = 'data/analytics/adobe'
+CACHE_DIR = 'data/cache/sibling_mentions'
+MENTIONS_FILE = 'data/sibling_mentions.csv'
+COUNTS_FILE = 'data/processed/review_counts.json'
+TRENDS_FILE = 'data/processed/review_trends.json'
+
+DEFAULT_WORKERS = 2
+DEFAULT_INTERVAL = 1.0
+DEFAULT_SETTLE = 2.0
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+def replace_file(path, write):
+    """Call write(tmp_path), then rename the result over `path`"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_json(path, data):
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+    replace_file(path, write)
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def summary_path(project_dir):
+    """The summary JSON named in a project's report_content.json"""
+    content_file = os.path.join(project_dir, CONTENT_FILE)
+    summary = 'data/processed/sibling_feature_business_case_summary.json'
+    if os.path.exists(content_file):
+        with open(content_file, encoding='utf-8') as f:
+            summary = json.load(f).get('summary', summary)
+    return os.path.join(project_dir, summary)
+
+
+def merge_reviews(results):
+    """{(source, app): Shard} from per-export {(source, app): (stats, mentions)}, merged in file order"""
+    shards = {}
+    for path in sorted(results):
+        for (source, app), (stats, mentions) in results[path].items():
+            if (source, app) not in shards:
+                shards[(source, app)] = Shard(source, app)
+            shards[(source, app)].add(path, stats, mentions)
+    return shards
+
+
+def web_figures(funnels):
+    """(headline metrics, all segments) from the parsed Adobe exports, as {path: (mtime, table)}"""
+    from adobe_analytics import FUNNEL_COUNTS, funnel_metrics
+
+    if not funnels:
+        return None, None
+    segments = funnel_metrics(pd.concat([table for _, table in funnels.values()], ignore_index=True))
+
+    headline = None
+    for path in sorted(funnels, key=lambda path: funnels[path][0], reverse=True):
+        rows = segments[segments['source_file'] == Path(path).name]
+        if len(rows) and all(rows.iloc[0][key] > 0 for key in FUNNEL_COUNTS):
+            headline = rows.iloc[0].drop(['source_file', 'segment']).to_dict()
+            for key in FUNNEL_COUNTS:
+                headline[key] = int(headline[key])
+            break
+    return headline, segments
+
+
+def update_summary(summary, stats, trends, web=None, segments=None, platforms=None):
+    """
+    Refresh a business case summary's figures and intervals in place,
+    keeping its other fields; `platforms` ({platform: ReviewStats}) adds the
+    per-platform counts when there is more than one
+    """
+    from rate_intervals import add_summary_intervals
+
+    summary['report_date'] = datetime.now().strftime('%Y-%m-%d')
+    if web is not None:
+        summary['web_analytics'] = {key: float(value) if key.startswith('sibling_pct') else value
+                                    for key, value in web.items()}
+    if stats is not None:
+        summary['mobile_feedback'] = {
+            'total_reviews': stats.total,
+            'reviews_with_text': stats.with_text,
+            'sibling_mentions': stats.mentions,
+            'pct_of_all_reviews': stats.mentions / stats.total * 100 if stats.total else 0,
+            'pct_of_text_reviews': stats.mentions / stats.with_text * 100 if stats.with_text else 0,
+            'trends': trends,
+        }
+        if platforms and len(platforms) > 1:
+            summary['mobile_feedback']['platforms'] = {platform: count_summary(totals)
+                                                       for platform, totals in sorted(platforms.items())}
+    add_summary_intervals(summary, segments)
+    return summary
+
+
+class FeedbackWatcher:
+    """Polls one project's export folders and keeps its outputs current"""
+
+    def __init__(self, project_dir, workers=DEFAULT_WORKERS, interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE,
+                 render=False, taxonomy=SIBLING_TAXONOMY):
+        from results_cache import ResultsCache
+
+        self.project_dir = project_dir
+        self.workers = workers
+        self.interval = interval
+        self.settle = settle
+        self.render = render
+        self.taxonomy = taxonomy
+        self.cache = ResultsCache(self.path(CACHE_DIR), root=self.path(FEEDBACK_DIR))
+        # The cache is read and written from worker threads, off the event loop
+        self.cache_lock = threading.Lock()
+        self.summary_file = summary_path(project_dir)
+
+        self.reviews = {}      # review export -> {(source, app): (stats, mentions)}
+        self.funnels = {}      # Adobe export -> (mtime, parsed table)
+        self.done = {}         # path -> signature it was processed (or failed) at
+        self.pending = {}      # path -> (signature, first seen at that signature)
+        self.running = set()
+        self.tasks = set()
+        self.stopping = asyncio.Event()
+        self.dirty = asyncio.Event()
+        self.changed = False
+        self.closing = False
+        self.pool = None
+        self.slots = None
+
+    def path(self, relative):
+        return os.path.join(self.project_dir, relative)
+
+    def exports(self):
+        """
+        {path: kind} for every export currently in the watched folders; a
+        review file's source is only detected once it has settled
+        """
+        found = {}
+        folders = ((FEEDBACK_DIR, 'reviews', REVIEW_SUFFIXES), (ANALYTICS_DIR, 'analytics', ('.csv',)))
+        for folder, kind, suffixes in folders:
+            for path in Path(self.path(folder)).rglob('*'):
+                if path.suffix in suffixes and path.is_file():
+                    found[str(path)] = kind
+        return found
+
+    def poll(self, settle):
+        """Start processing files unchanged for `settle` seconds; forget files that were removed"""
+        now = time.monotonic()
+        exports = self.exports()
+
+        removed = [path for path in set(self.reviews) | set(self.funnels) if path not in exports]
+        for path in removed:
+            log(f"Removed {path}")
+            self.reviews.pop(path, None)
+            self.funnels.pop(path, None)
+            self.done.pop(path, None)
+        if removed:
+            keep = [path for path, kind in exports.items() if kind == 'reviews' and path.endswith('.csv')]
+            task = asyncio.create_task(asyncio.to_thread(self.prune_cache, keep))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            self.changed = True
+            self.dirty.set()
+
+        for path, kind in sorted(exports.items()):
+            if path in self.running:
+                continue
+            try:
+                signature = file_signature(path)
+            except FileNotFoundError:
+                continue
+            if self.done.get(path) == signature:
+                self.pending.pop(path, None)
+                continue
+            seen = self.pending.get(path)
+            if seen is None or seen[0] != signature:
+                self.pending[path] = (signature, now)
+            elif now - seen[1] >= settle:
+                del self.pending[path]
+                self.running.add(path)
+                task = asyncio.create_task(self.process(path, kind, signature))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+    async def process(self, path, kind, signature):
+        try:
+            async with self.slots:
+                start = time.perf_counter()
+                if kind == 'reviews':
+                    ok = await self.process_reviews(path)
+                else:
+                    ok = await self.process_analytics(path)
+                if ok:
+                    log(f"Processed {path} in {time.perf_counter() - start:.2f}s")
+                    self.changed = True
+                    self.dirty.set()
+        except Exception as e:
+            log(f"Error processing {path}: {e}")
+        finally:
+            # A failed file is retried only once it changes again
+            self.done[path] = signature
+            self.running.discard(path)
+
+    async def process_reviews(self, path):
+        source = await asyncio.to_thread(detect_source, path)
+        if source is None:
+            log(f"Skipping {path}: not a known review export")
+            return False
+        loop = asyncio.get_running_loop()
+        if source.name != 'play_console':
+            partials, errors = await loop.run_in_executor(self.pool, scan_source_file, (path, source.name))
+            for _, error in errors:
+                log(f"Error loading {path}: {error}")
+            if errors:
+                return False
+            self.reviews[path] = partials
+            return True
+
+        checksum = await asyncio.to_thread(self.cache.checksum, path)
+        # A lookup after a keyword removal re-filters and rewrites the cached rows
+        cached = await asyncio.to_thread(self.lookup_cache, path, checksum)
+        if cached is None:
+            stats, mentions, errors = await loop.run_in_executor(self.pool, scan_export, path)
+            if errors or mentions is None:
+                for _, error in errors:
+                    log(f"Error loading {path}: {error}")
+                return False
+            await asyncio.to_thread(self.store_cache, path, checksum, stats, mentions)
+            cached = stats, mentions
+        self.reviews[path] = {(source.name, source.package(path)): cached}
+        return True
+
+    def lookup_cache(self, path, checksum):
+        with self.cache_lock:
+            return self.cache.lookup(path, checksum, self.taxonomy)
+
+    def store_cache(self, path, checksum, stats, mentions):
+        with self.cache_lock:
+            self.cache.store(path, checksum, self.taxonomy, stats, mentions)
+            self.cache.save()
+
+    def prune_cache(self, paths):
+        """Forget cached review exports that are not in `paths`"""
+        with self.cache_lock:
+            self.cache.prune(paths)
+            self.cache.save()
+
+    async def process_analytics(self, path):
+        from adobe_analytics import parse_export
+
+        table = await asyncio.to_thread(parse_export, path)
+        self.funnels[path] = (os.path.getmtime(path), table)
+        return True
+
+    def write_outputs(self, reviews, funnels):
+        """Merge the partials and rewrite every output file; runs in a worker thread"""
+        start = time.perf_counter()
+        shards = merge_reviews(reviews) if reviews else None
+        stats, platforms = merge_shards(shards) if shards else (None, None)
+        trends = trend_summary(stats.trends) if stats is not None else None
+        web, segments = web_figures(funnels)
+
+        if stats is not None:
+            # Per shard, as cached Play Console rows carry a review link rather than a source and id
+            mentions = pd.concat([mention_rows(shard.mention_rows()) for shard in shards.values()], ignore_index=True)
+            replace_file(self.path(MENTIONS_FILE),
+                         lambda tmp_path: mentions.to_csv(tmp_path, index=False, encoding='utf-8'))
+            write_json(self.path(COUNTS_FILE), {
+                **count_summary(stats),
+                'platforms': {platform: count_summary(totals) for platform, totals in sorted(platforms.items())},
+                'shards': [shard.to_dict() for shard in shards.values()],
+            })
+            write_json(self.path(TRENDS_FILE), trends)
+
+        summary = {}
+        if os.path.exists(self.summary_file):
+            with open(self.summary_file) as f:
+                summary = json.load(f)
+        write_json(self.summary_file, update_summary(summary, stats, trends, web, segments, platforms))
+
+        described = [f"{stats.mentions:,} mentions in {stats.with_text:,} reviews with text"] if stats else []
+        if web:
+            described.append(f"{web['sibling_pct_ancestor_users']:.1f}% of engaged web users toggle siblings")
+        log(f"Updated {self.summary_file} ({'; '.join(described) or 'no exports'}) "
+            f"in {time.perf_counter() - start:.2f}s")
+
+        if self.render:
+            from render_deliverables import render_project
+            render_project(self.project_dir)
+
+    async def refresher(self):
+        """
+        Write the outputs once per burst of processed files, one write at a
+        time; after `closing` is set, write anything left and return
+        """
+        while True:
+            await self.dirty.wait()
+            # Let files that settled together finish first, then write once
+            while self.running:
+                await asyncio.sleep(self.interval)
+            self.dirty.clear()
+            if self.changed:
+                self.changed = False
+                try:
+                    await asyncio.to_thread(self.write_outputs, dict(self.reviews), dict(self.funnels))
+                except Exception as e:
+                    log(f"Error writing outputs: {e}")
+            if self.closing and not self.changed:
+                return
+
+    async def run(self, once=False):
+        """Watch until interrupted; with `once`, process what is there, write the outputs and return"""
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stopping.set)
+
+        self.slots = asyncio.Semaphore(self.workers)
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.taxonomy,)) as self.pool:
+            refresher = None if once else asyncio.create_task(self.refresher())
+            log(f"Watching {self.path(FEEDBACK_DIR)} and {self.path(ANALYTICS_DIR)} "
+                f"({self.workers} workers, {self.settle:g}s settle)")
+            while not self.stopping.is_set():
+                # Files already there when running once are complete, so they need no settling
+                self.poll(0 if once else self.settle)
+                if once and not self.pending and not self.running:
+                    break
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), 0.05 if once else self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            if self.tasks:
+                await asyncio.gather(*self.tasks, return_exceptions=True)
+            self.closing = True
+            self.dirty.set()
+            await (refresher or self.refresher())
+        log("Stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process new exports as they land and refresh a project's summary")
+    parser.add_argument('project', help='Project directory, e.g. projects/sibling-feature')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Review exports decoded at once (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f'Seconds between folder polls (default: {DEFAULT_INTERVAL:g})')
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE,
+                        help=f'Seconds a file must stop changing before it is read (default: {DEFAULT_SETTLE:g})')
+    parser.add_argument('--render', action='store_true', help='Re-render the report and slides after each update')
+    parser.add_argument('--once', action='store_true', help='Process the exports already there, write outputs and exit')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"Feedback Watcher: {args.project}")
+    print("=" * 80)
+    watcher = FeedbackWatcher(args.project, args.workers, args.interval, args.settle, args.render)
+    asyncio.run(watcher.run(once=args.once))
+
+
+if __name__ == "__main__":
+    main()
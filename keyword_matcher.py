@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Multi-keyword matcher for review text
+
+Builds an Aho-Corasick automaton over a keyword list so every review is
+scanned once, left to right, however many keywords there are. Matches are
+case-insensitive and, by default, must fall on word boundaries, so "aunt" no
+longer matches inside "daunting" nor "sister" inside "persistent".
+"""
+
+from collections import deque, namedtuple
+
+import pandas as pd
+
+KeywordMatch = namedtuple('KeywordMatch', ['keyword', 'start', 'end'])
+
+
+def is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordMatcher:
+    """
+    Compiled matcher for a fixed set of keywords.
+
+    >>> matcher = KeywordMatcher(['aunt', 'sister', 'sisters'])
+    >>> matcher.find_all("My sisters find it daunting")
+    [KeywordMatch(keyword='sisters', start=3, end=10)]
+    """
+
+    def __init__(self, keywords, word_boundary=True):
+        self.keywords = tuple(dict.fromkeys(k.lower() for k in keywords if k))
+        self.word_boundary = word_boundary
+        self._build()
+
+    def _build(self):
+        # Trie of keywords; state 0 is the root
+        goto = [{}]
+        outputs = [[]]
+        for keyword in self.keywords:
+            state = 0
+            for ch in keyword:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].append(keyword)
+
+        # Failure links, breadth first, folded into a full transition table so
+        # matching never has to follow them: delta[state][ch] is the next
+        # state, and any character missing from it leads back to the root
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0) if state else 0
+                queue.append(child)
+
+        self._delta = delta
+        self._outputs = [tuple(sorted(out, key=len, reverse=True)) for out in outputs]
+
+    def finditer(self, text):
+        """Yield a KeywordMatch for every keyword occurrence in `text`"""
+        if not isinstance(text, str):
+            return
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch.lower(), 0)
+            if not outputs[state]:
+                continue
+            end = i + 1
+            for keyword in outputs[state]:
+                start = end - len(keyword)
+                if self.word_boundary and (
+                    (start > 0 and is_word_char(text[start - 1]))
+                    or (end < len(text) and is_word_char(text[end]))
+                ):
+                    continue
+                yield KeywordMatch(keyword, start, end)
+
+    def find_all(self, text):
+        return list(self.finditer(text))
+
+    def search(self, text):
+        """True if `text` contains any keyword"""
+        return next(self.finditer(text), None) is not None
+
+    def matched_keywords(self, text):
+        """Distinct keywords found in `text`, in order of first occurrence"""
+        return list(dict.fromkeys(match.keyword for match in self.finditer(text)))
+
+    def contains(self, series):
+        """Boolean Series: which entries of a text Series mention a keyword"""
+        return pd.Series([self.search(text) for text in series], index=series.index, dtype=bool)
+
+    def keyword_hits(self, series):
+        """Series of matched-keyword lists, one per entry of a text Series"""
+        return pd.Series([self.matched_keywords(text) for text in series], index=series.index, dtype=object)
+
+    def filter_reviews(self, reviews, column='Review Text'):
+        """
+        Rows of `reviews` whose `column` mentions a keyword, with the keywords
+        that matched joined into a 'Matched Keywords' column
+        """
+        hits = self.keyword_hits(reviews[column])
+        hits = hits[hits.str.len() > 0]
+        matched = reviews.loc[hits.index].copy()
+        matched['Matched Keywords'] = hits.str.join(';')
+        return matched
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Multilingual sibling keyword taxonomy and a language-partitioned matcher index
+
+`SIBLING_TAXONOMY` maps a review language to the sibling and extended-family
+terms in that language. `LanguageIndex` compiles one KeywordMatcher per
+language (that language's terms plus the English ones, since many non-English
+reviews still use English words) and checks each review only against the
+matcher for its `Reviewer Language`. Adding a language therefore adds recall
+for its reviews without slowing down the others, and a word that is a
+keyword in one language ("nicht" is niece in Dutch, "not" in German) only
+matches in that language.
+"""
+
+import pandas as pd
+
+from keyword_matcher import KeywordMatcher
+
+BASE_LANGUAGE = 'en'
+
+SIBLING_TAXONOMY = {
+    'en': [
+        'sibling', 'siblings',
+        'brother', 'brothers', 'sister', 'sisters',
+        'aunt', 'aunts', 'uncle', 'uncles',
+        'nephew', 'nephews', 'niece', 'nieces',
+        'cousin', 'cousins',
+    ],
+    'es': [
+        'hermano', 'hermanos', 'hermana', 'hermanas',
+        'tío', 'tíos', 'tio', 'tios', 'tía', 'tías', 'tia', 'tias',
+        'sobrino', 'sobrinos', 'sobrina', 'sobrinas',
+        'primo', 'primos', 'prima', 'primas',
+    ],
+    'pt': [
+        'irmão', 'irmãos', 'irmao', 'irmaos', 'irmã', 'irmãs', 'irma', 'irmas',
+        'tio', 'tios', 'tia', 'tias',
+        'sobrinho', 'sobrinhos', 'sobrinha', 'sobrinhas',
+        'primo', 'primos', 'prima', 'primas',
+    ],
+    'fr': [
+        'fratrie',
+        'frère', 'frères', 'frere', 'freres', 'sœur', 'sœurs', 'soeur', 'soeurs',
+        'oncle', 'oncles', 'tante', 'tantes',
+        'neveu', 'neveux', 'nièce', 'nièces',
+        'cousine', 'cousines',
+    ],
+    'de': [
+        'geschwister',
+        'bruder', 'brüder', 'schwester', 'schwestern',
+        'onkel', 'tante', 'tanten',
+        'neffe', 'neffen', 'nichte', 'nichten',
+        'cousine', 'cousinen', 'vetter',
+    ],
+    'it': [
+        'fratello', 'fratelli', 'sorella', 'sorelle',
+        'zio', 'zii', 'zia', 'zie',
+        'nipote', 'nipoti',
+        'cugino', 'cugini', 'cugina', 'cugine',
+    ],
+    'nl': [
+        'broer', 'broers', 'zus', 'zussen', 'zuster', 'zusters',
+        'oom', 'ooms', 'tante', 'tantes',
+        'neef', 'neven', 'nicht', 'nichten',
+    ],
+}
+
+
+def normalize_language(language):
+    """Primary language subtag of a Play Console language code ('pt_BR' -> 'pt')"""
+    if not isinstance(language, str) or not language:
+        return BASE_LANGUAGE
+    return language.replace('_', '-').split('-')[0].lower()
+
+
+class LanguageIndex:
+    """
+    One compiled KeywordMatcher per taxonomy language, each covering that
+    language's keywords plus the base (English) keywords. Reviews in
+    languages outside the taxonomy are matched against the base keywords.
+    """
+
+    def __init__(self, taxonomy=SIBLING_TAXONOMY, base_language=BASE_LANGUAGE):
+        self.taxonomy = taxonomy
+        self.base_language = base_language
+        base_keywords = taxonomy.get(base_language, [])
+        self.matchers = {
+            language: KeywordMatcher(list(keywords) + list(base_keywords))
+            for language, keywords in taxonomy.items()
+        }
+        self.matchers.setdefault(base_language, KeywordMatcher(base_keywords))
+
+    @property
+    def languages(self):
+        return sorted(self.matchers)
+
+    def matcher_for(self, language):
+        return self.matchers.get(normalize_language(language), self.matchers[self.base_language])
+
+    def keyword_hits(self, reviews, column='Review Text', language_column='Reviewer Language'):
+        """Series of matched-keyword lists, matching each review in its own language"""
+        languages = reviews[language_column].map(normalize_language)
+        hits = [
+            self.matcher_for(language).keyword_hits(group[column])
+            for language, group in reviews.groupby(languages, sort=False, observed=True)
+        ]
+        if not hits:
+            return pd.Series([], index=reviews.index[:0], dtype=object)
+        return pd.concat(hits).reindex(reviews.index)
+
+    def filter_reviews(self, reviews, column='Review Text', language_column='Reviewer Language'):
+        """
+        Rows of `reviews` that mention a keyword in their own language, with
+        the keywords that matched joined into a 'Matched Keywords' column
+        """
+        hits = self.keyword_hits(reviews, column, language_column)
+        hits = hits[hits.str.len() > 0]
+        matched = reviews.loc[hits.index].copy()
+        matched['Matched Keywords'] = hits.str.join(';')
+        return matched
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Persistent, append-only store of review category labels
+
+Each label is one CSV line keyed by the review's id (the Play Console
+`reviewId`, or the App Store review id):
+
+    review_id,category,source,labelled_at
+
+Labels are appended and flushed as they are made, so an interrupted
+categorization session loses nothing and the next one resumes by skipping
+every review already in the store. A review can be relabelled; the last
+line for a `review_id` wins, and `compact()` drops the superseded lines.
+`source` is 'manual' for a reviewer's label and 'rule' for a rule-based
+pre-label, which a reviewer can later confirm or override.
+"""
+
+import csv
+import os
+import re
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from review_loader import review_ids
+
+DEFAULT_LABELS = 'data/labels/sibling_mention_labels.csv'
+LABEL_COLUMNS = ['review_id', 'category', 'source', 'labelled_at']
+
+# Categories used in projects/sibling-feature/ANALYSIS_SUMMARY.md
+CATEGORIES = {
+    'feature_request': 'Direct feature request',
+    'navigation_issue': 'Related navigation issue',
+    'other': 'Other sibling/family mention',
+    'unsure': 'Needs a second look',
+}
+
+# Rule-based pre-labels, checked in order; the first category whose pattern matches wins
+PRELABEL_RULES = {
+    'feature_request': re.compile(
+        r"\b(?:add(?:ed)?|wish|hope|would (?:like|love)|please|feature|option|should|need|want)\b", re.IGNORECASE),
+    'navigation_issue': re.compile(
+        r"\b(?:can'?t|cannot|unable to|hard to|difficult to|no way to) (?:see|find|view|navigate|get to)\b",
+        re.IGNORECASE),
+}
+
+
+def review_keys(reviews):
+    """
+    Stable key for each review, whichever analysis mode or export the rows
+    came from: its 'Review ID', else the `reviewId` in its 'Review Link',
+    else a hash of its submit time and text
+    """
+    keys = pd.Series(pd.NA, index=reviews.index, dtype=object)
+    if 'Review ID' in reviews:
+        keys = reviews['Review ID'].astype(object).where(reviews['Review ID'].notna(), pd.NA)
+    if 'Review Link' in reviews:
+        keys = keys.fillna(review_ids(reviews['Review Link']))
+    missing = keys.isna()
+    if missing.any():
+        fallback = reviews.loc[missing, ['Review Submit Millis Since Epoch', 'Review Text']].astype(str)
+        keys[missing] = pd.util.hash_pandas_object(fallback, index=False).map('{:016x}'.format)
+    return keys
+
+
+def prelabel(texts):
+    """Rule-based category for each review text, or None where no rule matches"""
+    texts = texts.fillna('').astype(str)
+    labels = pd.Series(None, index=texts.index, dtype=object)
+    for category, pattern in PRELABEL_RULES.items():
+        unlabelled = labels.isna()
+        labels[unlabelled & texts.str.contains(pattern)] = category
+    return labels
+
+
+class LabelStore:
+    """Labels for reviews, loaded from and appended to `path`"""
+
+    def __init__(self, path=DEFAULT_LABELS):
+        self.path = path
+        self.labels = {}
+        self.lines = 0
+        if os.path.exists(path):
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self.labels[row['review_id']] = row
+                    self.lines += 1
+
+    def __contains__(self, review_id):
+        return review_id in self.labels
+
+    def __len__(self):
+        return len(self.labels)
+
+    def get(self, review_id):
+        return self.labels.get(review_id)
+
+    def is_labelled(self, review_id, include_rules=True):
+        """Whether a review has a label; rule pre-labels count only with `include_rules`"""
+        label = self.labels.get(review_id)
+        return label is not None and (include_rules or label['source'] != 'rule')
+
+    def labelled_keys(self, include_rules=True):
+        """Set of labelled reviews; rule pre-labels count only with `include_rules`"""
+        if include_rules:
+            return set(self.labels)
+        return {review_id for review_id, label in self.labels.items() if label['source'] != 'rule'}
+
+    def add(self, review_id, category, source='manual'):
+        self.add_many([(review_id, category)], source)
+
+    def add_many(self, labels, source='manual'):
+        """Append (review_id, category) pairs and flush them to disk in one write"""
+        labelled_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        rows = [
+            {'review_id': review_id, 'category': category, 'source': source, 'labelled_at': labelled_at}
+            for review_id, category in labels
+        ]
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        new_file = not os.path.exists(self.path)
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=LABEL_COLUMNS)
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+        for row in rows:
+            self.labels[row['review_id']] = row
+        self.lines += len(rows)
+
+    def counts(self):
+        """Number of labels per (category, source)"""
+        counts = {}
+        for label in self.labels.values():
+            key = label['category'], label['source']
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def compact(self):
+        """Rewrite the store with only the latest label per review; returns the number of lines dropped"""
+        dropped = self.lines - len(self.labels)
+        if not os.path.exists(self.path):
+            return dropped
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=LABEL_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.labels.values())
+        os.replace(tmp_path, self.path)
+        self.lines = len(self.labels)
+        return dropped
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate review detection with MinHash and locality-sensitive hashing
+
+Edited-and-resubmitted reviews and complaints pasted across app versions
+count separately toward the mention count. This module clusters reviews
+whose texts are near-identical without comparing all pairs:
+
+1. Each text is normalized (lowercase, punctuation and whitespace collapsed)
+   and cut into overlapping 5-byte shingles, packed exactly into uint64s.
+2. A MinHash signature of NUM_PERM values is computed per text with numpy,
+   one vectorized multiply-shift hash and `minimum.reduceat` per permutation.
+3. Signatures are split into BANDS bands; texts that share a band bucket are
+   candidates, and a candidate joins the bucket's first text's cluster when
+   their signatures agree on at least `threshold` of the positions (an
+   estimate of the Jaccard similarity of their shingle sets).
+
+Each text costs a fixed number of hash and dictionary operations, so
+clustering is linear in the number of reviews. `NearDuplicateIndex` is
+incremental, so reviews can be added chunk by chunk while streaming.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+THRESHOLD = 0.8
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_text(text):
+    if not isinstance(text, str):
+        return ''
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def shingles(texts, size=SHINGLE_SIZE):
+    """
+    Byte shingles of every (already normalized) text, each packed into a uint64.
+
+    Returns (shingle_ids, doc_starts): the shingles of all texts
+    concatenated, and the index in `shingle_ids` where each text's begin.
+    """
+    encoded = [text.encode('utf-8').ljust(size) for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    counts = lengths - size + 1
+    doc_starts = np.cumsum(counts) - counts
+    text_offsets = np.cumsum(lengths) - lengths
+    # Start byte of every shingle, never crossing into the next text
+    starts = np.repeat(text_offsets - doc_starts, counts) + np.arange(counts.sum())
+
+    shingle_ids = np.zeros(len(starts), dtype=np.uint64)
+    for offset in range(size):
+        shingle_ids |= data[starts + offset] << np.uint64(8 * offset)
+    return shingle_ids, doc_starts
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash/LSH index assigning every added text to a cluster
+    of near-duplicates. Cluster ids are the position of the cluster's first
+    text in insertion order.
+    """
+
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS, shingle_size=SHINGLE_SIZE, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._offsets = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2**63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._parent = []
+
+    def __len__(self):
+        return len(self._parent)
+
+    def signatures(self, texts):
+        """MinHash signature (one uint32 per permutation) of each normalized text"""
+        shingle_ids, doc_starts = shingles(texts, self.shingle_size)
+        signatures = np.empty((len(doc_starts), len(self._multipliers)), dtype=np.uint32)
+        if not len(doc_starts):
+            return signatures
+        for i, (multiplier, offset) in enumerate(zip(self._multipliers, self._offsets)):
+            # Multiply-shift hashing; uint64 arithmetic wraps around on purpose
+            hashed = ((shingle_ids * multiplier + offset) >> np.uint64(32)).astype(np.uint32)
+            signatures[:, i] = np.minimum.reduceat(hashed, doc_starts)
+        return signatures
+
+    def _band_keys(self, signatures):
+        bands = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (bands * self._band_mix).sum(axis=2)
+
+    def _store(self, first, signatures):
+        """Keep signatures for verifying later candidates, growing the array geometrically"""
+        needed = first + len(signatures)
+        if needed > len(self._signatures):
+            grown = np.empty((max(needed, 2 * len(self._signatures)), self._signatures.shape[1]), dtype=np.uint32)
+            grown[:first] = self._signatures[:first]
+            self._signatures = grown
+        self._signatures[first:needed] = signatures
+
+    def _find(self, doc):
+        parent = self._parent
+        while parent[doc] != doc:
+            parent[doc] = parent[parent[doc]]
+            doc = parent[doc]
+        return doc
+
+    def _union(self, a, b):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            # The earlier text stays the cluster's representative
+            self._parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def add(self, texts):
+        """
+        Add a batch of texts; returns the positions assigned to them. Empty
+        texts each stay in a cluster of their own.
+        """
+        texts = [normalize_text(text) for text in texts]
+        signatures = self.signatures(texts)
+        band_keys = self._band_keys(signatures).tolist()
+        first = len(self._parent)
+        self._store(first, signatures)
+        all_signatures = self._signatures
+
+        for i, keys in enumerate(band_keys):
+            doc = first + i
+            self._parent.append(doc)
+            if not texts[i]:
+                continue
+            for band, key in enumerate(keys):
+                candidate = self._buckets[band].setdefault(key, doc)
+                if candidate != doc and self._find(candidate) != self._find(doc):
+                    similarity = np.mean(all_signatures[doc] == all_signatures[candidate])
+                    if similarity >= self.threshold:
+                        self._union(doc, candidate)
+        return np.arange(first, first + len(band_keys))
+
+    def clusters(self):
+        """Cluster id of every text added so far"""
+        return np.array([self._find(doc) for doc in range(len(self._parent))], dtype=np.int64)
+
+    def distinct(self):
+        """Number of clusters, i.e. texts left after removing near-duplicates"""
+        return sum(1 for doc, parent in enumerate(self._parent) if parent == doc)
+
+
+def near_duplicate_clusters(texts, threshold=THRESHOLD):
+    """Series of cluster ids aligned with `texts`; near-duplicates share an id"""
+    index = NearDuplicateIndex(threshold)
+    index.add(texts)
+    return pd.Series(index.clusters(), index=texts.index, name='Duplicate Cluster')
+
+
+def dedup_counts(clusters):
+    """(raw, distinct, clusters with more than one review) for a Series of cluster ids"""
+    sizes = clusters.value_counts()
+    return len(clusters), len(sizes), int((sizes > 1).sum())
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Run the project notebooks headlessly, re-executing only the cells that changed
+
+The business case figures come from notebooks that read each other's outputs:
+sibling_feature_analysis.ipynb writes the mentions CSV and review counts that
+sibling_feature_business_case.ipynb turns into the summary JSON. This runner
+executes them in a Jupyter kernel in dependency order and caches every code
+cell:
+
+- A cell's key is a SHA-256 of the previous cell's key, its source and the
+  inputs it references: files, directories and globs named in its string
+  literals, and the workspace modules it imports (with their own workspace
+  imports), fingerprinted by content. Changing a cell or its data therefore
+  invalidates that cell and every cell below it, and nothing above it.
+- After a cell runs, its outputs are cached. Every `snapshot_every` cells,
+  and after the last one, a pickle of the kernel's variables (modules are
+  recorded by name) is cached too, when all of them can be pickled and
+  they come to at most `max_snapshot_mb`, so review DataFrames in scope
+  are not copied to disk once per cell.
+- On the next run, cells before the first changed one take their outputs
+  from the cache. The kernel restores the latest snapshot before that cell
+  and executes from the cell after it. Cells tagged "setup" (imports, sys.path, display
+  options) are always run first, because their effects live outside the
+  variables.
+
+Notebooks declare the files they write in their metadata, with paths
+relative to the notebook:
+
+    "pipeline": {"outputs": ["../data/sibling_mentions.csv"]}
+
+A notebook that writes a file another notebook reads runs first. A
+notebook's own outputs do not count as inputs of its cells, and if one of
+them is missing the notebook runs from the top.
+
+Executed notebooks are saved in place with their outputs, as if they had
+been run by hand.
+
+Usage:
+    python notebook_runner.py                                  # every project notebook
+    python notebook_runner.py projects/sibling-feature         # one project's notebooks
+    python notebook_runner.py path/to/notebook.ipynb --no-cache
+    python notebook_runner.py --plan                           # show what would run
+    python notebook_runner.py --snapshot-every 1 --max-snapshot-mb 1024
+"""
+
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from graphlib import CycleError, TopologicalSorter
+
+import nbformat
+from nbclient import NotebookClient
+from nbclient.exceptions import CellExecutionError
+
+from review_loader import file_sha256
+
+WORKSPACE = os.path.dirname(os.path.abspath(__file__))
+KERNEL_NAME = 'python3'
+CELL_TIMEOUT = 1800
+SETUP_TAG = 'setup'
+SNAPSHOT_EVERY = 5
+MAX_SNAPSHOT_MB = 256
+
+_STRING = re.compile(r"""'([^'\n]+)'|"([^"\n]+)\"""")
+_IMPORT = re.compile(r'^\s*(?:from\s+([\w.]+)\s+import\b|import\s+([\w., ]+))', re.MULTILINE)
+_GLOB_CHARS = set('*?[')
+
+# Runs in the kernel: pickle the user variables, modules by name, unless a
+# value can't be pickled or refers to code defined in the notebook itself, or
+# the pickles come to more than max_bytes
+SNAPSHOT_CODE = '''
+def __notebook_runner_snapshot(path, max_bytes):
+    import json, pickle, sys, types
+    ip = get_ipython()
+    hidden = set(ip.user_ns_hidden)
+    variables, modules, skipped = {}, {}, []
+    for name, value in list(ip.user_ns.items()):
+        if name.startswith('_') or name in hidden:
+            continue
+        if isinstance(value, types.ModuleType):
+            modules[name] = value.__name__
+            continue
+        if '__main__' in (getattr(value, '__module__', None), type(value).__module__):
+            skipped.append(name)
+            continue
+        try:
+            variables[name] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            skipped.append(name)
+    size = sum(len(data) for data in variables.values())
+    if not skipped and size <= max_bytes:
+        with open(path, 'wb') as f:
+            pickle.dump({'variables': variables, 'modules': modules, 'sys_path': list(sys.path)}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    print(json.dumps({'skipped': skipped, 'size': size}))
+'''
+
+RESTORE_CODE = '''
+def __notebook_runner_restore(path):
+    import importlib, pickle, sys
+    with open(path, 'rb') as f:
+        snapshot = pickle.load(f)
+    sys.path[:] = snapshot['sys_path']
+    namespace = get_ipython().user_ns
+    for name, module in snapshot['modules'].items():
+        namespace[name] = importlib.import_module(module)
+    for name, data in snapshot['variables'].items():
+        namespace[name] = pickle.loads(data)
+'''
+
+
+class Fingerprints:
+    """Content hashes of input files, memoized by size and mtime in a JSON file"""
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.known = {}
+        if os.path.exists(cache_file):
+            with open(cache_file) as f:
+                self.known = json.load(f)
+
+    def file(self, path):
+        stat = os.stat(path)
+        entry = self.known.get(path)
+        if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+        digest = file_sha256(path)
+        self.known[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def path(self, path):
+        if not os.path.isdir(path):
+            return self.file(path)
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(f'{os.path.relpath(file_path, path)}\0{self.file(file_path)}\n'.encode())
+        return digest.hexdigest()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(self.known, f)
+
+
+def path_literals(source):
+    """String literals in a cell that look like paths (contain a slash or a file extension)"""
+    literals = (single or double for single, double in _STRING.findall(source))
+    return [literal for literal in literals
+            if '{' not in literal and ('/' in literal or re.search(r'\.\w{1,8}$', literal))]
+
+
+def _resolve(literal, notebook_dir):
+    return os.path.normpath(os.path.join(notebook_dir, literal))
+
+
+def module_files(source, seen=None):
+    """Workspace modules imported by `source`, and the workspace modules they import, recursively"""
+    seen = set() if seen is None else seen
+    for from_name, import_names in _IMPORT.findall(source):
+        for name in ([from_name] if from_name else import_names.split(',')):
+            top = name.strip().split(' ')[0].split('.')[0]
+            path = os.path.join(WORKSPACE, f'{top}.py')
+            if top and path not in seen and os.path.exists(path):
+                seen.add(path)
+                with open(path, encoding='utf-8') as f:
+                    module_files(f.read(), seen)
+    return seen
+
+
+def cell_inputs(source, notebook_dir, outputs):
+    """
+    Existing files and directories a cell references, excluding the
+    notebook's own outputs and directories that contain the notebook
+    (such as a sys.path entry for the workspace root)
+    """
+    inputs = set()
+    for literal in path_literals(source):
+        path = _resolve(literal, notebook_dir)
+        if _GLOB_CHARS & set(literal):
+            inputs.update(os.path.normpath(match) for match in glob.glob(path))
+        elif os.path.exists(path) and not (os.path.isdir(path) and notebook_dir.startswith(path + os.sep)):
+            inputs.add(path)
+    inputs.update(module_files(source))
+    return sorted(inputs - set(outputs))
+
+
+class Notebook:
+    """A notebook file with its declared outputs and the paths its cells reference"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.dir = os.path.dirname(self.path)
+        self.name = os.path.relpath(self.path)
+        self.nb = nbformat.read(self.path, as_version=4)
+        declared = self.nb.metadata.get('pipeline', {}).get('outputs', [])
+        self.outputs = [_resolve(output, self.dir) for output in declared]
+        # Every referenced path, existing or not, to order notebooks before any of them has run
+        self.references = {
+            _resolve(literal, self.dir)
+            for cell in self.code_cells() for literal in path_literals(cell.source)
+        }
+        # Per-project cache next to the project's other caches (projects/*/data/cache)
+        project_dir = os.path.dirname(self.dir) if os.path.basename(self.dir) == 'notebooks' else self.dir
+        self.cache_dir = os.path.join(project_dir, 'data', 'cache', 'notebooks',
+                                      os.path.splitext(os.path.basename(self.path))[0])
+
+    def code_cells(self):
+        return [cell for cell in self.nb.cells if cell.cell_type == 'code']
+
+    def reads(self, other):
+        """Whether this notebook references a file `other` declares as an output"""
+        return any(
+            fnmatch.fnmatch(output, reference) if _GLOB_CHARS & set(reference) else output == reference
+            for output in other.outputs for reference in self.references
+        )
+
+    def cell_keys(self, fingerprints):
+        """One key per code cell, chained so a change invalidates every cell below it"""
+        keys, previous = [], ''
+        for cell in self.code_cells():
+            digest = hashlib.sha256(previous.encode())
+            digest.update(cell.source.encode())
+            for path in cell_inputs(cell.source, self.dir, self.outputs):
+                digest.update(f'{os.path.relpath(path, self.dir)}\0{fingerprints.path(path)}\n'.encode())
+            previous = digest.hexdigest()
+            keys.append(previous)
+        return keys
+
+
+def dependency_order(notebooks):
+    """Notebooks sorted so that each runs after the notebooks whose outputs it reads"""
+    graph = {
+        notebook.path: {other.path for other in notebooks if other is not notebook and notebook.reads(other)}
+        for notebook in notebooks
+    }
+    by_path = {notebook.path: notebook for notebook in notebooks}
+    sorter = TopologicalSorter({path: graph[path] for path in sorted(graph)})
+    return [by_path[path] for path in sorter.static_order()]
+
+
+class CellCache:
+    """Cached outputs (<key>.json) and variable snapshots (<key>.pkl) of one notebook's cells"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _file(self, key, extension):
+        return os.path.join(self.cache_dir, f'{key}.{extension}')
+
+    def get(self, key):
+        path = self._file(key, 'json')
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, key, cell):
+        with open(self._file(key, 'json'), 'w', encoding='utf-8') as f:
+            json.dump({'execution_count': cell.get('execution_count'), 'outputs': cell.outputs}, f)
+
+    def snapshot(self, key):
+        return self._file(key, 'pkl')
+
+    def has_snapshot(self, key):
+        return os.path.exists(self.snapshot(key))
+
+    def prune(self, keys):
+        """Delete entries for cells that are no longer in the notebook"""
+        keep = set(keys)
+        for name in os.listdir(self.cache_dir):
+            if os.path.splitext(name)[0] not in keep:
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+def plan(notebook, keys, cache):
+    """
+    (first changed cell, resume cell) as code cell indices: cells from the
+    first changed one on need executing, and the kernel can start from the
+    snapshot after the resume cell (-1 to start from the top)
+    """
+    missing_outputs = [output for output in notebook.outputs if not os.path.exists(output)]
+    first_miss = 0 if missing_outputs else next(
+        (i for i, key in enumerate(keys) if cache.get(key) is None), len(keys))
+    resume = next((i for i in range(first_miss - 1, -1, -1) if cache.has_snapshot(keys[i])), -1)
+    return first_miss, resume
+
+
+class KernelSession:
+    """An nbclient kernel for one notebook, with hidden cells for snapshots"""
+
+    def __init__(self, notebook):
+        self.notebook = notebook
+        self.client = NotebookClient(notebook.nb, timeout=CELL_TIMEOUT, kernel_name=KERNEL_NAME,
+                                     resources={'metadata': {'path': notebook.dir}})
+
+    def execute(self, cell):
+        index = self.notebook.nb.cells.index(cell)
+        self.client.execute_cell(cell, index)
+
+    def call_hidden(self, definition, function, *args):
+        """Define `function` from `definition` in the kernel, call it, then delete it again"""
+        call = ', '.join(repr(arg) for arg in args)
+        return self.run_hidden(f'{definition}\n{function}({call})\ndel {function}\n')
+
+    def run_hidden(self, code):
+        """Run code outside the notebook's history; returns its stdout"""
+        cell = nbformat.v4.new_code_cell(code)
+        self.notebook.nb.cells.append(cell)
+        try:
+            self.client.execute_cell(cell, len(self.notebook.nb.cells) - 1, store_history=False)
+        finally:
+            self.notebook.nb.cells.pop()
+        return ''.join(output.get('text', '') for output in cell.outputs if output.output_type == 'stream')
+
+    def snapshot(self, path, max_mb=MAX_SNAPSHOT_MB):
+        """
+        Pickle the kernel's variables to `path` unless they come to more than
+        `max_mb`; returns (names that could not be pickled, pickled MB)
+        """
+        output = self.call_hidden(SNAPSHOT_CODE, '__notebook_runner_snapshot', path, int(max_mb * 1024 * 1024))
+        result = json.loads(output.strip().splitlines()[-1])
+        return result['skipped'], result['size'] / (1024 * 1024)
+
+    def restore(self, path):
+        self.call_hidden(RESTORE_CODE, '__notebook_runner_restore', path)
+
+
+def snapshot_note(skipped, size_mb, max_mb):
+    if skipped:
+        return f" (no snapshot: can't pickle {', '.join(skipped)})"
+    if size_mb > max_mb:
+        return f" (no snapshot: {size_mb:,.0f} MB of variables, over the {max_mb:,} MB limit)"
+    return ''
+
+
+def run_notebook(notebook, fingerprints, use_cache=True, dry_run=False,
+                 snapshot_every=SNAPSHOT_EVERY, max_snapshot_mb=MAX_SNAPSHOT_MB):
+    """
+    Execute the cells of `notebook` that changed since the cached run and
+    save it with its outputs, snapshotting the kernel after every
+    `snapshot_every` cells and the last one; returns (executed, cached)
+    cell counts
+    """
+    cells = notebook.code_cells()
+    keys = notebook.cell_keys(fingerprints)
+    cache = CellCache(notebook.cache_dir)
+    first_miss, resume = plan(notebook, keys, cache) if use_cache else (0, -1)
+
+    print(f"\n{notebook.name}")
+    if first_miss == len(cells):
+        print(f"   All {len(cells)} code cells cached")
+        return 0, len(cells)
+    print(f"   Code cells {first_miss + 1}-{len(cells)} changed; "
+          + (f"resuming from the snapshot after cell {resume + 1}" if resume >= 0 else "running from the top"))
+    if dry_run:
+        return len(cells) - resume - 1, resume + 1
+
+    for cell, key in zip(cells[:resume + 1], keys):
+        cached = cache.get(key)
+        cell.outputs = [nbformat.from_dict(output) for output in cached['outputs']]
+        cell.execution_count = cached['execution_count']
+
+    session = KernelSession(notebook)
+    with session.client.setup_kernel():
+        if resume >= 0:
+            for cell in cells[:resume + 1]:
+                if SETUP_TAG in cell.metadata.get('tags', []):
+                    session.execute(cell)
+            try:
+                session.restore(cache.snapshot(keys[resume]))
+            except CellExecutionError as e:
+                print(f"   Could not restore the snapshot ({e.ename}: {e.evalue}); running from the top")
+                resume = -1
+
+        for number, (cell, key) in enumerate(zip(cells[resume + 1:], keys[resume + 1:]), resume + 2):
+            start = time.perf_counter()
+            session.execute(cell)
+            cache.put(key, cell)
+            note = ''
+            if number % snapshot_every == 0 or number == len(cells):
+                note = snapshot_note(*session.snapshot(cache.snapshot(key), max_snapshot_mb), max_snapshot_mb)
+            print(f"   Cell {number}: {time.perf_counter() - start:.2f}s{note}")
+
+    nbformat.write(notebook.nb, notebook.path)
+    cache.prune(keys)
+    return len(cells) - resume - 1, resume + 1
+
+
+def find_notebooks(targets):
+    """Notebooks for each target: a notebook itself, or a project directory's notebooks/*.ipynb"""
+    paths = []
+    for target in targets or sorted(glob.glob(os.path.join('projects', '*'))):
+        if target.endswith('.ipynb'):
+            paths.append(target)
+        else:
+            paths.extend(sorted(glob.glob(os.path.join(target, 'notebooks', '*.ipynb'))))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run project notebooks headlessly with cell-level caching')
+    parser.add_argument('targets', nargs='*',
+                        help='Notebooks or project directories (default: every projects/*/notebooks/*.ipynb)')
+    parser.add_argument('--no-cache', action='store_true', help='Execute every cell, ignoring cached results')
+    parser.add_argument('--plan', action='store_true', help='Show which cells would run without executing them')
+    parser.add_argument('--snapshot-every', type=int, default=SNAPSHOT_EVERY, metavar='N',
+                        help=f'Snapshot the kernel variables after every N code cells and the last one '
+                             f'(default: {SNAPSHOT_EVERY})')
+    parser.add_argument('--max-snapshot-mb', type=int, default=MAX_SNAPSHOT_MB, metavar='MB',
+                        help=f'Skip snapshots whose pickled variables exceed MB (default: {MAX_SNAPSHOT_MB})')
+    args = parser.parse_args()
+    if args.snapshot_every < 1:
+        parser.error('--snapshot-every must be at least 1')
+
+    print("=" * 80)
+    print("Running Project Notebooks")
+    print("=" * 80)
+
+    try:
+        notebooks = dependency_order([Notebook(path) for path in find_notebooks(args.targets)])
+    except CycleError as e:
+        print(f"   Error: notebooks read each other's outputs in a cycle: {e.args[1]}")
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    executed = cached = 0
+    for notebook in notebooks:
+        fingerprints = Fingerprints(os.path.join(os.path.dirname(notebook.cache_dir), 'fingerprints.json'))
+        try:
+            ran, reused = run_notebook(notebook, fingerprints, not args.no_cache, args.plan,
+                                       args.snapshot_every, args.max_snapshot_mb)
+        except CellExecutionError as e:
+            print(f"   Error executing {notebook.name}:\n{e}")
+            raise SystemExit(1)
+        finally:
+            fingerprints.save()
+        executed += ran
+        cached += reused
+
+    print(f"\n{'Would execute' if args.plan else 'Executed'} {executed} cells, {cached} from cache, "
+          f"across {len(notebooks)} notebooks in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Stage-level timing and memory instrumentation for the analysis scripts
+
+The scripts mark their stages (CSV decode, text filtering, keyword matching,
+CSV writes, PDF builds, ...) with a context manager, and can say how many
+rows went in and came out:
+
+    with stage('match', rows_in=len(reviews_with_text)) as s:
+        sibling_mentions = matcher.filter_reviews(reviews_with_text)
+        s.rows_out = len(sibling_mentions)
+
+    for chunk in iterate('decode', chunks):    # times producing each chunk
+        ...
+
+A stage that runs many times, for example once per chunk, is added up into
+one entry per name. Stages nested inside another stage are keyed by their
+path ('build_report/doc_build').
+
+Nothing is measured until a script calls `start_profile()`, which it does
+when run with --profile (see `add_profile_arguments`). Then each stage records its calls,
+wall time, CPU time, rows in and out, and peak traced memory (Python, numpy
+and pandas allocations, via tracemalloc). `finish_profile()` prints a table
+and writes the run to JSON. Tracing allocations slows allocation-heavy code
+down, so compare wall times between profiled runs only, or start the
+profile with `trace_memory=False` to time stages without it (the
+benchmarks do). CPU time covers this process only, not worker processes.
+
+With --cprofile, each top-level stage also runs under cProfile. The stats
+of the slowest stage are written next to the JSON as a .prof file (open it
+with `python -m pstats` or snakeviz), and its top functions are printed.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_DIR = 'data/profiles'
+TOP_FUNCTIONS = 15
+
+
+class StageCall:
+    """Rows in and out of one call of a stage; set `rows_out` inside the `with` block"""
+
+    __slots__ = ('rows_in', 'rows_out')
+
+    def __init__(self, rows_in=None):
+        self.rows_in = rows_in
+        self.rows_out = None
+
+
+class Stage:
+    """Measurements of one named stage, summed over its calls"""
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.calls = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.rows_in = None
+        self.rows_out = None
+        self.peak_bytes = 0
+        self.profile = None
+
+    def add(self, call, wall_s, cpu_s, peak_bytes):
+        self.calls += 1
+        self.wall_s += wall_s
+        self.cpu_s += cpu_s
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+        if call.rows_in is not None:
+            self.rows_in = (self.rows_in or 0) + call.rows_in
+        if call.rows_out is not None:
+            self.rows_out = (self.rows_out or 0) + call.rows_out
+
+    def to_dict(self):
+        rows = self.rows_in if self.rows_in is not None else self.rows_out
+        return {
+            'stage': self.name,
+            'depth': self.depth,
+            'calls': self.calls,
+            'wall_s': round(self.wall_s, 4),
+            'cpu_s': round(self.cpu_s, 4),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_per_s': round(rows / self.wall_s) if rows and self.wall_s else None,
+            'peak_mb': round(self.peak_bytes / (1024 * 1024), 1),
+        }
+
+
+class Profiler:
+    """Collects stage measurements for one script run; disabled profilers only hand out StageCalls"""
+
+    def __init__(self, script, enabled=False, output=None, cprofile=False, trace_memory=True):
+        self.script = script
+        self.enabled = enabled
+        self.output = output
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._stack = []
+        self.started_at = datetime.now()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        if enabled and trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        call = StageCall(rows_in)
+        if not self.enabled:
+            yield call
+            return
+
+        path = f'{self._stack[-1].name}/{name}' if self._stack else name
+        entry = self.stages.get(path)
+        if entry is None:
+            entry = self.stages[path] = Stage(path, len(self._stack))
+        # The traced peak is global, so hand the peak so far to the enclosing stage before resetting it
+        if self.trace_memory:
+            if self._stack:
+                self._stack[-1].peak_bytes = max(self._stack[-1].peak_bytes, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        profile = None
+        if self.cprofile and not self._stack:
+            profile = entry.profile = entry.profile or cProfile.Profile()
+            profile.enable()
+        self._stack.append(entry)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield call
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            self._stack.pop()
+            if profile is not None:
+                profile.disable()
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else 0
+            entry.add(call, wall, cpu, peak)
+            if self._stack:
+                self._stack[-1].peak_bytes = max(self._stack[-1].peak_bytes, peak)
+
+    def results(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        peak_rss = usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+        return {
+            'script': self.script,
+            'argv': sys.argv[1:],
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_s': round(time.perf_counter() - self._wall, 4),
+            'cpu_s': round(time.process_time() - self._cpu, 4),
+            'peak_rss_mb': round(peak_rss, 1),
+            'stages': [{**entry.to_dict(), **({} if self.trace_memory else {'peak_mb': None})}
+                       for entry in self.stages.values()],
+        }
+
+    def slowest_profiled(self):
+        profiled = [entry for entry in self.stages.values() if entry.profile is not None]
+        return max(profiled, key=lambda entry: entry.wall_s, default=None)
+
+    def finish(self):
+        """Print the stage table and write the JSON (and .prof) files; returns the JSON path"""
+        if not self.enabled:
+            return None
+        results = self.results()
+        output = self.output or os.path.join(
+            DEFAULT_DIR, f"{self.script}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json")
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+        slowest = self.slowest_profiled()
+        if slowest is not None:
+            prof_file = f"{os.path.splitext(output)[0]}_{slowest.name.replace('/', '_')}.prof"
+            slowest.profile.dump_stats(prof_file)
+            results['cprofile'] = {'stage': slowest.name, 'file': prof_file}
+
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+        print_stages(results)
+        if slowest is not None:
+            print(f"\n   cProfile of the slowest stage ({slowest.name}), top {TOP_FUNCTIONS} by cumulative time:")
+            stream = io.StringIO()
+            pstats.Stats(slowest.profile, stream=stream).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            print(stream.getvalue().rstrip())
+            print(f"\n   Saved profile to {prof_file}")
+        print(f"   Saved stage timings to {output}")
+        return output
+
+
+def format_rows(rows):
+    return f"{rows:,}" if rows is not None else '-'
+
+
+def format_mb(size):
+    return f"{size:,.1f}" if size is not None else '-'
+
+
+def print_stages(results):
+    print(f"\nSTAGE PROFILE ({results['wall_s']:.2f}s wall, {results['cpu_s']:.2f}s CPU, "
+          f"peak RSS {results['peak_rss_mb']:,.1f} MB)")
+    print(f"   {'stage':<32} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'rows in':>12} {'rows out':>12} {'peak MB':>9}")
+    for entry in results['stages']:
+        name = '  ' * entry['depth'] + entry['stage'].split('/')[-1]
+        print(f"   {name:<32} {entry['calls']:>6,} {entry['wall_s']:>9.3f} {entry['cpu_s']:>9.3f} "
+              f"{format_rows(entry['rows_in']):>12} {format_rows(entry['rows_out']):>12} {format_mb(entry['peak_mb']):>9}")
+
+
+# The profiler stages report to; disabled until a script calls start_profile()
+_active = Profiler('')
+
+
+def start_profile(script, output=None, cprofile=False, trace_memory=True):
+    """Start measuring stages for `script`; without `trace_memory`, stage peaks are not traced"""
+    global _active
+    _active = Profiler(script, enabled=True, output=output, cprofile=cprofile, trace_memory=trace_memory)
+    return _active
+
+
+def stage(name, rows_in=None):
+    """Context manager measuring one call of stage `name`; yields a StageCall"""
+    return _active.stage(name, rows_in)
+
+
+def iterate(name, iterable):
+    """Yield from `iterable`, measuring the production of each item (rows out = its length) as stage `name`"""
+    iterator = iter(iterable)
+    while True:
+        with stage(name) as call:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            call.rows_out = len(item)
+        yield item
+
+
+def finish_profile():
+    return _active.finish()
+
+
+def add_profile_arguments(parser):
+    """Add --profile [FILE] and --cprofile to a script's argument parser"""
+    parser.add_argument('--profile', nargs='?', const='', metavar='FILE',
+                        help=f'Record wall/CPU time, rows and peak memory per stage and write them as JSON '
+                             f'(default FILE: {DEFAULT_DIR}/<script>_<timestamp>.json)')
+    parser.add_argument('--cprofile', action='store_true',
+                        help='With --profile, also run cProfile and save the stats of the slowest stage')
+
+
+def profile_from_args(script, args):
+    """Start profiling if the script was run with --profile or --cprofile"""
+    if args.profile is not None or args.cprofile:
+        return start_profile(script, output=args.profile or None, cprofile=args.cprofile)
+    return None
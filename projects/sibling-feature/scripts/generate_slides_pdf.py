@@ -2,28 +2,36 @@
 """
 Generate landscape PDF from HTML slides
 Uses Playwright to render and print the reveal.js slides to PDF
+
+Printing is done by slides_pdf.py at the workspace root, which waits for
+reveal.js to finish its print layout instead of a fixed delay. To print
+every project's decks with one browser, run slides_pdf.py from the root.
 """
 
+import argparse
 import os
 import sys
 
 try:
-    from playwright.sync_api import sync_playwright
+    import playwright  # noqa: F401
 except ImportError:
     print("Error: playwright not installed")
     print("Installing playwright...")
     import subprocess
     subprocess.check_call([sys.executable, "-m", "pip", "install", "playwright"])
     subprocess.check_call([sys.executable, "-m", "playwright", "install", "chromium"])
-    from playwright.sync_api import sync_playwright
 
-def generate_slides_pdf():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(project_dir, '..', '..'))
+
+from profiling import add_profile_arguments, finish_profile, profile_from_args
+from slides_pdf import print_decks
 
+
+def generate_slides_pdf():
     # Input HTML file
     html_file = os.path.join(project_dir, "presentations", "sibling_feature_business_case_slides.html")
-    html_path = f"file://{html_file}"
 
     # Output PDF file
     output_file = os.path.join(project_dir, "presentations", "sibling_feature_business_case_slides.pdf")
@@ -36,57 +44,13 @@ def generate_slides_pdf():
     print(f"Input: {html_file}")
     print(f"Output: {output_file}")
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-
-        # Navigate to the HTML file
-        page.goto(html_path)
-
-        # Wait for reveal.js to initialize
-        page.wait_for_timeout(2000)
-
-        # Hide speaker notes and ensure slide numbers are visible
-        page.evaluate("""() => {
-            // Hide speaker notes
-            const style = document.createElement('style');
-            style.textContent = `
-                .reveal .speaker-notes,
-                .reveal aside.notes,
-                .reveal .notes {
-                    display: none !important;
-                }
-                .reveal .slide-number {
-                    display: block !important;
-                }
-            `;
-            document.head.appendChild(style);
-        }""")
-
-        # Get total number of slides
-        total_slides = page.evaluate("""() => {
-            return Reveal.getTotalSlides();
-        }""")
-
-        print(f"Found {total_slides} slides")
-
-        # Print to PDF with landscape orientation
-        # Size: 1680x946 (as per slides)
-        page.pdf(
-            path=output_file,
-            format='Letter',  # 11 x 8.5 inches
-            landscape=True,
-            print_background=True,
-            margin={
-                'top': '0.2in',
-                'right': '0.2in',
-                'bottom': '0.2in',
-                'left': '0.2in'
-            },
-            prefer_css_page_size=False
-        )
+    printed, errors = print_decks([(html_file, output_file)])
+    for _, error in errors:
+        print(f"Error: {error}")
+        return
 
-        browser.close()
+    _, total_slides = printed[0]
+    print(f"Printed {total_slides} slides")
 
     print(f"\n✅ PDF generated successfully!")
     print(f"Location: {output_file}")
@@ -96,4 +60,8 @@ def generate_slides_pdf():
     print(f"File size: {file_size:.1f} MB")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Print the business case slides to PDF')
+    add_profile_arguments(parser)
+    profile_from_args('generate_slides_pdf', parser.parse_args())
     generate_slides_pdf()
+    finish_profile()
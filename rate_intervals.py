@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Confidence intervals for the funnel percentages and mention rates
+
+The headline figures of the business case summary are proportions: users
+who toggled siblings out of pedigree viewers, reviews mentioning siblings
+out of reviews with text. With 23 mentions the uncertainty is large, so
+each rate gets three 95% intervals:
+
+    wilson            Wilson score interval
+    clopper_pearson   exact (conservative) binomial interval
+    bootstrap         percentile bootstrap
+
+Resampling n reviews with replacement and counting the mentions is a
+Binomial(n, mentions / n) draw, so the bootstrap draws those counts directly:
+one (rates x resamples) matrix of binomial counts for every rate at once,
+instead of resampling rows. 100,000 resamples of every month, year and
+funnel segment take a second or two. A rate of 0 or 1 has a
+degenerate bootstrap interval ([0, 0] or [1, 1]); Wilson and
+Clopper-Pearson still give a useful upper or lower bound there.
+
+`add_summary_intervals` writes the intervals into the summary JSON as
+[low, high] pairs on the same scale as the estimate (percent for the
+headline figures, fractions for the monthly and yearly mention rates):
+
+    web_analytics.intervals.sibling_pct_ancestor_users.wilson   -> [49.02, 49.22]
+    mobile_feedback.intervals.pct_of_text_reviews.bootstrap     -> [0.33, 0.77]
+    mobile_feedback.trends.monthly[i].mention_rate_wilson       -> [0.0, 0.0138]
+    web_analytics.segments[i].sibling_pct_all_users_bootstrap   (with --adobe)
+
+Usage:
+    python rate_intervals.py projects/sibling-feature/data/processed/sibling_feature_business_case_summary.json
+    python rate_intervals.py SUMMARY.json --adobe 'projects/sibling-feature/data/analytics/adobe/*.csv'
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from scipy import stats
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 100_000
+DEFAULT_SEED = 0
+METHODS = ('wilson', 'clopper_pearson', 'bootstrap')
+
+# Bound on the size of one bootstrap draw matrix (rates x resamples), about 160 MB of int64
+MAX_DRAW_CELLS = 20_000_000
+
+# (estimate key, successes key, trials key) for the headline rates, in percent
+WEB_RATES = [
+    ('sibling_pct_all_users', 'siblings_toggled_total', 'pedigree_views'),
+    ('sibling_pct_ancestor_users', 'siblings_after_ancestors', 'ancestors_toggled'),
+]
+MOBILE_RATES = [
+    ('pct_of_all_reviews', 'sibling_mentions', 'total_reviews'),
+    ('pct_of_text_reviews', 'sibling_mentions', 'reviews_with_text'),
+]
+
+
+def _alpha(confidence):
+    return 1 - confidence
+
+
+def wilson_interval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    """Wilson score interval (low, high) of successes / trials, elementwise"""
+    successes, trials = np.asarray(successes, dtype=float), np.asarray(trials, dtype=float)
+    z = stats.norm.ppf(1 - _alpha(confidence) / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = successes / trials
+        center = (rate + z**2 / (2 * trials)) / (1 + z**2 / trials)
+        half = z / (1 + z**2 / trials) * np.sqrt(rate * (1 - rate) / trials + z**2 / (4 * trials**2))
+    return np.clip(center - half, 0, 1), np.clip(center + half, 0, 1)
+
+
+def clopper_pearson_interval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    """Exact Clopper-Pearson interval (low, high) of successes / trials, elementwise"""
+    successes, trials = np.asarray(successes, dtype=float), np.asarray(trials, dtype=float)
+    alpha = _alpha(confidence)
+    with np.errstate(invalid='ignore'):
+        low = np.where(successes > 0, stats.beta.ppf(alpha / 2, successes, trials - successes + 1), 0.0)
+        high = np.where(successes < trials, stats.beta.ppf(1 - alpha / 2, successes + 1, trials - successes), 1.0)
+    return low, high
+
+
+def bootstrap_interval(successes, trials, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES,
+                       seed=DEFAULT_SEED):
+    """
+    Percentile bootstrap interval (low, high) of successes / trials,
+    elementwise. Each rate's resampled success counts are binomial draws,
+    taken for blocks of rates at a time as one (rates x resamples) matrix.
+    """
+    successes = np.asarray(successes, dtype=np.int64).ravel()
+    trials = np.asarray(trials, dtype=np.int64).ravel()
+    rng = np.random.default_rng(seed)
+    alpha = _alpha(confidence)
+    low, high = np.full(len(trials), np.nan), np.full(len(trials), np.nan)
+
+    valid = np.flatnonzero(trials > 0)
+    block = max(1, MAX_DRAW_CELLS // resamples)
+    for start in range(0, len(valid), block):
+        columns = valid[start:start + block]
+        n = trials[columns]
+        # One row of resampled counts per rate, so each quantile runs over contiguous memory
+        draws = rng.binomial(n[:, None], (successes[columns] / n)[:, None], size=(len(columns), resamples))
+        bounds = np.quantile(draws, [alpha / 2, 1 - alpha / 2], axis=1) / n
+        low[columns], high[columns] = bounds
+    return low, high
+
+
+def rate_intervals(successes, trials, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES,
+                   seed=DEFAULT_SEED):
+    """Estimate and (low, high) arrays per method for each successes / trials rate; NaN where trials is 0"""
+    successes = np.asarray(successes, dtype=np.int64).ravel()
+    trials = np.asarray(trials, dtype=np.int64).ravel()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimate = np.where(trials > 0, successes / trials, np.nan)
+    intervals = {
+        'wilson': wilson_interval(successes, trials, confidence),
+        'clopper_pearson': clopper_pearson_interval(successes, trials, confidence),
+        'bootstrap': bootstrap_interval(successes, trials, confidence, resamples, seed),
+    }
+    empty = trials <= 0
+    for low, high in intervals.values():
+        low[empty] = high[empty] = np.nan
+    return estimate, intervals
+
+
+def _pair(low, high, scale):
+    if np.isnan(low) or np.isnan(high):
+        return None
+    return [round(float(low) * scale, 6), round(float(high) * scale, 6)]
+
+
+class _Rates:
+    """Rates collected from all over the summary, computed in one vectorized pass and written back"""
+
+    def __init__(self):
+        self.successes = []
+        self.trials = []
+        self.targets = []
+
+    def add(self, successes, trials, write):
+        """Queue one rate; `write(estimate, {method: [low, high] or None})` stores its result"""
+        self.successes.append(int(successes or 0))
+        self.trials.append(int(trials or 0))
+        self.targets.append(write)
+
+    def compute(self, confidence, resamples, seed):
+        estimate, intervals = rate_intervals(self.successes, self.trials, confidence, resamples, seed)
+        for i, write in enumerate(self.targets):
+            write(estimate[i], {method: (low[i], high[i]) for method, (low, high) in intervals.items()})
+        return len(self.targets)
+
+
+def _headline_writer(block, key, scale):
+    def write(estimate, intervals):
+        block.setdefault('intervals', {})[key] = {
+            'estimate': None if np.isnan(estimate) else round(float(estimate) * scale, 6),
+            **{method: _pair(low, high, scale) for method, (low, high) in intervals.items()},
+        }
+    return write
+
+
+def _record_writer(record, key, scale):
+    def write(estimate, intervals):
+        for method, (low, high) in intervals.items():
+            record[f'{key}_{method}'] = _pair(low, high, scale)
+    return write
+
+
+def segment_records(metrics):
+    """JSON-ready rows of adobe_analytics.funnel_metrics, one per export and segment"""
+    records = metrics.to_dict(orient='records')
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, np.generic):
+                record[key] = value.item()
+    return records
+
+
+def add_summary_intervals(summary, segments=None, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES,
+                          seed=DEFAULT_SEED):
+    """
+    Add confidence intervals to a business case summary dict in place: the
+    web funnel percentages, the mobile mention percentages, and the monthly
+    and yearly mention rates of its trends. `segments` is an optional
+    funnel_metrics table (every Adobe export and segment), stored as
+    web_analytics['segments'] with intervals of its two percentages.
+    Returns the number of rates computed.
+    """
+    rates = _Rates()
+    web = summary.get('web_analytics') or {}
+    mobile = summary.get('mobile_feedback') or {}
+
+    for block, headline_rates in ((web, WEB_RATES), (mobile, MOBILE_RATES)):
+        for key, successes_key, trials_key in headline_rates:
+            if key in block:
+                rates.add(block.get(successes_key), block.get(trials_key), _headline_writer(block, key, 100))
+
+    trends = mobile.get('trends') or {}
+    for record in trends.get('monthly', []) + trends.get('yearly', []):
+        rates.add(record.get('mentions'), record.get('with_text'), _record_writer(record, 'mention_rate', 1))
+
+    if segments is not None:
+        web['segments'] = segment_records(segments)
+        for record in web['segments']:
+            for key, successes_key, trials_key in WEB_RATES:
+                rates.add(record[successes_key], record[trials_key], _record_writer(record, key, 100))
+
+    summary['interval_settings'] = {'confidence': confidence, 'resamples': resamples, 'seed': seed,
+                                    'methods': list(METHODS)}
+    return rates.compute(confidence, resamples, seed)
+
+
+def print_intervals(summary):
+    confidence = summary['interval_settings']['confidence']
+    for section in ('web_analytics', 'mobile_feedback'):
+        for key, interval in (summary.get(section) or {}).get('intervals', {}).items():
+            print(f"\n   {key}: {interval['estimate']:.3f}%")
+            for method in METHODS:
+                if interval[method]:
+                    low, high = interval[method]
+                    print(f"      {confidence:.0%} {method:<16} {low:.3f}% - {high:.3f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add confidence intervals to a business case summary JSON')
+    parser.add_argument('summary', help='Summary JSON to update in place')
+    parser.add_argument('--adobe', nargs='+',
+                        help='Adobe Workspace exports or glob patterns; adds per-segment funnel intervals')
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help=f'Confidence level (default: {DEFAULT_CONFIDENCE})')
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help=f'Bootstrap resamples per rate (default: {DEFAULT_RESAMPLES:,})')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f'Random seed (default: {DEFAULT_SEED})')
+    args = parser.parse_args()
+
+    with open(args.summary) as f:
+        summary = json.load(f)
+
+    segments = None
+    if args.adobe:
+        from adobe_analytics import funnel_metrics, load_exports
+        segments = funnel_metrics(load_exports(args.adobe))
+
+    print("=" * 80)
+    print("Confidence Intervals")
+    print("=" * 80)
+    start = time.perf_counter()
+    count = add_summary_intervals(summary, segments, args.confidence, args.resamples, args.seed)
+    print(f"Computed {count} rates x {args.resamples:,} resamples in {time.perf_counter() - start:.2f}s")
+    print_intervals(summary)
+
+    with open(args.summary, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"\n   Saved intervals to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Render every project's business case deliverables in one process
+
+Finds each projects/*/report_content.json, fills it in from the project's
+summary JSON and renders the PDF report (report_pdf.py) and the reveal.js
+slides (report_slides.py). Paragraph styles, the slide template and the
+prepared screenshots are loaded once and reused across projects, so
+regenerating the whole portfolio after a data refresh is one command.
+
+Usage:
+    python render_deliverables.py                              # every project
+    python render_deliverables.py projects/sibling-feature     # just these
+    python render_deliverables.py --only slides
+    python render_deliverables.py --slides-pdf                 # also print the slides (slides_pdf.py)
+"""
+
+import argparse
+import time
+
+from profiling import add_profile_arguments, finish_profile, profile_from_args
+from report_content import find_projects, load_project
+
+DELIVERABLES = ['report', 'slides']
+
+
+def render_project(project_dir, deliverables=DELIVERABLES):
+    """Render the requested deliverables of one project; returns their paths"""
+    project = load_project(project_dir)
+    outputs = []
+    if 'report' in deliverables:
+        # reportlab is only needed for the PDF
+        from report_pdf import build_report
+        outputs.append(build_report(project))
+    if 'slides' in deliverables:
+        from report_slides import render_slides
+        outputs.append(render_slides(project))
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render business case reports and slides from summary JSON')
+    parser.add_argument('projects', nargs='*', help='Project directories (default: every projects/* with report content)')
+    parser.add_argument('--only', choices=DELIVERABLES, help='Render only the report or only the slides')
+    parser.add_argument('--slides-pdf', action='store_true',
+                        help='Also print every rendered slide deck to PDF with one shared browser')
+    parser.add_argument('--workers', type=int, default=4, help='Slide decks printed at once (default: 4)')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profile_from_args('render_deliverables', args)
+
+    project_dirs = args.projects or find_projects()
+    deliverables = [args.only] if args.only else DELIVERABLES
+
+    print("=" * 80)
+    print("Rendering Business Case Deliverables")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    failed = []
+    decks = []
+    for project_dir in project_dirs:
+        print(f"\n{project_dir}")
+        try:
+            outputs = render_project(project_dir, deliverables)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"   Error rendering {project_dir}: {e!r}")
+            failed.append(project_dir)
+            continue
+        if 'slides' in deliverables:
+            decks.append((project_dir, outputs[-1]))
+
+    if args.slides_pdf and decks:
+        # Playwright is only needed for slide PDFs
+        from slides_pdf import pdf_path, print_decks
+        print(f"\nPrinting {len(decks)} slide decks to PDF")
+        printed, errors = print_decks([(html_file, pdf_path(html_file)) for _, html_file in decks], args.workers)
+        for output_file, pages in printed:
+            print(f"   {output_file}: {pages} slides")
+        errored = {html_file for html_file, _ in errors}
+        for html_file, error in errors:
+            print(f"   Error printing {html_file}: {error}")
+        failed.extend(project_dir for project_dir, html_file in decks if html_file in errored)
+
+    print(f"\nRendered {len(project_dirs) - len(failed)} of {len(project_dirs)} projects "
+          f"in {time.perf_counter() - start:.2f}s")
+    finish_profile()
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
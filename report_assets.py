@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Prepare report images: downsample to print resolution and cache by content hash
+
+Screenshots are captured at phone resolution (1179x2556 RGBA PNGs) but printed
+in a 3x5 inch box, so embedding them as-is makes the PDF several times larger
+than it needs to be and slows down every build. `prepare_assets` fits each
+image to its print box at PRINT_DPI, flattens transparency onto white and
+re-encodes it as JPEG, in parallel across images. Results are cached under
+a key built from the source file's SHA-256 and the target size, so a rebuild
+only touches images that changed.
+"""
+
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image as PILImage
+
+from review_loader import file_sha256
+
+PRINT_DPI = 150
+JPEG_QUALITY = 85
+POINTS_PER_INCH = 72
+
+AssetSpec = namedtuple('AssetSpec', ['source', 'width_in', 'height_in'])
+PreparedAsset = namedtuple('PreparedAsset', [
+    'source', 'path', 'source_bytes', 'prepared_bytes', 'source_pixels', 'prepared_pixels',
+    'width', 'height', 'cached',
+])
+
+
+def fit_pixels(size, width_in, height_in, dpi=PRINT_DPI):
+    """Pixel size of an image scaled to fit a print box, never upscaled"""
+    width, height = size
+    scale = min(width_in * dpi / width, height_in * dpi / height, 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def prepare_image(spec, cache_dir, dpi=PRINT_DPI, quality=JPEG_QUALITY):
+    """Downsample one image to its print box, reusing the cached copy if there is one"""
+    key = hashlib.sha256(f'{file_sha256(spec.source)}:{spec.width_in}x{spec.height_in}@{dpi}q{quality}'.encode())
+    path = os.path.join(cache_dir, f'{key.hexdigest()[:32]}.jpg')
+
+    with PILImage.open(spec.source) as image:
+        source_pixels = image.size
+        pixels = fit_pixels(image.size, spec.width_in, spec.height_in, dpi)
+        cached = os.path.exists(path)
+        if not cached:
+            image = image.convert('RGBA')
+            flattened = PILImage.new('RGB', image.size, 'white')
+            flattened.paste(image, mask=image.getchannel('A'))
+            resized = flattened.resize(pixels, PILImage.LANCZOS)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            resized.save(tmp_path, 'JPEG', quality=quality, optimize=True, dpi=(dpi, dpi))
+            os.replace(tmp_path, path)
+
+    return PreparedAsset(
+        source=spec.source,
+        path=path,
+        source_bytes=os.path.getsize(spec.source),
+        prepared_bytes=os.path.getsize(path),
+        source_pixels=source_pixels,
+        prepared_pixels=pixels,
+        # Display size in points, preserving the aspect ratio inside the box
+        width=pixels[0] / dpi * POINTS_PER_INCH,
+        height=pixels[1] / dpi * POINTS_PER_INCH,
+        cached=cached,
+    )
+
+
+def prepare_assets(specs, cache_dir, dpi=PRINT_DPI, workers=None):
+    """
+    Prepare every image in `specs` across a pool of worker processes.
+
+    Returns (assets, errors): a PreparedAsset per image that could be
+    prepared, in the order of `specs`, and (source, error) for the rest.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    assets, errors = [], []
+    with ProcessPoolExecutor(max_workers=workers or min(len(specs), os.cpu_count() or 1) or 1) as executor:
+        futures = [executor.submit(prepare_image, spec, cache_dir, dpi) for spec in specs]
+        for spec, future in zip(specs, futures):
+            try:
+                assets.append(future.result())
+            except (OSError, ValueError) as e:
+                errors.append((spec.source, e))
+    return assets, errors
+
+
+def format_kb(size):
+    return f"{size / 1024:,.0f} KB"
+
+
+def asset_report(assets, report_file=None):
+    """Print source vs prepared sizes per asset, optionally also writing them as JSON"""
+    print("\nReport assets:")
+    for asset in assets:
+        source_width, source_height = asset.source_pixels
+        width, height = asset.prepared_pixels
+        status = 'cached' if asset.cached else 'prepared'
+        print(f"   {os.path.basename(asset.source)}: {source_width}x{source_height} {format_kb(asset.source_bytes)} "
+              f"-> {width}x{height} {format_kb(asset.prepared_bytes)} ({status})")
+    source_total = sum(asset.source_bytes for asset in assets)
+    prepared_total = sum(asset.prepared_bytes for asset in assets)
+    print(f"   Total: {format_kb(source_total)} -> {format_kb(prepared_total)}")
+
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump({
+                'dpi': PRINT_DPI,
+                'source_bytes': source_total,
+                'prepared_bytes': prepared_total,
+                'assets': [asset._asdict() for asset in assets],
+            }, f, indent=2)
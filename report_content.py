@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Data-driven content for business case deliverables
+
+Each project describes its report and slides in `report_content.json`: the
+title, the output paths, the summary JSON its notebook writes, and a list
+of sections made of typed blocks (heading, checklist, quotes, stat, ...).
+Text in the content can reference summary figures with str.format fields,
+so a data refresh only needs the summary JSON rewritten:
+
+    "{web_analytics[sibling_pct_ancestor_users]:.0f}% of engaged users use it"
+    "{web_analytics[pedigree_views]:.2M} pedigree views"      (-> 1.56M)
+
+Phrases describing the mobile feedback's coverage are derived from the
+summary as well (see `feedback_phrases`), so the text follows the platforms
+and years the analysis actually covered:
+
+    "{feedback[platforms]} reviews ... mention sibling/family viewing{feedback[span]}"
+
+A block or section with "only": "report" or "only": "slides" appears in
+that deliverable only. The PDF and slide renderers are report_pdf.py and
+report_slides.py; render_deliverables.py renders every project at once.
+"""
+
+import glob
+import json
+import os
+import string
+
+CONTENT_FILE = 'report_content.json'
+PLATFORM_NAMES = {'android': 'Android', 'ios': 'iOS'}
+
+
+class SummaryFormatter(string.Formatter):
+    """str.format with an extra 'M' (millions) and 'K' (thousands) presentation type"""
+
+    def format_field(self, value, format_spec):
+        if format_spec.endswith('M'):
+            return format(value / 1e6, format_spec[:-1] + 'f') + 'M'
+        if format_spec.endswith('K'):
+            return format(value / 1e3, format_spec[:-1] + 'f') + 'K'
+        return super().format_field(value, format_spec)
+
+
+_formatter = SummaryFormatter()
+
+
+def fill(value, summary):
+    """Substitute summary fields into every string of a content value"""
+    if isinstance(value, str):
+        return _formatter.vformat(value, (), summary)
+    if isinstance(value, list):
+        return [fill(item, summary) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, summary) for key, item in value.items()}
+    return value
+
+
+def feedback_phrases(summary):
+    """
+    Phrases about the platforms and years the mobile feedback covers, worded
+    like the business case notebook's executive summary. The platforms come
+    from mobile_feedback['platforms'] (analyze_sibling_mentions.py --sources),
+    Android only without them; the years from the trends' years with
+    mentions, left out when the summary has no trends.
+    """
+    mobile = summary.get('mobile_feedback') or {}
+    platforms = list(mobile.get('platforms') or ['android'])
+    names = ' and '.join(PLATFORM_NAMES.get(platform, platform) for platform in platforms)
+    years = ((mobile.get('trends') or {}).get('years_with_mentions')) or []
+    if len(years) > 1:
+        span = f' over {len(years)} years ({years[0]}-{years[-1]})'
+        history = f'{len(years)} years of {names} feedback'
+    elif years:
+        span = f' in {years[0]}'
+        history = f'{names} feedback from {years[0]}'
+    else:
+        span = ''
+        history = f'{names} feedback'
+    return {
+        'platforms': names,
+        'span': span,
+        'history': history,
+        'platform_note': '' if 'ios' in platforms else 'Note: iOS App Store feedback not available for analysis.',
+    }
+
+
+class Project:
+    """A project's filled-in deliverable content"""
+
+    def __init__(self, project_dir, content, summary):
+        self.project_dir = project_dir
+        self.name = os.path.basename(os.path.normpath(project_dir))
+        self.summary = summary
+        self.content = fill(content, {**summary, 'feedback': feedback_phrases(summary)})
+
+    def path(self, relative):
+        return os.path.join(self.project_dir, relative)
+
+    @property
+    def title(self):
+        return self.content['title']
+
+    def output(self, deliverable):
+        return self.path(self.content['outputs'][deliverable])
+
+    def sections(self, deliverable):
+        """Sections and their blocks that appear in `deliverable` ('report' or 'slides')"""
+        for section in self.content['sections']:
+            if section.get('only', deliverable) != deliverable:
+                continue
+            blocks = [block for block in section['blocks'] if block.get('only', deliverable) == deliverable]
+            yield {**section, 'blocks': blocks}
+
+
+def load_project(project_dir):
+    """Load a project's report content and the summary JSON it references"""
+    with open(os.path.join(project_dir, CONTENT_FILE), encoding='utf-8') as f:
+        content = json.load(f)
+    with open(os.path.join(project_dir, content['summary']), encoding='utf-8') as f:
+        summary = json.load(f)
+    return Project(project_dir, content, summary)
+
+
+def find_projects(root='projects'):
+    """Project directories under `root` that have report content"""
+    return sorted(os.path.dirname(path) for path in glob.glob(os.path.join(root, '*', CONTENT_FILE)))
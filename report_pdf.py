@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Render a business case PDF report with FamilySearch branding from report content
+
+`build_report` lays out a project's report sections (see report_content.py)
+with reportlab: one page per section, one flowable group per block type.
+Styles and prepared images are shared across builds, so rendering many
+projects in one process only pays for them once.
+"""
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from reportlab.lib import colors
+from reportlab.pdfgen import canvas
+import os
+import time
+from functools import lru_cache
+
+from profiling import stage
+from report_assets import AssetSpec, asset_report, prepare_assets
+
+# FamilySearch Brand Colors
+FS_GREEN = colors.HexColor('#87b940')
+FS_DARK = colors.HexColor('#333536')
+FS_CORAL = colors.HexColor('#f16458')
+FS_GREY_LIGHT = colors.HexColor('#F6F6F6')
+FS_GREY = colors.HexColor('#76797C')
+
+class FSCanvas(canvas.Canvas):
+    """
+    Custom canvas with "N of M" page numbers.
+
+    Each page places a form XObject that is only filled in by save(), once
+    the page count is known, so no per-page state is kept while building.
+    """
+    def showPage(self):
+        self.doForm(self.page_number_form(self.getPageNumber()))
+        canvas.Canvas.showPage(self)
+
+    def save(self):
+        page_count = self.getPageNumber() - 1
+        for page_num in range(1, page_count + 1):
+            self.beginForm(self.page_number_form(page_num))
+            self.draw_page_number(page_num, page_count)
+            self.endForm()
+        canvas.Canvas.save(self)
+
+    @staticmethod
+    def page_number_form(page_num):
+        return f"page_number_{page_num}"
+
+    def draw_page_number(self, page_num, page_count):
+        self.setFont("Helvetica", 9)
+        self.setFillColor(FS_GREY)
+        self.drawRightString(7.5*inch, 0.5*inch, f"{page_num} of {page_count}")
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """Paragraph styles for the report, built once and shared by every build"""
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=32,
+            textColor=FS_GREEN,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold',
+            leading=40
+        ),
+        'subtitle': ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Heading2'],
+            fontSize=18,
+            textColor=FS_DARK,
+            spaceAfter=24,
+            alignment=TA_CENTER,
+            fontName='Helvetica'
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=FS_GREEN,
+            spaceAfter=12,
+            fontName='Helvetica-Bold'
+        ),
+        'subheading': ParagraphStyle(
+            'CustomSubheading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            textColor=FS_DARK,
+            spaceAfter=12,
+            fontName='Helvetica'
+        ),
+        'body': ParagraphStyle(
+            'CustomBody',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=FS_DARK,
+            spaceAfter=12,
+            fontName='Helvetica',
+            leading=16
+        ),
+        'quote': ParagraphStyle(
+            'Quote',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=FS_DARK,
+            fontName='Helvetica-Oblique',
+            leftIndent=20,
+            rightIndent=20,
+            spaceAfter=6,
+            leading=16
+        ),
+        'note': ParagraphStyle(
+            'Note',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=FS_GREY,
+            fontName='Helvetica',
+            leading=12
+        ),
+        'big_stat': ParagraphStyle(
+            'BigStat',
+            parent=styles['Normal'],
+            fontSize=48,
+            textColor=FS_GREEN,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold',
+            leading=58,
+            spaceAfter=12
+        ),
+        'stat_desc': ParagraphStyle(
+            'StatDesc',
+            parent=styles['Normal'],
+            fontSize=12,
+            textColor=FS_DARK,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'stat_detail': ParagraphStyle(
+            'StatDetail',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=FS_DARK,
+            alignment=TA_CENTER,
+            fontName='Helvetica'
+        ),
+        'secondary_stat': ParagraphStyle(
+            'SecondaryStat',
+            parent=styles['Normal'],
+            fontSize=32,
+            textColor=FS_GREEN,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold',
+            leading=40,
+            spaceAfter=12
+        ),
+        'rec_text': ParagraphStyle(
+            'RecText',
+            parent=styles['Normal'],
+            fontSize=18,
+            textColor=colors.white,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold',
+            leading=24
+        ),
+    }
+
+
+def stars_label(stars):
+    return f"{stars} star" if stars == 1 else f"{stars} stars"
+
+
+def title_flowables(block, styles, assets):
+    pillars_table = Table([
+        [f"{number}.", pillar['name'], pillar['text']] for number, pillar in enumerate(block['pillars'], 1)
+    ], colWidths=[0.5*inch, 2*inch, 3*inch])
+    pillars_table.setStyle(TableStyle([
+        ('TEXTCOLOR', (0,0), (0,-1), FS_GREEN),
+        ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (0,-1), 18),
+        ('FONTNAME', (1,0), (1,-1), 'Helvetica-Bold'),
+        ('FONTSIZE', (1,0), (1,-1), 13),
+        ('FONTSIZE', (2,0), (2,-1), 11),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('LEFTPADDING', (0,0), (-1,-1), 6),
+        ('RIGHTPADDING', (0,0), (-1,-1), 6),
+        ('TOPPADDING', (0,0), (-1,-1), 12),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 12),
+    ]))
+    return [
+        Spacer(1, 1.5*inch),
+        Paragraph(block.get('report_title', block['title']), styles['title']),
+        Paragraph(block['subtitle'], styles['subtitle']),
+        Spacer(1, 0.5*inch),
+        pillars_table,
+    ]
+
+
+def heading_flowables(block, styles, assets):
+    flowables = [Paragraph(block['text'], styles['heading'])]
+    if block.get('subheading'):
+        flowables.append(Paragraph(block['subheading'], styles['subheading']))
+    return flowables
+
+
+def checklist_flowables(block, styles, assets):
+    items = block['items']
+    checklist_table = Table([
+        ["✓" if item['ok'] else "✗", item['name'], item['text']] for item in items
+    ], colWidths=[0.4*inch, 1.5*inch, 4.5*inch])
+    checklist_table.setStyle(TableStyle([
+        ('TEXTCOLOR', (0,row), (0,row), FS_GREEN if item['ok'] else FS_CORAL) for row, item in enumerate(items)
+    ] + [
+        ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (0,-1), 14),
+        ('FONTNAME', (1,0), (1,-1), 'Helvetica-Bold'),
+        ('FONTSIZE', (1,0), (1,-1), 11),
+        ('FONTSIZE', (2,0), (2,-1), 10),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('LEFTPADDING', (0,0), (-1,-1), 6),
+        ('TOPPADDING', (0,0), (-1,-1), 8),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+    ]))
+    return [checklist_table, Spacer(1, 0.3*inch)]
+
+
+def callout_flowables(block, styles, assets):
+    return [
+        Paragraph(f"<b><font color='#f16458'>{block['text']}</font></b>", styles['body']),
+        Spacer(1, 0.3*inch),
+    ]
+
+
+def screenshots_flowables(block, styles, assets):
+    flowables = []
+    for item in block['items']:
+        asset = assets.get(item['file'])
+        if asset is None:
+            continue
+        flowables.append(Image(asset.path, width=asset.width, height=asset.height))
+        flowables.append(Paragraph(f"<i>{item['caption']}</i>", styles['body']))
+        flowables.append(Spacer(1, 0.2*inch))
+    return flowables
+
+
+def quotes_flowables(block, styles, assets):
+    flowables = []
+    if block.get('title'):
+        flowables.append(Paragraph(f"<b>{block['title']}</b>", styles['body']))
+        flowables.append(Spacer(1, 0.1*inch))
+    for quote in block['items']:
+        meta = f"{block['source']}, {quote['date']}, {stars_label(quote['stars'])}"
+        flowables.append(Paragraph(f'"{quote["text"]}"', styles['quote']))
+        flowables.append(Paragraph(f"<i><font color='#76797C' size=9>{meta}</font></i>", styles['body']))
+        flowables.append(Spacer(1, 0.15*inch))
+    return flowables
+
+
+def note_flowables(block, styles, assets):
+    label = f"<b>{block['label']}:</b> " if block.get('label') else ""
+    return [Spacer(1, 0.15*inch), Paragraph(label + block['text'], styles['note'])]
+
+
+def stat_flowables(block, styles, assets):
+    if block.get('size') == 'secondary':
+        return [
+            Paragraph(block['value'], styles['secondary_stat']),
+            Spacer(1, 0.12*inch),
+            Paragraph(block['label'], styles['stat_desc']),
+            Spacer(1, 0.08*inch),
+            Paragraph(block['detail'], styles['stat_detail']),
+        ]
+    return [
+        Spacer(1, 0.3*inch),
+        Paragraph(block['value'], styles['big_stat']),
+        Spacer(1, 0.15*inch),
+        Paragraph(block['label'], styles['stat_desc']),
+        Spacer(1, 0.08*inch),
+        Paragraph(block['detail'], styles['stat_detail']),
+        Spacer(1, 0.25*inch),
+    ]
+
+
+def divider_flowables(block, styles, assets):
+    divider_table = Table([['']], colWidths=[6.5*inch])
+    divider_table.setStyle(TableStyle([
+        ('LINEABOVE', (0,0), (-1,0), 2, colors.HexColor('#CACDCD')),
+        ('TOPPADDING', (0,0), (0,0), 20),
+    ]))
+    return [divider_table, Spacer(1, 0.2*inch)]
+
+
+def source_flowables(block, styles, assets):
+    return [Spacer(1, 0.3*inch), Paragraph(f"<i><font color='#76797C' size=9>{block['text']}</font></i>", styles['body'])]
+
+
+def recommendation_flowables(block, styles, assets):
+    rec_table = Table([[Paragraph(block['text'], styles['rec_text'])]], colWidths=[6.5*inch])
+    rec_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,-1), FS_GREEN),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('TOPPADDING', (0,0), (-1,-1), 30),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 30),
+        ('ROUNDEDCORNERS', [12, 12, 12, 12]),
+    ]))
+    return [Spacer(1, 0.2*inch), rec_table, Spacer(1, 0.3*inch)]
+
+
+def list_flowables(block, styles, assets):
+    flowables = [Paragraph(f"<b>{block['title']}</b>", styles['subheading'])]
+    for item in block['items']:
+        if block.get('style') == 'arrow':
+            flowables.append(Paragraph(f"<font color='#87b940'>→ {item}</font>", styles['body']))
+        else:
+            flowables.append(Paragraph(f"✓ {item}", styles['body']))
+    flowables.append(Spacer(1, 0.2*inch))
+    return flowables
+
+
+BLOCK_FLOWABLES = {
+    'title': title_flowables,
+    'heading': heading_flowables,
+    'checklist': checklist_flowables,
+    'callout': callout_flowables,
+    'screenshots': screenshots_flowables,
+    'quotes': quotes_flowables,
+    'note': note_flowables,
+    'stat': stat_flowables,
+    'divider': divider_flowables,
+    'source': source_flowables,
+    'recommendation': recommendation_flowables,
+    'list': list_flowables,
+}
+
+
+def prepare_screenshots(project):
+    """Prepare every screenshot the report uses in one parallel pass, keyed by content path"""
+    files = [
+        item['file']
+        for section in project.sections('report')
+        for block in section['blocks'] if block['type'] == 'screenshots'
+        for item in block['items'] if os.path.exists(project.path(item['file']))
+    ]
+    if not files:
+        return {}, []
+    assets_dir = project.path(os.path.join("data", "cache", "report_assets"))
+    assets, errors = prepare_assets([AssetSpec(project.path(file), 3, 5) for file in files], assets_dir)
+    for filepath, error in errors:
+        print(f"Skipping screenshot {os.path.basename(filepath)}: {error}")
+    by_source = {asset.source: asset for asset in assets}
+    prepared = {file: by_source[project.path(file)] for file in files if project.path(file) in by_source}
+    asset_report(assets, os.path.join(assets_dir, "asset_report.json"))
+    return prepared, assets
+
+
+def build_report(project, output_file=None):
+    """Render a project's report sections to a PDF; returns the output path"""
+    output_file = output_file or project.output('report')
+    start = time.perf_counter()
+    doc = SimpleDocTemplate(output_file, pagesize=letter,
+                           leftMargin=1*inch, rightMargin=1*inch,
+                           topMargin=1*inch, bottomMargin=1*inch)
+    styles = report_styles()
+    with stage('prepare_screenshots') as s:
+        prepared, _ = prepare_screenshots(project)
+        s.rows_out = len(prepared)
+
+    with stage('flowables') as s:
+        story = []
+        for section_num, section in enumerate(project.sections('report')):
+            if section_num:
+                story.append(PageBreak())
+            for block in section['blocks']:
+                try:
+                    render = BLOCK_FLOWABLES[block['type']]
+                except KeyError:
+                    raise ValueError(f"{project.name}: unknown report block type {block['type']!r}") from None
+                story.extend(render(block, styles, prepared))
+        s.rows_out = len(story)
+
+    with stage('doc_build', rows_in=len(story)):
+        doc.build(story, canvasmaker=FSCanvas)
+    print(f"PDF report generated: {output_file} ({os.path.getsize(output_file) / 1024:,.0f} KB "
+          f"in {time.perf_counter() - start:.2f}s)")
+    return output_file
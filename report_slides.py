@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Render reveal.js business case slides from report content
+
+`render_slides` turns a project's slide sections (see report_content.py)
+into <section> elements and substitutes them into
+templates/business_case_slides.html, which holds the FamilySearch-branded
+CSS and the reveal.js setup. A section becomes one slide, except where a
+block starts a new slide ("new_slide") or a quotes block has more quotes
+than fit on one slide ("per_slide"), which continue on further slides.
+"""
+
+import os
+import string
+from functools import lru_cache
+
+from profiling import stage
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'business_case_slides.html')
+
+SUBHEADING = '<h3 style="color: var(--fs-dark); font-weight: 400;{}">{}</h3>'
+
+# Slides with quotes or big stats use a smaller subheading so their content fits
+COMPACT_BLOCKS = {'quotes', 'stat'}
+
+
+@lru_cache(maxsize=None)
+def slides_template():
+    """The slide deck template, read once and shared by every render"""
+    with open(TEMPLATE_FILE, encoding='utf-8') as f:
+        return string.Template(f.read())
+
+
+def stars_label(stars):
+    return f"{stars} star" if stars == 1 else f"{stars} stars"
+
+
+def title_html(block, context):
+    pillars = '\n'.join(
+        f'          <div><span class="pillar-number">{number}.</span> {pillar["name"]} – {pillar["text"]}</div>'
+        for number, pillar in enumerate(block['pillars'], 1)
+    )
+    return (
+        f'        <h1>{block["title"]}</h1>\n'
+        f'        <h3 style="color: var(--fs-dark); font-weight: 400; margin-top: 50px;">{block["subtitle"]}</h3>\n'
+        f'        <div class="three-pillars">\n{pillars}\n        </div>'
+    )
+
+
+def heading_html(block, context):
+    if context.get('compact'):
+        html = f'        <h2 style="margin-bottom: 5px;">{block["text"]}</h2>'
+        style = ' font-size: 1.4em; margin-bottom: 8px;'
+    else:
+        html = f'        <h2>{block["text"]}</h2>'
+        style = ''
+    if block.get('subheading'):
+        html += '\n        ' + SUBHEADING.format(style, block['subheading'])
+    return html
+
+
+def checklist_html(block, context):
+    items = '\n'.join(
+        f'          <li><span class="{"checkmark" if item["ok"] else "xmark"}">{"✓" if item["ok"] else "✗"}</span> '
+        f'<strong>{item["name"]}</strong> – {item["text"]}</li>'
+        for item in block['items']
+    )
+    return f'        <ul style="margin: 30px 0; font-size: 1.2em;">\n{items}\n        </ul>'
+
+
+def callout_html(block, context):
+    return (f'        <p style="font-size: 1.2em; color: var(--fs-coral); margin-top: 40px;">\n'
+            f'          <strong>{block["text"]}</strong>\n        </p>')
+
+
+def screenshots_html(block, context):
+    items = []
+    for item in block['items']:
+        src = os.path.relpath(context['project'].path(item['file']), context['slides_dir']).replace(os.sep, '/')
+        label = item.get('label', item['caption'])
+        items.append(
+            '          <div class="competitor-item" style="display: flex; flex-direction: column; align-items: center;">\n'
+            f'            <img src="{src}" alt="{label}" style="max-height: 420px; width: auto; border: 2px solid #CACDCD; border-radius: 8px;">\n'
+            f'            <h4 style="color: var(--fs-dark); margin-top: 12px; font-size: 0.95em; text-align: center; font-weight: 700; letter-spacing: 0.5px;">{label.upper()}</h4>\n'
+            '          </div>'
+        )
+    columns = ' '.join(['1fr'] * min(len(items), 3))
+    return (f'        <div style="display: grid; grid-template-columns: {columns}; gap: 25px; margin-top: 30px;">\n'
+            + '\n'.join(items) + '\n        </div>')
+
+
+def quotes_html(block, context):
+    return '\n\n'.join(
+        f'        <div class="quote-box-small">\n'
+        f'          "{quote["text"]}"\n'
+        f'          <div class="quote-meta">{block["source"]}, {quote["date"]} – {stars_label(quote["stars"])}</div>\n'
+        f'        </div>'
+        for quote in block['items']
+    )
+
+
+def note_html(block, context):
+    label = f'<strong>{block["label"]}:</strong> ' if block.get('label') else ''
+    return (f'        <p style="margin-top: 10px; font-size: 0.7em; color: #76797C; line-height: 1.3;">\n'
+            f'          {label}{block["text"]}\n        </p>')
+
+
+def stat_html(block, context):
+    if block.get('size') == 'secondary':
+        return (f'        <div style="text-align: center; font-size: 1.3em; font-weight: 700; color: var(--fs-green);">{block["value"]}</div>\n'
+                f'        <div style="text-align: center; font-size: 1em; color: var(--fs-dark); margin-top: 6px; line-height: 1.3;">\n'
+                f'          {block["label"]}<br>{block["detail"]}\n        </div>')
+    return (f'        <div style="font-size: 4.2em; font-weight: 700; color: var(--fs-green); text-align: center; margin: 30px 0 25px 0;">{block["value"]}</div>\n'
+            f'        <div style="font-size: 1.15em; text-align: center; color: var(--fs-dark); margin-bottom: 25px; line-height: 1.3;">'
+            f'{block["label"]}<br>{block["detail"]}</div>')
+
+
+def divider_html(block, context):
+    return '        <div style="border-top: 2px solid #CACDCD; margin-top: 20px; padding-top: 20px;"></div>'
+
+
+def source_html(block, context):
+    return (f'        <p style="margin-top: 20px; font-size: 0.7em; color: #76797C; text-align: center; line-height: 1.3;">\n'
+            f'          {block["text"]}\n        </p>')
+
+
+def recommendation_html(block, context):
+    return (f'        <div class="recommendation-box" style="padding: 35px; margin: 25px 0;">\n'
+            f'          <h3 style="font-size: 1.8em;">{block["text"]}</h3>\n        </div>')
+
+
+def list_html(block, context):
+    if block.get('style') == 'arrow':
+        opening = '<ul class="impact-list" style="font-size: 0.95em; margin: 0;">'
+        items = [f'            <li style="margin: 10px 0;">{item}</li>' for item in block['items']]
+    else:
+        opening = '<ul style="font-size: 0.95em; margin: 0;">'
+        items = [f'            <li style="margin: 10px 0;">✓ {item}</li>' for item in block['items']]
+    return ('        <div style="margin-top: 20px;">\n'
+            f'          <h3 style="font-size: 1.2em; margin-bottom: 6px;">{block["title"]}</h3>\n'
+            f'          {opening}\n' + '\n'.join(items) + '\n          </ul>\n        </div>')
+
+
+BLOCK_HTML = {
+    'title': title_html,
+    'heading': heading_html,
+    'checklist': checklist_html,
+    'callout': callout_html,
+    'screenshots': screenshots_html,
+    'quotes': quotes_html,
+    'note': note_html,
+    'stat': stat_html,
+    'divider': divider_html,
+    'source': source_html,
+    'recommendation': recommendation_html,
+    'list': list_html,
+}
+
+
+def section_slides(section, context):
+    """Split one content section into slides, as (html parts, is title slide) pairs"""
+    slides = [[]]
+    continuations = []
+    heading = next((block for block in section['blocks'] if block['type'] == 'heading'), None)
+    context = {**context, 'compact': any(block['type'] in COMPACT_BLOCKS for block in section['blocks'])}
+
+    for block in section['blocks']:
+        render = BLOCK_HTML.get(block['type'])
+        if render is None:
+            raise ValueError(f"{context['project'].name}: unknown slide block type {block['type']!r}")
+        if block.get('new_slide'):
+            slides.append([f'        <h2 style="margin-bottom: 10px;">{block["new_slide"]}</h2>'])
+        per_slide = block.get('per_slide')
+        if block['type'] == 'quotes' and per_slide and len(block['items']) > per_slide:
+            items = block['items']
+            slides[-1].append(render({**block, 'items': items[:per_slide]}, context))
+            for start in range(per_slide, len(items), per_slide):
+                continued = [render({**block, 'items': items[start:start + per_slide]}, context)]
+                if heading:
+                    title = {'type': 'heading', 'text': f'{heading["text"]} (continued)',
+                             'subheading': block.get('continued', heading.get('subheading'))}
+                    continued.insert(0, heading_html(title, context))
+                continuations.append(continued)
+            continue
+        slides[-1].append(render(block, context))
+
+    is_title = any(block['type'] == 'title' for block in section['blocks'])
+    return [(parts, is_title and i == 0) for i, parts in enumerate(slides + continuations)]
+
+
+def render_slides(project, output_file=None):
+    """Render a project's slide sections into the deck template; returns the output path"""
+    output_file = output_file or project.output('slides')
+    context = {'project': project, 'slides_dir': os.path.dirname(os.path.abspath(output_file))}
+
+    with stage('slides_html') as s:
+        slides = [slide for section in project.sections('slides') for slide in section_slides(section, context)]
+        sections = []
+        for number, (parts, is_title) in enumerate(slides, 1):
+            opening = '<section class="title-slide">' if is_title else '<section>'
+            body = '\n\n'.join(parts)
+            sections.append(f'      {opening}\n{body}\n'
+                            f'        <div class="manual-slide-number">{number} / {len(slides)}</div>\n'
+                            f'      </section>')
+        html = slides_template().substitute(title=project.title, slides='\n\n'.join(sections))
+        s.rows_out = len(slides)
+
+    with stage('write_html', rows_in=len(slides)):
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(html)
+    print(f"Slides generated: {output_file} ({len(slides)} slides)")
+    return output_file
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Incremental, content-addressed cache of per-export sibling-mention results
+
+For every export file the cache keeps its SHA-256, the keywords each of its
+review languages was matched against, its ReviewStats and its matched rows,
+keyed by its path under the feedback root (android/reviews_..._202501.csv),
+so re-downloads with the same name in other folders do not collide:
+
+    data/cache/sibling_mentions/
+        index.json
+        rows/<sha256>.csv
+
+A rerun only decodes exports that are new or changed, and merges them with
+the cached partials in file order. Keyword changes invalidate only what they
+must: a file is unaffected when none of its review languages had their
+keywords changed; when keywords were only removed, its cached rows are
+re-filtered without decoding the export again; otherwise it is rescanned.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from keyword_taxonomy import BASE_LANGUAGE, LanguageIndex, normalize_language
+from review_loader import (
+    ANALYSIS_COLUMNS, DEFAULT_CHUNKSIZE, ReviewStats, file_sha256, iter_scan_results, report_error,
+)
+
+DEFAULT_CACHE = 'data/cache/sibling_mentions'
+FEEDBACK_ROOT = 'data/feedback'
+INDEX_NAME = 'index.json'
+
+
+def effective_keywords(taxonomy, language):
+    """Sorted keywords a review in `language` is matched against"""
+    keywords = set(taxonomy.get(BASE_LANGUAGE, []))
+    keywords.update(taxonomy.get(language, []))
+    return sorted(k.lower() for k in keywords)
+
+
+def file_keywords(taxonomy, stats):
+    """Effective keyword list for every language present in an export"""
+    languages = {normalize_language(language) for language in stats.languages} or {BASE_LANGUAGE}
+    return {language: effective_keywords(taxonomy, language) for language in sorted(languages)}
+
+
+class ResultsCache:
+    """Per-export scan results stored under `cache_dir`, for exports under `root`"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE, root=FEEDBACK_ROOT):
+        self.cache_dir = cache_dir
+        self.root = Path(os.path.abspath(root))
+        self.rows_dir = os.path.join(cache_dir, 'rows')
+        self.index_path = os.path.join(cache_dir, INDEX_NAME)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _rows_path(self, checksum):
+        return os.path.join(self.rows_dir, f'{checksum}.csv')
+
+    def key(self, csv_file):
+        """An export's index key: its path under the root, or its absolute path outside it"""
+        path = Path(os.path.abspath(csv_file))
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _entry(self, csv_file):
+        # Caches written before entries were keyed by path keyed them by file name
+        return self.index.get(self.key(csv_file)) or self.index.get(Path(csv_file).name)
+
+    def checksum(self, csv_file):
+        """SHA-256 of an export, reusing the cached one while size and mtime are unchanged"""
+        stat = os.stat(csv_file)
+        entry = self._entry(csv_file)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry['sha256']
+        return file_sha256(csv_file)
+
+    def lookup(self, csv_file, checksum, taxonomy):
+        """
+        Cached (stats, mentions) for an export, or None if it must be rescanned
+        """
+        entry = self._entry(csv_file)
+        if not entry or entry['sha256'] != checksum or not os.path.exists(self._rows_path(checksum)):
+            return None
+        if 'trends' not in entry['stats']:
+            return None  # cached before trend counts were recorded
+
+        stats = ReviewStats.from_dict(entry['stats'])
+        cached_keywords = entry['keywords']
+        current_keywords = file_keywords(taxonomy, stats)
+        changed = [lang for lang, keywords in current_keywords.items() if cached_keywords.get(lang) != keywords]
+        if any(not set(current_keywords[lang]) <= set(cached_keywords.get(lang, [])) for lang in changed):
+            return None
+
+        mentions = pd.read_csv(self._rows_path(checksum), dtype={'App Version Name': str})
+        if not set(ANALYSIS_COLUMNS) <= set(mentions.columns):
+            return None  # cached before the review link and package were kept
+        if changed:
+            # Keywords were only removed, so the new matches are a subset of the cached ones
+            mentions = LanguageIndex(taxonomy).filter_reviews(mentions.drop(columns='Matched Keywords'))
+            stats.recount_mentions(mentions)
+            self.store(csv_file, checksum, taxonomy, stats, mentions)
+        elif self.key(csv_file) not in self.index:
+            self.index[self.key(csv_file)] = self.index.pop(Path(csv_file).name)
+        return stats, mentions
+
+    def store(self, csv_file, checksum, taxonomy, stats, mentions):
+        os.makedirs(self.rows_dir, exist_ok=True)
+        mentions.to_csv(self._rows_path(checksum), index=False, encoding='utf-8')
+        stat = os.stat(csv_file)
+        key = self.key(csv_file)
+        if key != Path(csv_file).name:
+            self.index.pop(Path(csv_file).name, None)
+        self.index[key] = {
+            'sha256': checksum,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'keywords': file_keywords(taxonomy, stats),
+            'stats': stats.to_dict(),
+        }
+
+    def prune(self, csv_files):
+        """Forget exports that are no longer in `csv_files`"""
+        # File name keys are kept while an export of that name is, until it is stored again
+        keep = {self.key(csv_file) for csv_file in csv_files} | {Path(csv_file).name for csv_file in csv_files}
+        for name in [name for name in self.index if name not in keep]:
+            del self.index[name]
+        live = {entry['sha256'] for entry in self.index.values()}
+        if os.path.isdir(self.rows_dir):
+            for rows_file in os.listdir(self.rows_dir):
+                if Path(rows_file).stem not in live:
+                    os.remove(os.path.join(self.rows_dir, rows_file))
+
+
+def scan_exports_cached(csv_files, taxonomy, cache_dir=DEFAULT_CACHE, workers=None,
+                        chunksize=DEFAULT_CHUNKSIZE, usecols=ANALYSIS_COLUMNS):
+    """
+    Scan exports for the `taxonomy` keywords, decoding only those the cache
+    cannot answer (in parallel across `workers` processes).
+
+    Returns (stats, mentions, rescanned) where `rescanned` lists the files
+    that were decoded on this run.
+    """
+    cache = ResultsCache(cache_dir)
+    results = {}
+    checksums = {}
+    pending = []
+
+    for csv_file in csv_files:
+        checksums[csv_file] = cache.checksum(csv_file)
+        cached = cache.lookup(csv_file, checksums[csv_file], taxonomy)
+        if cached is None:
+            pending.append(csv_file)
+        else:
+            results[csv_file] = cached
+
+    for csv_file, file_stats, file_mentions, errors in iter_scan_results(pending, taxonomy, workers, chunksize, usecols):
+        for file, error in errors:
+            report_error(file, error)
+        if file_mentions is None:
+            continue
+        results[csv_file] = file_stats, file_mentions
+        if not errors:
+            cache.store(csv_file, checksums[csv_file], taxonomy, file_stats, file_mentions)
+
+    cache.prune(csv_files)
+    cache.save()
+
+    # Merge in file order so the output does not depend on what was cached
+    stats = ReviewStats()
+    mentions = []
+    for csv_file in csv_files:
+        if csv_file in results:
+            file_stats, file_mentions = results[csv_file]
+            stats.merge(file_stats)
+            mentions.append(file_mentions)
+
+    mentions = pd.concat(mentions, ignore_index=True) if mentions else pd.DataFrame(columns=usecols)
+    return stats, mentions, pending
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Offline review category classifier trained on the manual labels
+
+Turns review text into hashed TF-IDF features and scores every review with a
+multinomial logistic regression, so categorizing thousands of reviews does
+not need a human to read each one:
+
+- features: lowercased word unigrams and bigrams hashed into N_FEATURES
+  columns of a scipy.sparse CSR matrix, built for a whole batch at once
+  (tokens are exploded into one array, hashed with pandas' vectorized
+  hash_array and summed into the matrix), then sublinear TF, IDF and L2
+  normalization
+- model: softmax regression with L2 regularization and balanced class
+  weights, fitted with L-BFGS on the labels in the label store (see
+  label_store.py); 'unsure' labels are not used for training
+- inference: one sparse matrix product per batch, writing a probability
+  column per category
+
+Usage:
+    python review_classifier.py                  # train, then score data/sibling_mentions.csv
+    python review_classifier.py --corpus         # also score every review with text in the exports
+    python review_classifier.py --no-train       # score with the saved model
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import minimize
+
+from label_store import DEFAULT_LABELS, LabelStore, review_keys
+from review_loader import ANALYSIS_COLUMNS, DEFAULT_CHUNKSIZE, MENTION_DTYPES, has_text, iter_review_chunks
+
+N_FEATURES = 2 ** 18
+MIN_LABELS = 2
+
+input_file = 'data/sibling_mentions.csv'
+output_file = 'data/sibling_mention_categories.csv'
+corpus_output_file = 'data/processed/review_categories.csv'
+model_file = 'data/models/review_classifier.npz'
+
+_TOKEN = r'\w+'
+
+
+def hashed_counts(texts, n_features=N_FEATURES):
+    """
+    Sparse (len(texts), n_features) matrix of hashed unigram and bigram
+    counts, built in one pass over the batch
+    """
+    texts = pd.Series(list(texts), dtype=object)
+    tokens = texts.fillna('').astype(str).str.lower().str.findall(_TOKEN).explode().dropna()
+    docs = tokens.index.to_numpy(dtype=np.int64)
+    hashes = pd.util.hash_array(tokens.to_numpy(dtype=object))
+
+    # Bigrams join each token with the next one in the same review
+    same_doc = docs[:-1] == docs[1:]
+    bigrams = hashes[:-1][same_doc] * np.uint64(0x9E3779B97F4A7C15) + hashes[1:][same_doc]
+
+    rows = np.concatenate([docs, docs[:-1][same_doc]])
+    columns = (np.concatenate([hashes, bigrams]) % np.uint64(n_features)).astype(np.int64)
+    counts = sparse.csr_matrix((np.ones(len(rows), dtype=np.float64), (rows, columns)),
+                               shape=(len(texts), n_features))
+    counts.sum_duplicates()
+    return counts
+
+
+class HashedTfidf:
+    """Sublinear TF-IDF over hashed features; only the IDF vector is learned"""
+
+    def __init__(self, n_features=N_FEATURES, idf=None):
+        self.n_features = n_features
+        self.idf = idf
+
+    def fit(self, texts):
+        counts = hashed_counts(texts, self.n_features)
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf = np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1
+        return self
+
+    def transform(self, texts):
+        features = hashed_counts(texts, self.n_features)
+        features.data = np.log1p(features.data) * self.idf[features.indices]
+        norms = np.sqrt(np.asarray(features.multiply(features).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ features
+
+
+def softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class ReviewClassifier:
+    """Hashed TF-IDF features and a softmax regression over the label categories"""
+
+    def __init__(self, categories=None, vectorizer=None, weights=None, bias=None, l2=1.0):
+        self.categories = list(categories or [])
+        self.vectorizer = vectorizer or HashedTfidf()
+        self.weights = weights
+        self.bias = bias
+        self.l2 = l2
+
+    def fit(self, texts, labels):
+        labels = pd.Series(labels).reset_index(drop=True)
+        self.categories = sorted(labels.unique())
+        if len(self.categories) < MIN_LABELS:
+            raise ValueError(f"Need labels in at least {MIN_LABELS} categories to train, got {self.categories}")
+
+        features = self.vectorizer.fit(texts).transform(texts)
+        n_samples, n_features = features.shape
+        n_classes = len(self.categories)
+        targets = np.zeros((n_samples, n_classes))
+        targets[np.arange(n_samples), labels.map(self.categories.index).to_numpy()] = 1
+        # Balanced class weights, so a rare category is not drowned out
+        sample_weights = (n_samples / (n_classes * targets.sum(axis=0)))[targets.argmax(axis=1)]
+
+        def loss(params):
+            weights = params[:-n_classes].reshape(n_features, n_classes)
+            bias = params[-n_classes:]
+            probabilities = softmax(features @ weights + bias)
+            log_likelihood = (sample_weights * np.log(probabilities[targets == 1] + 1e-12)).sum()
+            value = -log_likelihood / n_samples + self.l2 / 2 * (weights ** 2).sum() / n_samples
+            error = (probabilities - targets) * sample_weights[:, None] / n_samples
+            gradient = np.concatenate([(features.T @ error + self.l2 * weights / n_samples).ravel(),
+                                       error.sum(axis=0)])
+            return value, gradient
+
+        result = minimize(loss, np.zeros(n_features * n_classes + n_classes), jac=True, method='L-BFGS-B',
+                          options={'maxiter': 200})
+        self.weights = result.x[:-n_classes].reshape(n_features, n_classes)
+        self.bias = result.x[-n_classes:]
+        return self
+
+    def predict_proba(self, texts):
+        """(len(texts), len(categories)) array of category probabilities"""
+        return softmax(self.vectorizer.transform(texts) @ self.weights + self.bias)
+
+    def score(self, reviews, column='Review Text'):
+        """Predicted category and a 'p_<category>' probability column per category for each review"""
+        probabilities = self.predict_proba(reviews[column].tolist())
+        scores = pd.DataFrame(probabilities, index=reviews.index,
+                              columns=[f'p_{category}' for category in self.categories])
+        scores.insert(0, 'Predicted Category', np.asarray(self.categories, dtype=object)[probabilities.argmax(axis=1)])
+        return scores
+
+    def save(self, path=model_file):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        nonzero = sparse.csr_matrix(self.weights)
+        np.savez_compressed(path, categories=np.array(self.categories), idf=self.vectorizer.idf,
+                            n_features=self.vectorizer.n_features, bias=self.bias,
+                            data=nonzero.data, indices=nonzero.indices, indptr=nonzero.indptr,
+                            shape=np.array(self.weights.shape))
+
+    @classmethod
+    def load(cls, path=model_file):
+        with np.load(path) as model:
+            weights = sparse.csr_matrix((model['data'], model['indices'], model['indptr']),
+                                        shape=tuple(model['shape'])).toarray()
+            vectorizer = HashedTfidf(int(model['n_features']), model['idf'])
+            return cls(model['categories'].tolist(), vectorizer, weights, model['bias'])
+
+
+def training_data(reviews, store, include_rules=False):
+    """(texts, categories) of the reviews that have a usable label in `store`"""
+    keys = review_keys(reviews)
+    labels = [
+        label['category'] if label and (include_rules or label['source'] != 'rule') else None
+        for label in map(store.get, keys)
+    ]
+    labels = pd.Series(labels, index=reviews.index)
+    labelled = labels.notna() & (labels != 'unsure')
+    return reviews.loc[labelled, 'Review Text'].tolist(), labels[labelled]
+
+
+def score_file(classifier, path, output):
+    """Score every review in a mentions CSV and write the keys and probabilities to `output`"""
+    reviews = pd.read_csv(path, dtype=MENTION_DTYPES)
+    scores = classifier.score(reviews)
+    scores.insert(0, 'Review Key', review_keys(reviews))
+    scores.to_csv(output, index=False, encoding='utf-8')
+    return scores
+
+
+def score_corpus(classifier, csv_files, output, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Score every review with text in the exports, chunk by chunk, appending
+    to `output`. Rows are keyed by the `reviewId` in their 'Review Link',
+    the same key as the mentions CSV and the label store, so corpus scores
+    join with the labelled mentions.
+    """
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    scored = 0
+    for chunk_num, chunk in enumerate(iter_review_chunks(csv_files, chunksize=chunksize, usecols=ANALYSIS_COLUMNS)):
+        reviews = chunk[has_text(chunk)]
+        scores = classifier.score(reviews)
+        scores.insert(0, 'Review Key', review_keys(reviews))
+        scores.insert(1, 'Reviewer Language', reviews['Reviewer Language'])
+        scores.to_csv(output, index=False, encoding='utf-8', mode='w' if chunk_num == 0 else 'a', header=chunk_num == 0)
+        scored += len(scores)
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train and apply the review category classifier')
+    parser.add_argument('--input', default=input_file, help=f'Sibling mentions CSV to score (default: {input_file})')
+    parser.add_argument('--labels', default=DEFAULT_LABELS, help=f'Label store (default: {DEFAULT_LABELS})')
+    parser.add_argument('--model', default=model_file, help=f'Model file (default: {model_file})')
+    parser.add_argument('--no-train', action='store_true', help='Score with the saved model instead of retraining')
+    parser.add_argument('--include-rules', action='store_true', help='Also train on rule-based pre-labels')
+    parser.add_argument('--corpus', action='store_true',
+                        help=f'Also score every review with text in data/feedback/android into {corpus_output_file}')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f'Rows per batch when scoring the corpus (default: {DEFAULT_CHUNKSIZE:,})')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Review Category Classifier")
+    print("=" * 80)
+
+    if args.no_train:
+        classifier = ReviewClassifier.load(args.model)
+        print(f"\n   Loaded model {args.model} ({', '.join(classifier.categories)})")
+    else:
+        reviews = pd.read_csv(args.input, dtype=MENTION_DTYPES)
+        texts, labels = training_data(reviews, LabelStore(args.labels), args.include_rules)
+        print(f"\n1. TRAINING")
+        print(f"   Labelled reviews: {len(texts):,} of {len(reviews):,}")
+        for category, count in labels.value_counts().items():
+            print(f"      {category}: {count:,}")
+        try:
+            classifier = ReviewClassifier().fit(texts, labels)
+        except ValueError as e:
+            print(f"   {e}; label more reviews with categorize_feature_requests.py")
+            return
+        classifier.save(args.model)
+        print(f"   Saved model to {args.model}")
+
+    print(f"\n2. SCORING")
+    scores = score_file(classifier, args.input, output_file)
+    print(f"   Scored {len(scores):,} reviews from {args.input}")
+    for category, count in scores['Predicted Category'].value_counts().items():
+        print(f"      {category}: {count:,}")
+    print(f"   Saved probabilities to {output_file}")
+
+    if args.corpus:
+        csv_files = sorted(glob.glob('data/feedback/android/*.csv'))
+        scored = score_corpus(classifier, csv_files, corpus_output_file, args.chunksize)
+        print(f"   Scored {scored:,} reviews with text from {len(csv_files)} exports")
+        print(f"   Saved probabilities to {corpus_output_file}")
+
+
+if __name__ == "__main__":
+    main()
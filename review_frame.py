@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Compact, dtype-optimized in-memory review frames
+
+A raw Play Console export keeps every column as Python-object strings,
+including a ~200-byte `Review Link` URL per row. `compact_reviews` keeps
+only the columns the analysis reads and stores them in compact types:
+
+- low-cardinality columns (package, language, device, app version) as categoricals
+- star ratings as Int8, version codes as Int32, millis timestamps as Int64
+- free text as Arrow-backed strings (plain Python strings without pyarrow)
+- `Review Link` reduced to its `reviewId`
+
+`load_compact` applies this per export file before concatenating, so the
+full-size object frame never exists for more than one month at a time.
+"""
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from review_loader import ANALYSIS_COLUMNS, report_error, review_ids
+
+CATEGORY_COLUMNS = ['Package Name', 'Reviewer Language', 'Device', 'App Version Name']
+INTEGER_COLUMNS = {
+    'Star Rating': 'Int8',
+    'App Version Code': 'Int32',
+    'Review Submit Millis Since Epoch': 'Int64',
+    'Review Last Update Millis Since Epoch': 'Int64',
+    'Developer Reply Millis Since Epoch': 'Int64',
+}
+
+# Columns kept by default: what the analysis reads, plus the review's identity
+COMPACT_COLUMNS = ['Device'] + [column for column in ANALYSIS_COLUMNS if column != 'Review Link'] + ['Review ID']
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = 'string[pyarrow]'
+except ImportError:
+    TEXT_DTYPE = 'string'
+
+
+def memory_usage(df):
+    """Deep memory usage of a DataFrame in bytes"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+def compact_reviews(df, columns=COMPACT_COLUMNS):
+    """
+    Return a copy of a raw export frame with only `columns`, in compact
+    dtypes. 'Review ID' is derived from 'Review Link' when requested.
+    """
+    compact = pd.DataFrame(index=df.index)
+    for column in columns:
+        if column == 'Review ID':
+            if 'Review Link' in df:
+                compact[column] = review_ids(df['Review Link']).astype(TEXT_DTYPE)
+            continue
+        if column not in df:
+            continue
+        values = df[column]
+        if column in CATEGORY_COLUMNS:
+            compact[column] = values.astype('category')
+        elif column in INTEGER_COLUMNS:
+            compact[column] = pd.to_numeric(values, errors='coerce').round().astype(INTEGER_COLUMNS[column])
+        else:
+            compact[column] = values.astype(TEXT_DTYPE)
+    return compact
+
+
+def concat_reviews(frames):
+    """Concatenate compact frames, unioning categories so they stay categorical"""
+    frames = [frame for frame in frames if len(frame.columns)]
+    if not frames:
+        return pd.DataFrame(columns=COMPACT_COLUMNS)
+    combined = pd.concat(frames, ignore_index=True)
+    for column in CATEGORY_COLUMNS:
+        if column in combined and all(column in frame for frame in frames):
+            combined[column] = union_categoricals([frame[column] for frame in frames])
+    return combined
+
+
+def load_compact(csv_files, columns=COMPACT_COLUMNS):
+    """
+    Load exports into one compact frame.
+
+    Returns (reviews, raw_bytes): `raw_bytes` is what the same rows took up
+    as decoded, before compaction, for reporting the saving.
+    """
+    frames = []
+    raw_bytes = 0
+    for file in csv_files:
+        try:
+            df = pd.read_csv(file, encoding='utf-16', dtype={'App Version Name': str})
+        except Exception as e:
+            report_error(file, e)
+            continue
+        raw_bytes += memory_usage(df)
+        frames.append(compact_reviews(df, columns))
+    return concat_reviews(frames), raw_bytes
+
+
+def memory_report(raw_bytes, reviews):
+    """One-line summary of the memory saved by compaction"""
+    compact_bytes = memory_usage(reviews)
+    ratio = raw_bytes / compact_bytes if compact_bytes else 0
+    return f"Memory: {format_bytes(raw_bytes)} -> {format_bytes(compact_bytes)} ({ratio:.1f}x smaller)"
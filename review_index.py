@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Persistent full-text inverted index over review text for ad-hoc quote search
+
+Every new question about the reviews ("half siblings", "can't see brothers")
+used to be another regex pass over every review. This index tokenizes
+`Review Text` once (lowercased \\w+ words, like review_classifier.py) and
+keeps positional postings on disk, one segment per export:
+
+    data/review_index/
+        _manifest.json                  export -> sha256, size, mtime, segment
+        segments/<sha256>/postings.npz  sorted terms, CSR postings, positions, filter fields
+        segments/<sha256>/docs.parquet  the reviews, to show the hits
+
+Re-indexing only tokenizes exports that are new or whose contents changed,
+like the review store (review_store.py --index updates both). A query runs
+against every segment with numpy set operations and ranks the hits by BM25,
+using collection statistics summed across segments.
+
+Query syntax:
+    half sibling                words are ANDed
+    "half sibling"              phrase
+    sibling OR brother          OR binds looser than AND
+    sibl*                       prefix
+    -cousin, NOT cousin         exclude
+    (brother OR sister) AND (see OR show*)
+
+Usage:
+    python review_index.py                               # index new or changed exports
+    python review_index.py --query '"half sibling"'      # top hits by BM25
+    python review_index.py --query "sibl* AND (can't OR cannot)" --rating 1-3 --language en \\
+        --since 2024-01-01 --sort date
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from keyword_taxonomy import normalize_language
+from review_loader import ANALYSIS_COLUMNS, file_sha256, has_text
+
+DEFAULT_INDEX = 'data/review_index'
+MANIFEST_NAME = '_manifest.json'
+POSTINGS_FILE = 'postings.npz'
+DOCS_FILE = 'docs.parquet'
+
+# Longer tokens (run-together text, hashes) are truncated so the term array stays compact
+MAX_TERM_LENGTH = 32
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_TOKEN = r'\w+'
+_QUERY_TOKEN = re.compile(r'"[^"]*"|[()]|-(?=\S)|[^\s()"]+')
+
+
+def tokenize(texts):
+    """(doc, position, term) arrays for a batch of texts; docs are positions in `texts`"""
+    texts = pd.Series(list(texts), dtype=object)
+    tokens = texts.fillna('').astype(str).str.lower().str.findall(_TOKEN).explode().dropna()
+    docs = tokens.index.to_numpy(dtype=np.int64)
+    positions = tokens.groupby(level=0).cumcount().to_numpy(dtype=np.int32)
+    terms = tokens.str.slice(0, MAX_TERM_LENGTH).to_numpy(dtype=object)
+    return docs, positions, terms
+
+
+def build_postings(texts):
+    """
+    Positional postings for a batch of texts: the sorted term array, CSR
+    offsets into the postings per term, each posting's doc and term
+    frequency, and every position ordered by (term, doc, position)
+    """
+    n_docs = len(texts)
+    docs, positions, tokens = tokenize(texts)
+    terms, codes = np.unique(tokens.astype(str), return_inverse=True) if len(tokens) else (np.array([], dtype='<U1'), docs)
+    order = np.lexsort((positions, docs, codes))
+    codes, docs, positions = codes[order], docs[order], positions[order]
+
+    starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (docs[1:] != docs[:-1])]) if len(codes) else docs
+    return {
+        'terms': terms,
+        'term_offsets': np.searchsorted(codes[starts], np.arange(len(terms) + 1)).astype(np.int64),
+        'posting_docs': docs[starts].astype(np.int32),
+        'posting_tf': np.diff(np.r_[starts, len(codes)]).astype(np.int32),
+        'positions': positions,
+        'doc_length': np.bincount(docs, minlength=n_docs).astype(np.int32),
+    }
+
+
+class Segment:
+    """The postings and filter fields of one indexed export; review rows are read on demand"""
+
+    def __init__(self, path):
+        self.path = path
+        with np.load(os.path.join(path, POSTINGS_FILE)) as data:
+            for name in data.files:
+                setattr(self, name, data[name])
+        self.position_offsets = np.r_[0, np.cumsum(self.posting_tf, dtype=np.int64)]
+        self._docs = None
+
+    @property
+    def n_docs(self):
+        return len(self.doc_length)
+
+    def _term_index(self, term):
+        index = np.searchsorted(self.terms, term)
+        return index if index < len(self.terms) and self.terms[index] == term else None
+
+    def _postings(self, lo, hi):
+        a, b = self.term_offsets[lo], self.term_offsets[hi]
+        return self.posting_docs[a:b], self.posting_tf[a:b]
+
+    def term(self, term):
+        """(docs, term frequencies) of a term"""
+        index = self._term_index(term)
+        if index is None:
+            return _empty_hits()
+        return self._postings(index, index + 1)
+
+    def prefix(self, prefix):
+        """(docs, summed term frequencies) of every term starting with `prefix`"""
+        lo = np.searchsorted(self.terms, prefix)
+        hi = np.searchsorted(self.terms, prefix + '\U0010ffff')
+        docs, tf = self._postings(lo, hi)
+        if hi - lo <= 1:
+            return docs, tf
+        docs, inverse = np.unique(docs, return_inverse=True)
+        return docs.astype(np.int32), np.bincount(inverse, weights=tf).astype(np.int32)
+
+    def phrase(self, words):
+        """(docs, phrase frequencies) of consecutive `words`"""
+        keys = None
+        for offset, word in enumerate(words):
+            index = self._term_index(word)
+            if index is None:
+                return _empty_hits()
+            a, b = self.term_offsets[index], self.term_offsets[index + 1]
+            docs = np.repeat(self.posting_docs[a:b].astype(np.int64), self.posting_tf[a:b])
+            positions = self.positions[self.position_offsets[a]:self.position_offsets[b]].astype(np.int64) - offset
+            # One key per (doc, phrase start); a phrase matches where every word has the same key
+            valid = positions >= 0
+            word_keys = (docs[valid] << 32) | positions[valid]
+            keys = word_keys if keys is None else np.intersect1d(keys, word_keys, assume_unique=True)
+            if not len(keys):
+                return _empty_hits()
+        docs, tf = np.unique(keys >> 32, return_counts=True)
+        return docs.astype(np.int32), tf.astype(np.int32)
+
+    def docs(self, local_ids):
+        """Review rows for local doc ids, in the given order"""
+        if self._docs is None:
+            self._docs = pd.read_parquet(os.path.join(self.path, DOCS_FILE))
+        return self._docs.iloc[local_ids]
+
+
+def _empty_hits():
+    return np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+
+
+# Query parsing: nodes are ('term', word), ('prefix', stem), ('phrase', words),
+# ('and', nodes), ('or', nodes), ('not', node) and ('all',) for a bare NOT
+
+def _leaf(text):
+    prefix = text.endswith('*')
+    words = [word[:MAX_TERM_LENGTH] for word in re.findall(_TOKEN, text.lower())]
+    if not words:
+        return None
+    if len(words) > 1:
+        return ('phrase', tuple(words))
+    return ('prefix', words[0]) if prefix else ('term', words[0])
+
+
+def parse_query(query):
+    """
+    Parse a query string into a node tree; raises ValueError on unbalanced
+    parentheses or an operator with no operand
+    """
+    tokens = _QUERY_TOKEN.findall(query)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def or_expr():
+        nodes = [and_expr()]
+        while peek() == 'OR':
+            take()
+            nodes.append(and_expr())
+        nodes = [node for node in nodes if node]
+        return nodes[0] if len(nodes) == 1 else ('or', tuple(nodes)) if nodes else None
+
+    def and_expr():
+        nodes = []
+        while peek() not in (None, ')', 'OR'):
+            if peek() == 'AND':
+                take()
+                continue
+            nodes.append(unary())
+        nodes = [node for node in nodes if node]
+        return nodes[0] if len(nodes) == 1 else ('and', tuple(nodes)) if nodes else None
+
+    def unary():
+        if peek() in ('NOT', '-'):
+            operator = take()
+            if peek() in (None, ')', 'AND', 'OR'):
+                raise ValueError(f"{operator} has no operand in query {query!r}")
+            node = unary()
+            return ('not', node) if node else None
+        token = take()
+        if token == '(':
+            node = or_expr()
+            if peek() != ')':
+                raise ValueError(f"Unbalanced parentheses in query {query!r}")
+            take()
+            return node
+        if token == ')':
+            raise ValueError(f"Unbalanced parentheses in query {query!r}")
+        if token.startswith('"'):
+            words = tuple(word[:MAX_TERM_LENGTH] for word in re.findall(_TOKEN, token.lower()))
+            return ('phrase', words) if len(words) > 1 else _leaf(token)
+        return _leaf(token)
+
+    tree = or_expr()
+    if peek() is not None:
+        raise ValueError(f"Unbalanced parentheses in query {query!r}")
+    return tree
+
+
+def query_leaves(node, negated=False):
+    """(leaf, negated) for every term, prefix and phrase in the tree"""
+    kind = node[0]
+    if kind in ('term', 'prefix', 'phrase'):
+        return [(node, negated)]
+    if kind == 'not':
+        return query_leaves(node[1], not negated)
+    return [leaf for child in node[1] for leaf in query_leaves(child, negated)]
+
+
+def evaluate(node, hits, n_docs):
+    """Sorted local doc ids matching the tree, given each leaf's (docs, tf) in the segment"""
+    kind = node[0]
+    if kind in ('term', 'prefix', 'phrase'):
+        return hits[node][0]
+    if kind == 'not':
+        return np.setdiff1d(np.arange(n_docs, dtype=np.int32), evaluate(node[1], hits, n_docs), assume_unique=True)
+    children = node[1]
+    # Intersect the positive children first, then remove the negated ones
+    if kind == 'and':
+        positive = [evaluate(child, hits, n_docs) for child in children if child[0] != 'not']
+        matched = np.arange(n_docs, dtype=np.int32) if not positive else positive[0]
+        for docs in positive[1:]:
+            matched = np.intersect1d(matched, docs, assume_unique=True)
+        for child in children:
+            if child[0] == 'not':
+                matched = np.setdiff1d(matched, evaluate(child[1], hits, n_docs), assume_unique=True)
+        return matched
+    matched = evaluate(children[0], hits, n_docs)
+    for child in children[1:]:
+        matched = np.union1d(matched, evaluate(child, hits, n_docs))
+    return matched
+
+
+def leaf_hits(segment, leaf):
+    kind, value = leaf
+    if kind == 'term':
+        return segment.term(value)
+    if kind == 'prefix':
+        return segment.prefix(value)
+    return segment.phrase(value)
+
+
+def parse_ratings(value):
+    """'1-3' or '1,2,5' -> set of star ratings"""
+    ratings = set()
+    for part in value.split(','):
+        low, _, high = part.partition('-')
+        ratings.update(range(int(low), int(high or low) + 1))
+    return ratings
+
+
+def to_millis(date):
+    return int(pd.Timestamp(date, tz='UTC').value // 1_000_000)
+
+
+class ReviewIndex:
+    """Segments of an on-disk review index, loaded once and searched together"""
+
+    def __init__(self, index_dir=DEFAULT_INDEX):
+        self.index_dir = index_dir
+        self.manifest_path = os.path.join(index_dir, MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        self._segments = None
+
+    def _segment_dir(self, checksum):
+        return os.path.join(self.index_dir, 'segments', checksum)
+
+    def save_manifest(self):
+        # Write then rename so an interrupted update never leaves a torn manifest
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def index_export(self, csv_file, checksum):
+        """Tokenize one export into a segment; returns the number of reviews with text it holds"""
+        reviews = pd.read_csv(csv_file, encoding='utf-16', usecols=ANALYSIS_COLUMNS, dtype={'App Version Name': str})
+        reviews = reviews[has_text(reviews)].reset_index(drop=True)
+
+        postings = build_postings(reviews['Review Text'])
+        languages, language_codes = np.unique(reviews['Reviewer Language'].map(normalize_language).to_numpy(dtype=str),
+                                              return_inverse=True)
+        postings.update({
+            'rating': pd.to_numeric(reviews['Star Rating'], errors='coerce').fillna(0).to_numpy(dtype=np.int8),
+            'millis': pd.to_numeric(reviews['Review Submit Millis Since Epoch'], errors='coerce')
+                        .fillna(-1).to_numpy(dtype=np.int64),
+            'languages': languages,
+            'language_codes': language_codes.astype(np.int16),
+        })
+
+        segment_dir = self._segment_dir(checksum)
+        tmp_dir = segment_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.savez(os.path.join(tmp_dir, POSTINGS_FILE), **postings)
+        reviews.to_parquet(os.path.join(tmp_dir, DOCS_FILE), index=False)
+        shutil.rmtree(segment_dir, ignore_errors=True)
+        os.replace(tmp_dir, segment_dir)
+        return len(reviews), len(postings['terms'])
+
+    def update(self, csv_files):
+        """
+        Index new or changed exports. An export is skipped when its size and
+        mtime match the manifest, or when they differ but its checksum does
+        not. Returns the list of files that were (re)indexed.
+        """
+        indexed = []
+        for csv_file in csv_files:
+            key = Path(csv_file).name
+            stat = os.stat(csv_file)
+            entry = self.manifest.get(key)
+            if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                continue
+            checksum = file_sha256(csv_file)
+            if entry and entry['sha256'] == checksum:
+                entry['mtime'] = stat.st_mtime
+                continue
+
+            try:
+                docs, terms = self.index_export(csv_file, checksum)
+            except Exception as e:
+                print(f"   Error indexing {csv_file}: {e}")
+                continue
+            self.manifest[key] = {'sha256': checksum, 'size': stat.st_size, 'mtime': stat.st_mtime,
+                                  'docs': docs, 'terms': terms}
+            indexed.append(csv_file)
+
+        self.save_manifest()
+        self.remove_orphans()
+        self._segments = None
+        return indexed
+
+    def prune(self, csv_files):
+        """Drop exports that are no longer in `csv_files`"""
+        keep = {Path(csv_file).name for csv_file in csv_files}
+        removed = [name for name in self.manifest if name not in keep]
+        for name in removed:
+            del self.manifest[name]
+        if removed:
+            self.save_manifest()
+            self.remove_orphans()
+            self._segments = None
+        return removed
+
+    def remove_orphans(self):
+        """Delete segment directories the manifest no longer points to"""
+        segments_dir = os.path.join(self.index_dir, 'segments')
+        live = {entry['sha256'] for entry in self.manifest.values()}
+        if os.path.isdir(segments_dir):
+            for name in os.listdir(segments_dir):
+                if name not in live:
+                    shutil.rmtree(os.path.join(segments_dir, name), ignore_errors=True)
+
+    @property
+    def segments(self):
+        if self._segments is None:
+            checksums = sorted({entry['sha256'] for entry in self.manifest.values()})
+            self._segments = [Segment(self._segment_dir(checksum)) for checksum in checksums]
+        return self._segments
+
+    def allowed(self, segment, ratings=None, languages=None, since=None, until=None):
+        """Boolean mask of the segment's docs that pass the filters, or None when there are none"""
+        mask = None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if ratings:
+            narrow(np.isin(segment.rating, list(ratings)))
+        if languages:
+            wanted = np.flatnonzero(np.isin(segment.languages, [normalize_language(language) for language in languages]))
+            narrow(np.isin(segment.language_codes, wanted))
+        if since is not None:
+            narrow(segment.millis >= to_millis(since))
+        if until is not None:
+            # Inclusive of the whole `until` day
+            narrow(segment.millis < to_millis(pd.Timestamp(until) + pd.Timedelta(days=1)))
+        return mask
+
+    def search(self, query, ratings=None, languages=None, since=None, until=None, limit=20, sort='score'):
+        """
+        Reviews matching `query`, filtered by star rating, language and
+        submission date (inclusive), ranked by BM25 (sort='score') or newest
+        first (sort='date'). Returns a DataFrame with a 'Score' column;
+        attrs['matches'] holds the number of matches before `limit`.
+        """
+        tree = parse_query(query)
+        if tree is None:
+            raise ValueError(f"Empty query {query!r}")
+        leaves = query_leaves(tree)
+        segments = self.segments
+
+        hits = [{leaf: leaf_hits(segment, leaf) for leaf, _ in leaves} for segment in segments]
+        n_docs = sum(segment.n_docs for segment in segments)
+        avg_length = sum(int(segment.doc_length.sum()) for segment in segments) / n_docs if n_docs else 0
+        positive = list(dict.fromkeys(leaf for leaf, negated in leaves if not negated))
+        idf = {}
+        for leaf in positive:
+            df = sum(len(segment_hits[leaf][0]) for segment_hits in hits)
+            idf[leaf] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+        segment_ids, doc_ids, scores, millis = [], [], [], []
+        for segment_num, (segment, segment_hits) in enumerate(zip(segments, hits)):
+            matched = evaluate(tree, segment_hits, segment.n_docs)
+            mask = self.allowed(segment, ratings, languages, since, until)
+            if mask is not None:
+                matched = matched[mask[matched]]
+            if not len(matched):
+                continue
+            score = np.zeros(len(matched))
+            for leaf in positive:
+                docs, tf = segment_hits[leaf]
+                where = np.searchsorted(matched, docs)
+                found = (where < len(matched)) & (matched[np.minimum(where, len(matched) - 1)] == docs)
+                docs, tf = docs[found], tf[found].astype(np.float64)
+                norm = K1 * (1 - B + B * segment.doc_length[docs] / avg_length)
+                score[where[found]] += idf[leaf] * tf * (K1 + 1) / (tf + norm)
+            segment_ids.append(np.full(len(matched), segment_num))
+            doc_ids.append(matched)
+            scores.append(score)
+            millis.append(segment.millis[matched])
+
+        if not doc_ids:
+            empty = pd.DataFrame(columns=['Score'] + ANALYSIS_COLUMNS)
+            empty.attrs['matches'] = 0
+            return empty
+        segment_ids, doc_ids = np.concatenate(segment_ids), np.concatenate(doc_ids)
+        scores, millis = np.concatenate(scores), np.concatenate(millis)
+
+        # Newest first breaks score ties; only candidates that can reach the top `limit` are sorted
+        keys = [millis] if sort == 'date' else [millis, scores]
+        candidates = np.arange(len(doc_ids))
+        if limit < len(candidates):
+            primary = keys[-1]
+            cutoff = np.partition(primary, len(primary) - limit)[len(primary) - limit]
+            candidates = np.flatnonzero(primary >= cutoff)
+        top = candidates[np.lexsort([-key[candidates] for key in keys])][:limit]
+
+        rows = [segments[segment_ids[i]].docs([doc_ids[i]]) for i in top]
+        found = pd.concat(rows, ignore_index=True)
+        found.insert(0, 'Score', scores[top].round(3))
+        found.attrs['matches'] = len(doc_ids)
+        return found
+
+
+def print_hits(hits):
+    for number, (_, row) in enumerate(hits.iterrows(), 1):
+        print(f"\n   {number}. {str(row['Review Submit Date and Time'])[:10]} | {row['Star Rating']} stars | "
+              f"{row['Reviewer Language']} | score {row['Score']:.2f}")
+        print(f"      {row['Review Text']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query the full-text review index')
+    parser.add_argument('files', nargs='*', help='Export CSVs to index (default: data/feedback/android/*.csv)')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help=f'Index directory (default: {DEFAULT_INDEX})')
+    parser.add_argument('--query', help='Search the index instead of updating it (see the query syntax above)')
+    parser.add_argument('--rating', type=parse_ratings, help="Star ratings to keep, e.g. '1-3' or '4,5'")
+    parser.add_argument('--language', action='append', help='Reviewer language to keep (repeatable), e.g. en, pt')
+    parser.add_argument('--since', help='Earliest submission date, YYYY-MM-DD')
+    parser.add_argument('--until', help='Latest submission date, YYYY-MM-DD (inclusive)')
+    parser.add_argument('--limit', type=int, default=20, help='Hits to show (default: 20)')
+    parser.add_argument('--sort', choices=['score', 'date'], default='score',
+                        help='Rank by BM25 score or show the newest first (default: score)')
+    args = parser.parse_args()
+
+    index = ReviewIndex(args.index)
+
+    if args.query:
+        start = time.perf_counter()
+        segments = index.segments
+        loaded = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        try:
+            hits = index.search(args.query, args.rating, args.language, args.since, args.until, args.limit, args.sort)
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{hits.attrs.get('matches', 0):,} matches for {args.query!r} in {elapsed:.1f} ms "
+              f"({sum(segment.n_docs for segment in segments):,} reviews with text in {len(segments)} segments, "
+              f"loaded in {loaded:.1f} ms)")
+        print_hits(hits)
+        return
+
+    csv_files = args.files or sorted(glob.glob('data/feedback/android/*.csv'))
+    print(f"Checking {len(csv_files)} CSV files against {args.index}")
+    start = time.perf_counter()
+    indexed = index.update(csv_files)
+    if not args.files:
+        for name in index.prune(csv_files):
+            print(f"   Removed {name}")
+    print(f"Indexed {len(indexed)} new or changed exports in {time.perf_counter() - start:.2f}s")
+    for csv_file in indexed:
+        entry = index.manifest[Path(csv_file).name]
+        print(f"   {csv_file}: {entry['docs']:,} reviews, {entry['terms']:,} terms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Streaming loader for Google Play Console review exports
+
+Play Console exports are UTF-16 CSVs, one file per month. Instead of reading
+every file into memory and concatenating them, `iter_review_chunks` yields
+fixed-size chunks across all files and `ReviewStats` accumulates the counts
+the analysis reports, so peak memory depends on the chunk size rather than on
+how many monthly files there are.
+
+`scan_exports_parallel` spreads the per-file decoding and keyword matching
+across a process pool and merges the partial results in file order.
+"""
+
+import hashlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from keyword_taxonomy import LanguageIndex
+from review_trends import combine_counts, daily_counts, empty_counts, mention_counts
+
+# Header of a Play Console review export
+EXPORT_COLUMNS = [
+    'Package Name', 'App Version Code', 'App Version Name', 'Reviewer Language', 'Device',
+    'Review Submit Date and Time', 'Review Submit Millis Since Epoch',
+    'Review Last Update Date and Time', 'Review Last Update Millis Since Epoch',
+    'Star Rating', 'Review Title', 'Review Text',
+    'Developer Reply Date and Time', 'Developer Reply Millis Since Epoch', 'Developer Reply Text',
+    'Review Link',
+]
+
+# Columns read by the analysis scripts and by the downstream notebooks;
+# 'Review Link' carries the review's id (see review_ids)
+ANALYSIS_COLUMNS = [
+    'Package Name',
+    'App Version Name',
+    'Reviewer Language',
+    'Review Submit Date and Time',
+    'Review Submit Millis Since Epoch',
+    'Star Rating',
+    'Review Text',
+    'Review Link',
+]
+
+# Columns of the sibling mentions CSV, whichever analysis mode or script wrote it
+MENTION_COLUMNS = (
+    ['Review ID', 'Review Source']
+    + [column for column in ANALYSIS_COLUMNS if column != 'Review Link']
+    + ['Matched Keywords', 'Duplicate Cluster']
+)
+# Types to read it back with, so version names and App Store review ids stay strings
+MENTION_DTYPES = {'App Version Name': str, 'Review ID': str}
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def review_ids(links):
+    """`reviewId` of each Play Console `Review Link`"""
+    return links.str.extract(r'reviewId=([^&]+)', expand=False)
+
+
+def mention_rows(mentions, source='play_console'):
+    """
+    Matched rows in MENTION_COLUMNS: the 'Review ID' is taken from the
+    'Review Link' when the rows have none, rows without a 'Review Source'
+    are Play Console reviews, and columns a mode does not produce (such as
+    'Duplicate Cluster' without --dedup) are left empty
+    """
+    derived = {}
+    if 'Review ID' not in mentions:
+        derived['Review ID'] = review_ids(mentions['Review Link']) if 'Review Link' in mentions else pd.NA
+    if 'Review Source' not in mentions:
+        derived['Review Source'] = source
+    return mentions.assign(**derived).reindex(columns=MENTION_COLUMNS)
+
+
+def report_error(file, error):
+    print(f"   Error loading {file}: {error}")
+
+
+def iter_review_chunks(csv_files, chunksize=DEFAULT_CHUNKSIZE, usecols=ANALYSIS_COLUMNS, on_error=report_error):
+    """
+    Yield DataFrames of exactly `chunksize` rows (the last one may be shorter)
+    read across all `csv_files` in order.
+
+    Files that fail to decode are passed to `on_error` and skipped; by default
+    they are reported like the batch loader does.
+    """
+    pending = []
+    pending_rows = 0
+
+    for file in csv_files:
+        try:
+            reader = pd.read_csv(file, encoding='utf-16', usecols=usecols, chunksize=chunksize,
+                                 dtype={'App Version Name': str})
+            for chunk in reader:
+                pending.append(chunk)
+                pending_rows += len(chunk)
+                while pending_rows >= chunksize:
+                    buffered = pd.concat(pending, ignore_index=True)
+                    yield buffered.iloc[:chunksize]
+                    remainder = buffered.iloc[chunksize:]
+                    pending = [remainder] if len(remainder) else []
+                    pending_rows = len(remainder)
+        except Exception as e:
+            on_error(file, e)
+
+    if pending_rows:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def has_text(reviews):
+    """Boolean mask of reviews with non-blank review text"""
+    text = reviews['Review Text']
+    # pandas reads a column with no text at all as float64, which has no .str accessor
+    return (text.notna() & (text.astype('string').str.strip() != '')).astype(bool)
+
+
+class ReviewStats:
+    """Running totals for the review statistics section of the analysis"""
+
+    def __init__(self):
+        self.total = 0
+        self.text_present = 0
+        self.with_text = 0
+        self.mentions = 0
+        self.languages = Counter()
+        # Daily counts per app version (see review_trends.py)
+        self.trends = empty_counts()
+
+    @property
+    def text_missing(self):
+        return self.total - self.text_present
+
+    def update(self, chunk, text_mask=None, mention_mask=None):
+        """
+        Fold one chunk of reviews into the running totals. The daily trend
+        counts are only kept when `mention_mask` is given.
+        """
+        if text_mask is None:
+            text_mask = has_text(chunk)
+        self.total += len(chunk)
+        self.text_present += int(chunk['Review Text'].notna().sum())
+        self.with_text += int(text_mask.sum())
+        self.languages.update(chunk['Reviewer Language'].dropna().to_numpy())
+        if mention_mask is not None:
+            self.mentions += int(mention_mask.sum())
+            self.trends = combine_counts(self.trends, daily_counts(chunk, text_mask, mention_mask))
+
+    def recount_mentions(self, mentions):
+        """Replace the mention counts after `mentions` was re-filtered"""
+        self.mentions = len(mentions)
+        trends = self.trends.drop(columns='mentions').merge(
+            mention_counts(mentions), on=['day', 'version'], how='left')
+        trends['mentions'] = trends['mentions'].fillna(0).astype('int64')
+        self.trends = trends[self.trends.columns]
+
+    def merge(self, other):
+        """Add another ReviewStats' totals into this one"""
+        self.total += other.total
+        self.text_present += other.text_present
+        self.with_text += other.with_text
+        self.mentions += other.mentions
+        self.languages.update(other.languages)
+        self.trends = combine_counts(self.trends, other.trends)
+        return self
+
+    def top_languages(self, n=10):
+        return self.languages.most_common(n)
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'text_present': self.text_present,
+            'with_text': self.with_text,
+            'mentions': self.mentions,
+            'languages': dict(self.languages),
+            'trends': self.trends.to_dict(orient='list'),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data['total']
+        stats.text_present = data['text_present']
+        stats.with_text = data['with_text']
+        stats.mentions = data['mentions']
+        stats.languages = Counter(data['languages'])
+        if data.get('trends'):
+            stats.trends = pd.DataFrame(data['trends']).astype(stats.trends.dtypes.to_dict())
+        return stats
+
+
+# Matcher for the current worker process, built once by _init_worker
+_worker_matcher = None
+
+
+def _init_worker(taxonomy):
+    global _worker_matcher
+    _worker_matcher = LanguageIndex(taxonomy)
+
+
+def scan_export(csv_file, chunksize=DEFAULT_CHUNKSIZE, usecols=ANALYSIS_COLUMNS, matcher=None):
+    """
+    Decode and search one export file.
+
+    Returns (stats, mentions, errors) where `mentions` holds the matching
+    rows and `errors` lists (file, message) pairs for decode failures. A
+    file that fails while it is searched is reported in `errors` too, with
+    empty stats and no mentions, so one bad export does not abort a pool.
+    """
+    matcher = matcher or _worker_matcher
+    stats = ReviewStats()
+    mentions = []
+    errors = []
+
+    chunks = iter_review_chunks([csv_file], chunksize=chunksize, usecols=usecols,
+                                on_error=lambda file, e: errors.append((file, str(e))))
+    try:
+        for chunk in chunks:
+            text_mask = has_text(chunk)
+            chunk_mentions = matcher.filter_reviews(chunk[text_mask])
+            stats.update(chunk, text_mask, chunk.index.isin(chunk_mentions.index))
+            mentions.append(chunk_mentions)
+    except Exception as e:
+        return ReviewStats(), None, errors + [(csv_file, str(e))]
+
+    mentions = pd.concat(mentions, ignore_index=True) if mentions else None
+    return stats, mentions, errors
+
+
+def scan_exports_parallel(csv_files, taxonomy, workers=None, chunksize=DEFAULT_CHUNKSIZE, usecols=ANALYSIS_COLUMNS):
+    """
+    Decode and search exports for the `taxonomy` keywords (see
+    keyword_taxonomy.py) across a pool of `workers` processes (default: one
+    per CPU), one file per task.
+
+    Partial results are merged in `csv_files` order, so counts, language
+    rankings and the order of matched rows do not depend on which worker
+    finishes first. Returns (stats, mentions).
+    """
+    stats = ReviewStats()
+    mentions = []
+
+    for csv_file, file_stats, file_mentions, errors in iter_scan_results(csv_files, taxonomy, workers, chunksize, usecols):
+        for file, error in errors:
+            report_error(file, error)
+        stats.merge(file_stats)
+        if file_mentions is not None:
+            mentions.append(file_mentions)
+
+    mentions = pd.concat(mentions, ignore_index=True) if mentions else pd.DataFrame(columns=usecols)
+    return stats, mentions
+
+
+def iter_scan_results(csv_files, taxonomy, workers=None, chunksize=DEFAULT_CHUNKSIZE, usecols=ANALYSIS_COLUMNS):
+    """
+    Run scan_export over `csv_files` in a process pool, yielding
+    (csv_file, stats, mentions, errors) per file in `csv_files` order
+    """
+    if not csv_files:
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(taxonomy,)) as pool:
+        results = pool.map(partial(scan_export, chunksize=chunksize, usecols=usecols), csv_files)
+        for csv_file, (stats, mentions, errors) in zip(csv_files, results):
+            yield csv_file, stats, mentions, errors
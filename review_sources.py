@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Source adapters for review exports from every store, and sharded scanning
+
+Each adapter reads one export format into chunks with the shared review
+schema, `SHARED_COLUMNS`: the Play Console analysis columns with the app
+(`Package Name`), plus the source and the store's review id in place of the
+Play Console review link, so keyword matching, ReviewStats and the trend
+counts work the same on every source.
+
+    play_console      Google Play Console CSV (UTF-16, or re-saved as UTF-8), any Package Name
+    app_store_csv     App Store Connect ratings and reviews CSV
+    app_store_json    App Store Connect API customerReviews responses (one page, or a list of pages)
+
+App Store reviews have no reviewer language, so it is taken from the
+storefront territory (USA -> en, BRA -> pt, ...). A title is joined to the
+review body, as App Store reviewers often put the request in the title. The
+app is the export's App ID / bundle column if it has one, the app id in the
+API response's links, or else the export's folder:
+
+    data/feedback/android/reviews_reviews_org.familysearch.mobile_202301.csv
+    data/feedback/ios/<app id>/reviews_2025-01.json
+
+`scan_shards` decodes and matches every export in a process pool, one task
+per file, and splits each file's results by (source, app) shard. Shards are
+merged from their per-file ReviewStats, and platform and overall counts from
+the per-shard ReviewStats: a merge of small additive aggregates rather than
+one concatenated frame of every review.
+
+Usage:
+    python review_sources.py                       # every export under data/feedback
+    python review_sources.py data/feedback/ios --workers 4
+"""
+
+import argparse
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from keyword_taxonomy import SIBLING_TAXONOMY
+from review_loader import ANALYSIS_COLUMNS, DEFAULT_CHUNKSIZE, ReviewStats, _init_worker, has_text, review_ids
+
+DEFAULT_ROOT = 'data/feedback'
+SHARED_COLUMNS = ['Review Source', 'Review ID'] + [column for column in ANALYSIS_COLUMNS if column != 'Review Link']
+
+# Storefront territories (ISO 3166 alpha-3, as the App Store Connect API reports them, or alpha-2)
+# of the taxonomy languages; other territories are matched against the English keywords
+TERRITORY_LANGUAGES = {
+    'en': ['USA', 'GBR', 'CAN', 'AUS', 'NZL', 'IRL', 'ZAF', 'PHL', 'US', 'GB', 'CA', 'AU', 'NZ', 'IE', 'ZA', 'PH'],
+    'es': ['MEX', 'ESP', 'ARG', 'COL', 'CHL', 'PER', 'ECU', 'GTM', 'MX', 'ES', 'AR', 'CO', 'CL', 'PE', 'EC', 'GT'],
+    'pt': ['BRA', 'PRT', 'BR', 'PT'],
+    'fr': ['FRA', 'BEL', 'FR', 'BE'],
+    'de': ['DEU', 'AUT', 'CHE', 'DE', 'AT', 'CH'],
+    'it': ['ITA', 'IT'],
+    'nl': ['NLD', 'NL'],
+}
+_TERRITORY_LANGUAGE = {territory: language for language, territories in TERRITORY_LANGUAGES.items()
+                       for territory in territories}
+
+# App Store column names, by the shared column they fill
+APP_STORE_ALIASES = {
+    'Package Name': ['App ID', 'App Apple ID', 'Apple ID', 'Bundle ID', 'appId'],
+    'Review ID': ['Review ID', 'Review Id', 'ID', 'id'],
+    'App Version Name': ['Version', 'App Version', 'App Version Name', 'version'],
+    'Review Submit Date and Time': ['Date', 'Created Date', 'Review Date', 'createdDate', 'date'],
+    'Star Rating': ['Rating', 'Stars', 'Star Rating', 'rating'],
+    'Review Title': ['Title', 'Review Title', 'title'],
+    'Review Text': ['Review', 'Body', 'Content', 'Review Text', 'body'],
+    'Territory': ['Territory', 'Country', 'Country or Region', 'Storefront', 'territory'],
+}
+
+_PLAY_FILE = re.compile(r'^reviews_reviews_(.+)_\d{6}$')
+_APP_STORE_APP = re.compile(r'/apps/(\d+)/')
+
+
+def _read_head(path, size=4096):
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+
+def _header(head):
+    """Column names on the first line of a CSV, from its first bytes"""
+    if head.startswith((b'\xff\xfe', b'\xfe\xff')):
+        text = head.decode('utf-16', errors='ignore')
+    else:
+        text = head.decode('utf-8-sig', errors='ignore')
+    first_line = text.splitlines()[0] if text else ''
+    return [column.strip().strip('"') for column in first_line.split(',')]
+
+
+def _first_column(frame, aliases):
+    return next((alias for alias in aliases if alias in frame.columns), None)
+
+
+class ReviewSource:
+    """Reads one export format into DataFrame chunks with SHARED_COLUMNS"""
+
+    name = None
+    platform = None
+
+    def detect(self, path, head):
+        """Whether this source reads `path`, given its first bytes"""
+        raise NotImplementedError
+
+    def read_chunks(self, path, chunksize=DEFAULT_CHUNKSIZE):
+        raise NotImplementedError
+
+
+class PlayConsoleSource(ReviewSource):
+    """Google Play Console review exports"""
+
+    name = 'play_console'
+    platform = 'android'
+
+    def detect(self, path, head):
+        header = _header(head)
+        return path.endswith('.csv') and 'Package Name' in header and 'Review Text' in header
+
+    def read_chunks(self, path, chunksize=DEFAULT_CHUNKSIZE):
+        encoding = 'utf-16' if _read_head(path, 2) in (b'\xff\xfe', b'\xfe\xff') else 'utf-8-sig'
+        reader = pd.read_csv(path, encoding=encoding, usecols=ANALYSIS_COLUMNS,
+                             chunksize=chunksize, dtype={'App Version Name': str})
+        package = self.package(path)
+        for chunk in reader:
+            chunk['Package Name'] = chunk['Package Name'].fillna(package)
+            chunk['Review ID'] = review_ids(chunk['Review Link'])
+            chunk.insert(0, 'Review Source', self.name)
+            yield chunk[SHARED_COLUMNS]
+
+    def package(self, path):
+        """The package in the file name, reviews_reviews_<package>_<yyyymm>.csv, or 'unknown'"""
+        named = _PLAY_FILE.match(Path(path).stem)
+        return named.group(1) if named else 'unknown'
+
+
+class AppStoreSource(ReviewSource):
+    """Shared normalization of App Store Connect reviews"""
+
+    platform = 'ios'
+
+    def normalize(self, frame, app):
+        columns = {target: _first_column(frame, aliases) for target, aliases in APP_STORE_ALIASES.items()}
+        if columns['Review Text'] is None and columns['Review Title'] is None:
+            raise ValueError(f"No review text column; expected one of {APP_STORE_ALIASES['Review Text']}")
+
+        def column(target, default=None):
+            source = columns[target]
+            return frame[source] if source else pd.Series(default, index=frame.index, dtype=object)
+
+        title = column('Review Title').fillna('').astype(str).str.strip()
+        body = column('Review Text').fillna('').astype(str).str.strip()
+        text = (title + '. ' + body).where((title != '') & (body != ''), title + body)
+
+        submitted = pd.to_datetime(column('Review Submit Date and Time'), errors='coerce', utc=True, format='mixed')
+        millis = ((submitted - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)).astype('Int64')
+        territory = column('Territory').fillna('').astype(str).str.upper()
+        reviews = pd.DataFrame({
+            'Review Source': self.name,
+            'Review ID': column('Review ID').astype(object),
+            'Package Name': column('Package Name', app).fillna(app).astype(str),
+            'App Version Name': column('App Version Name').astype(object),
+            'Reviewer Language': territory.map(_TERRITORY_LANGUAGE).astype(object),
+            'Review Submit Date and Time': submitted.dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'Review Submit Millis Since Epoch': millis,
+            'Star Rating': pd.to_numeric(column('Star Rating'), errors='coerce'),
+            'Review Text': text.where(text != '', None),
+        }, index=frame.index)
+        return reviews[SHARED_COLUMNS].reset_index(drop=True)
+
+
+class AppStoreCsvSource(AppStoreSource):
+    """App Store Connect ratings and reviews CSV exports"""
+
+    name = 'app_store_csv'
+
+    def detect(self, path, head):
+        header = _header(head)
+        return (path.endswith('.csv') and 'Package Name' not in header
+                and any(alias in header for alias in APP_STORE_ALIASES['Review Text'])
+                and any(alias in header for alias in APP_STORE_ALIASES['Star Rating']))
+
+    def read_chunks(self, path, chunksize=DEFAULT_CHUNKSIZE):
+        app = Path(path).parent.name
+        for chunk in pd.read_csv(path, encoding='utf-8-sig', chunksize=chunksize, dtype=str):
+            yield self.normalize(chunk, app)
+
+
+class AppStoreJsonSource(AppStoreSource):
+    """App Store Connect API customerReviews responses, as saved pages"""
+
+    name = 'app_store_json'
+
+    def detect(self, path, head):
+        return path.endswith('.json') and b'customerReviews' in head
+
+    def read_chunks(self, path, chunksize=DEFAULT_CHUNKSIZE):
+        with open(path, encoding='utf-8') as f:
+            pages = json.load(f)
+        pages = pages if isinstance(pages, list) else [pages]
+
+        app = Path(path).parent.name
+        records = []
+        for page in pages:
+            match = _APP_STORE_APP.search(str(page.get('links', {}).get('self', '')))
+            page_app = match.group(1) if match else app
+            for item in page.get('data', []):
+                records.append({'appId': page_app, 'id': item.get('id'), **item.get('attributes', {})})
+
+        frame = pd.DataFrame.from_records(records)
+        for start in range(0, len(frame), chunksize):
+            yield self.normalize(frame.iloc[start:start + chunksize], app)
+
+
+SOURCES = [PlayConsoleSource(), AppStoreCsvSource(), AppStoreJsonSource()]
+
+
+def register_source(source):
+    """Add an adapter; sources registered later are tried first"""
+    SOURCES.insert(0, source)
+
+
+def detect_source(path):
+    """The adapter that reads `path`, or None"""
+    head = _read_head(path)
+    return next((source for source in SOURCES if source.detect(str(path), head)), None)
+
+
+def source_by_name(name):
+    return next(source for source in SOURCES if source.name == name)
+
+
+def find_exports(root=DEFAULT_ROOT):
+    """(path, source name) for every export under `root` that an adapter reads, in path order"""
+    exports = []
+    for path in sorted(str(path) for path in Path(root).rglob('*') if path.suffix in ('.csv', '.json')):
+        source = detect_source(path)
+        if source is None:
+            print(f"   Skipping {path}: not a known review export")
+            continue
+        exports.append((path, source.name))
+    return exports
+
+
+def scan_source_file(export, chunksize=DEFAULT_CHUNKSIZE, matcher=None):
+    """
+    Decode and search one export, splitting its results by app.
+
+    Returns ({(source, app): (stats, mentions)}, errors) for one (path,
+    source name) export; runs in a worker process with its matcher.
+    """
+    from review_loader import _worker_matcher
+
+    path, source_name = export
+    matcher = matcher or _worker_matcher
+    partials = {}
+    try:
+        for chunk in source_by_name(source_name).read_chunks(path, chunksize):
+            for app, rows in chunk.groupby('Package Name', sort=False):
+                text_mask = has_text(rows)
+                mentions = matcher.filter_reviews(rows[text_mask])
+                stats, found = partials.get((source_name, app), (ReviewStats(), []))
+                stats.update(rows, text_mask, rows.index.isin(mentions.index))
+                found.append(mentions)
+                partials[(source_name, app)] = (stats, found)
+    except Exception as e:
+        return {}, [(path, str(e))]
+    return {shard: (stats, pd.concat(found, ignore_index=True)) for shard, (stats, found) in partials.items()}, []
+
+
+class Shard:
+    """Aggregated results of one (source, app) shard"""
+
+    def __init__(self, source, app):
+        self.source = source
+        self.app = app
+        self.platform = source_by_name(source).platform
+        self.files = []
+        self.stats = ReviewStats()
+        self.mentions = []
+
+    def add(self, path, stats, mentions):
+        self.files.append(path)
+        self.stats.merge(stats)
+        self.mentions.append(mentions)
+
+    def mention_rows(self):
+        return pd.concat(self.mentions, ignore_index=True) if self.mentions else pd.DataFrame(columns=SHARED_COLUMNS)
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'platform': self.platform,
+            'app': self.app,
+            'files': len(self.files),
+            'total_reviews': self.stats.total,
+            'reviews_with_text': self.stats.with_text,
+            'sibling_mentions': self.stats.mentions,
+        }
+
+
+def scan_shards(exports, taxonomy=SIBLING_TAXONOMY, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Decode and search (path, source name) exports across a pool of
+    `workers` processes, one file per task, and aggregate the results per
+    (source, app) shard, merging in export order. Returns ({(source, app):
+    Shard}, errors).
+    """
+    shards = {}
+    errors = []
+    if not exports:
+        return shards, errors
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(taxonomy,)) as pool:
+        results = pool.map(partial(scan_source_file, chunksize=chunksize), exports)
+        for (path, _), (partials, file_errors) in zip(exports, results):
+            errors.extend(file_errors)
+            for (source, app), (stats, mentions) in partials.items():
+                if (source, app) not in shards:
+                    shards[(source, app)] = Shard(source, app)
+                shards[(source, app)].add(path, stats, mentions)
+    return shards, errors
+
+
+def merge_shards(shards):
+    """(overall ReviewStats, {platform: ReviewStats}) from per-shard aggregates"""
+    overall = ReviewStats()
+    platforms = {}
+    for shard in shards.values():
+        overall.merge(shard.stats)
+        platforms.setdefault(shard.platform, ReviewStats()).merge(shard.stats)
+    return overall, platforms
+
+
+def count_summary(stats):
+    return {'total_reviews': stats.total, 'reviews_with_text': stats.with_text, 'sibling_mentions': stats.mentions}
+
+
+def print_shards(shards, platforms):
+    print(f"\n   {'source':<16} {'app':<32} {'files':>6} {'reviews':>10} {'with text':>10} {'mentions':>9}")
+    for shard in shards.values():
+        row = shard.to_dict()
+        print(f"   {row['source']:<16} {row['app']:<32} {row['files']:>6} {row['total_reviews']:>10,} "
+              f"{row['reviews_with_text']:>10,} {row['sibling_mentions']:>9,}")
+    for platform, stats in sorted(platforms.items()):
+        rate = stats.mentions / stats.with_text * 100 if stats.with_text else 0
+        print(f"   {platform}: {stats.total:,} reviews, {stats.with_text:,} with text, "
+              f"{stats.mentions:,} mentions ({rate:.2f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan review exports from every source, sharded by source and app')
+    parser.add_argument('root', nargs='?', default=DEFAULT_ROOT,
+                        help=f'Folder searched recursively for exports (default: {DEFAULT_ROOT})')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f'Rows per chunk (default: {DEFAULT_CHUNKSIZE:,})')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Review Sources")
+    print("=" * 80)
+    exports = find_exports(args.root)
+    print(f"   Found {len(exports)} exports under {args.root}")
+    shards, errors = scan_shards(exports, workers=args.workers, chunksize=args.chunksize)
+    for path, error in errors:
+        print(f"   Error loading {path}: {error}")
+    print_shards(shards, merge_shards(shards)[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Columnar Parquet store for Google Play Console review exports
+
+Decoding the UTF-16 CSV exports dominates every analysis run, so the exports
+are ingested once into typed, zstd-compressed Parquet files partitioned by
+submission month:
+
+    data/review_store/
+        _manifest.json
+        month=2023-01/reviews_reviews_org.familysearch.mobile_202301.parquet
+        ...
+
+The manifest records each export's size, mtime and SHA-256, so re-ingesting
+only decodes exports that are new or whose contents changed. Readers select
+just the columns and months they need.
+
+Usage:
+    python review_store.py                      # ingest data/feedback/android/*.csv
+    python review_store.py --store DIR FILE...  # ingest specific exports
+    python review_store.py --index              # and update the full-text index (review_index.py)
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from review_loader import file_sha256
+
+DEFAULT_STORE = 'data/review_store'
+MANIFEST_NAME = '_manifest.json'
+
+# Play Console export columns and the types they are stored as
+REVIEW_SCHEMA = {
+    'Package Name': 'string',
+    'App Version Code': 'Int64',
+    'App Version Name': 'string',
+    'Reviewer Language': 'string',
+    'Device': 'string',
+    'Review Submit Date and Time': 'string',
+    'Review Submit Millis Since Epoch': 'Int64',
+    'Review Last Update Date and Time': 'string',
+    'Review Last Update Millis Since Epoch': 'Int64',
+    'Star Rating': 'Int8',
+    'Review Title': 'string',
+    'Review Text': 'string',
+    'Developer Reply Date and Time': 'string',
+    'Developer Reply Millis Since Epoch': 'Int64',
+    'Developer Reply Text': 'string',
+    'Review Link': 'string',
+}
+
+
+def load_manifest(store_dir):
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(store_dir, manifest):
+    # Write then rename so an interrupted ingest never leaves a torn manifest
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def normalize_reviews(df):
+    """Cast a raw export DataFrame to the store's column types"""
+    df = df.reindex(columns=list(REVIEW_SCHEMA))
+    for column, dtype in REVIEW_SCHEMA.items():
+        if dtype in ('Int64', 'Int8'):
+            df[column] = pd.to_numeric(df[column], errors='coerce').round().astype(dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def review_months(df):
+    """YYYY-MM partition key for each review, from its submission time"""
+    submitted = pd.to_datetime(df['Review Submit Millis Since Epoch'], unit='ms', utc=True)
+    return submitted.dt.strftime('%Y-%m').fillna('unknown')
+
+
+def write_export(store_dir, csv_file):
+    """Decode one export and write its rows into the month partitions"""
+    df = normalize_reviews(pd.read_csv(csv_file, encoding='utf-16'))
+    stem = Path(csv_file).stem
+    parts = []
+    for month, rows in df.groupby(review_months(df), sort=True):
+        part_dir = os.path.join(store_dir, f'month={month}')
+        os.makedirs(part_dir, exist_ok=True)
+        part_path = os.path.join(part_dir, f'{stem}.parquet')
+        table = pa.Table.from_pandas(rows, preserve_index=False)
+        pq.write_table(table, part_path, compression='zstd')
+        parts.append(os.path.relpath(part_path, store_dir))
+    return len(df), parts
+
+
+def remove_parts(store_dir, parts):
+    for part in parts:
+        part_path = os.path.join(store_dir, part)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        part_dir = os.path.dirname(part_path)
+        if os.path.isdir(part_dir) and not os.listdir(part_dir):
+            shutil.rmtree(part_dir)
+
+
+def ingest(csv_files, store_dir=DEFAULT_STORE):
+    """
+    Add new or changed exports to the store.
+
+    An export is skipped when its size and mtime match the manifest, or when
+    they differ but its checksum does not. Returns the list of files that
+    were (re)ingested.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = load_manifest(store_dir)
+    ingested = []
+
+    for csv_file in csv_files:
+        key = Path(csv_file).name
+        stat = os.stat(csv_file)
+        entry = manifest.get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            continue
+
+        checksum = file_sha256(csv_file)
+        if entry and entry['sha256'] == checksum:
+            entry['mtime'] = stat.st_mtime
+            continue
+
+        try:
+            if entry:
+                remove_parts(store_dir, entry['parts'])
+            rows, parts = write_export(store_dir, csv_file)
+        except Exception as e:
+            print(f"   Error loading {csv_file}: {e}")
+            manifest.pop(key, None)
+            continue
+
+        manifest[key] = {
+            'sha256': checksum,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'rows': rows,
+            'parts': parts,
+        }
+        ingested.append(csv_file)
+
+    save_manifest(store_dir, manifest)
+    return ingested
+
+
+def _dataset(store_dir):
+    return ds.dataset(store_dir, format='parquet', partitioning='hive',
+                      exclude_invalid_files=True, ignore_prefixes=['_', '.'])
+
+
+def _month_filter(months):
+    return ds.field('month').isin(list(months)) if months else None
+
+
+def read_reviews(store_dir=DEFAULT_STORE, columns=None, months=None):
+    """
+    Load reviews from the store as a DataFrame, reading only `columns`
+    (default: all export columns) from the `months` partitions (default: all)
+    """
+    table = _dataset(store_dir).to_table(columns=columns or list(REVIEW_SCHEMA),
+                                         filter=_month_filter(months))
+    return table.to_pandas()
+
+
+def iter_store_chunks(store_dir=DEFAULT_STORE, columns=None, months=None, chunksize=50_000):
+    """Stream reviews from the store as DataFrames of at most `chunksize` rows"""
+    scanner = _dataset(store_dir).scanner(columns=columns or list(REVIEW_SCHEMA),
+                                          filter=_month_filter(months), batch_size=chunksize)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest Play Console exports into the Parquet review store')
+    parser.add_argument('files', nargs='*', help='Export CSVs (default: data/feedback/android/*.csv)')
+    parser.add_argument('--store', default=DEFAULT_STORE, help=f'Store directory (default: {DEFAULT_STORE})')
+    parser.add_argument('--index', action='store_true',
+                        help='Also bring the full-text review index up to date (see review_index.py)')
+    args = parser.parse_args()
+
+    csv_files = args.files or sorted(glob.glob('data/feedback/android/*.csv'))
+    print(f"Checking {len(csv_files)} CSV files against {args.store}")
+    ingested = ingest(csv_files, args.store)
+    print(f"Ingested {len(ingested)} new or changed exports")
+    for csv_file in ingested:
+        print(f"   {csv_file}")
+
+    if args.index:
+        from review_index import ReviewIndex
+
+        indexed = ReviewIndex().update(csv_files)
+        print(f"Indexed {len(indexed)} new or changed exports for full-text search")
+
+
+if __name__ == "__main__":
+    main()
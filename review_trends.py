@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Vectorized time series of review volume, sibling-mention rate and ratings
+
+Reviews are reduced to additive daily counts per `App Version Name`, keyed
+on `Review Submit Millis Since Epoch` as int64 days since the epoch:
+
+    day, version -> reviews, with_text, mentions, rating_sum, rated, stars_1 .. stars_5
+
+Because the counts are additive, partial tables from chunks, worker
+processes or cached files combine with a single group-by sum, and daily,
+weekly or monthly trends (overall or per version), rolling mention rates and
+lifetime per-version totals are re-aggregations of that small table rather
+than passes over the reviews.
+"""
+
+import numpy as np
+import pandas as pd
+
+MILLIS_PER_DAY = 86_400_000
+STAR_COLUMNS = [f'stars_{stars}' for stars in range(1, 6)]
+COUNT_COLUMNS = ['reviews', 'with_text', 'mentions', 'rating_sum', 'rated'] + STAR_COLUMNS
+KEY_COLUMNS = ['day', 'version']
+
+FREQUENCIES = {'day': 'D', 'week': 'W', 'month': 'M'}
+
+
+def empty_counts():
+    columns = {column: pd.Series(dtype='int64') for column in KEY_COLUMNS + COUNT_COLUMNS}
+    columns['version'] = pd.Series(dtype=object)
+    return pd.DataFrame(columns)
+
+
+def daily_counts(reviews, text_mask, mention_mask):
+    """
+    Daily counts per app version for one batch of reviews.
+
+    `text_mask` and `mention_mask` are boolean arrays aligned with `reviews`
+    marking reviews with text content and sibling mentions.
+    """
+    millis = pd.to_numeric(reviews['Review Submit Millis Since Epoch'], errors='coerce').to_numpy(dtype='float64')
+    valid = ~np.isnan(millis)
+    if not valid.any():
+        return empty_counts()
+
+    ratings = pd.to_numeric(reviews['Star Rating'], errors='coerce').to_numpy(dtype='float64')[valid]
+    rated = ~np.isnan(ratings)
+    days = (millis[valid] // MILLIS_PER_DAY).astype('int64')
+    version_codes, versions = pd.factorize(reviews['App Version Name'])
+    version_codes = version_codes[valid]
+    versions = np.append(np.asarray(versions, dtype=object), 'Unknown')
+    version_codes[version_codes < 0] = len(versions) - 1
+
+    # One int64 key per (day, version) pair, then a bincount per column
+    keys = (days - days.min()) * len(versions) + version_codes
+    groups, group_keys = pd.factorize(keys)
+    n_groups = len(group_keys)
+
+    def total(weights):
+        return np.bincount(groups, weights=weights, minlength=n_groups).astype('int64')
+
+    columns = {
+        'day': group_keys // len(versions) + days.min(),
+        'version': versions[group_keys % len(versions)],
+        'reviews': np.bincount(groups, minlength=n_groups).astype('int64'),
+        'with_text': total(np.asarray(text_mask, dtype=bool)[valid]),
+        'mentions': total(np.asarray(mention_mask, dtype=bool)[valid]),
+        'rating_sum': total(np.where(rated, ratings, 0)),
+        'rated': total(rated),
+    }
+    for stars, column in enumerate(STAR_COLUMNS, 1):
+        columns[column] = total(ratings == stars)
+    return pd.DataFrame(columns)
+
+
+def combine_counts(*tables):
+    """Sum several daily count tables into one"""
+    tables = [table for table in tables if table is not None and len(table)]
+    if not tables:
+        return empty_counts()
+    return pd.concat(tables, ignore_index=True).groupby(KEY_COLUMNS, as_index=False).sum()
+
+
+def mention_counts(mentions):
+    """Daily mention counts per app version for a frame of matched reviews"""
+    mask = np.ones(len(mentions), dtype=bool)
+    counts = daily_counts(mentions, mask, mask)
+    return counts[KEY_COLUMNS + ['mentions']]
+
+
+def period_start(days, freq):
+    """First day of the day/week/month period containing each epoch day"""
+    dates = days.to_numpy(dtype='int64').astype('datetime64[D]')
+    if freq == 'D':
+        return dates
+    if freq == 'W':
+        # Epoch day 0 was a Thursday; weeks start on Monday
+        return ((days.to_numpy(dtype='int64') + 3) // 7 * 7 - 3).astype('datetime64[D]')
+    if freq == 'M':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"Unknown frequency {freq!r}; expected one of {list(FREQUENCIES.values())}")
+
+
+def _with_rates(table, window, by=None):
+    table['mention_rate'] = table['mentions'] / table['with_text'].where(table['with_text'] > 0)
+    table['mean_rating'] = table['rating_sum'] / table['rated'].where(table['rated'] > 0)
+    if window:
+        sums = table[['mentions', 'with_text']]
+        if by is None:
+            rolling = sums.rolling(window, min_periods=1).sum()
+        else:
+            # Rows are sorted by `by` then period, so each group's window only spans its own periods
+            rolling = sums.groupby(table[by], sort=False).rolling(window, min_periods=1).sum().droplevel(0)
+        table['rolling_mention_rate'] = rolling['mentions'] / rolling['with_text'].where(rolling['with_text'] > 0)
+    return table
+
+
+def trend_table(counts, freq='M', window=3, by_version=False):
+    """
+    Review volume, mention rate, rolling mention rate (over `window`
+    periods), mean rating and star distribution per day ('D'), week ('W')
+    or month ('M'). Empty periods inside the range are filled with zeros so
+    the rolling window spans calendar time.
+
+    With `by_version`, one row per (period, App Version Name): each
+    version's periods are filled from its first to its last review, and its
+    rolling rate only spans its own reviews.
+    """
+    freq = FREQUENCIES.get(freq, freq)
+    if counts.empty:
+        return pd.DataFrame(columns=['period'] + (['version'] if by_version else []) + COUNT_COLUMNS)
+
+    periods = pd.DatetimeIndex(period_start(counts['day'], freq), name='period')
+    step = {'D': 'D', 'W': 'W-MON', 'M': 'MS'}[freq]
+    if not by_version:
+        table = counts[COUNT_COLUMNS].groupby(periods).sum()
+        full_range = pd.date_range(table.index.min(), table.index.max(), freq=step)
+        table = table.reindex(full_range, fill_value=0).rename_axis('period')
+        return _with_rates(table, window).reset_index()
+
+    table = counts[COUNT_COLUMNS].groupby([counts['version'].rename('version'), periods]).sum()
+
+    # Every period of each version's own span, versions in the order they first appeared
+    span = pd.Series(periods, index=counts.index).groupby(counts['version']).agg(['min', 'max']).sort_values('min')
+    grid = pd.MultiIndex.from_product(
+        [span.index, pd.date_range(span['min'].min(), span['max'].max(), freq=step)], names=['version', 'period'])
+    version, period = grid.get_level_values('version'), grid.get_level_values('period')
+    first, last = span['min'].reindex(version).to_numpy(), span['max'].reindex(version).to_numpy()
+    grid = grid[(period >= first) & (period <= last)]
+    table = _with_rates(table.reindex(grid, fill_value=0).reset_index(), window, by='version')
+    return table[['period', 'version'] + [column for column in table.columns if column not in ('period', 'version')]]
+
+
+def version_table(counts):
+    """Review volume, mention rate and mean rating per App Version Name"""
+    if counts.empty:
+        return pd.DataFrame(columns=['version'] + COUNT_COLUMNS)
+    table = counts.groupby('version')[COUNT_COLUMNS + ['day']].agg(
+        {**{column: 'sum' for column in COUNT_COLUMNS}, 'day': 'min'})
+    table = table.sort_values('day').drop(columns='day')
+    return _with_rates(table, window=None).reset_index()
+
+
+def _records(table, date_format):
+    table = table.copy()
+    if 'period' in table:
+        table['period'] = table['period'].dt.strftime(date_format)
+    table = table.astype(object).where(table.notna(), None)
+    return table.to_dict(orient='records')
+
+
+def trend_summary(counts, window=3):
+    """
+    JSON-ready summary of the trends for the business case summary: monthly
+    series, per-year totals and how many months had a sibling mention
+    """
+    monthly = trend_table(counts, 'M', window)
+    if monthly.empty:
+        return {'monthly': [], 'yearly': [], 'versions': []}
+
+    yearly = monthly.groupby(monthly['period'].dt.year)[COUNT_COLUMNS].sum()
+    yearly = _with_rates(yearly.rename_axis('year'), window=None).reset_index()
+    with_mentions = monthly[monthly['mentions'] > 0]
+
+    return {
+        'first_month': monthly['period'].min().strftime('%Y-%m'),
+        'last_month': monthly['period'].max().strftime('%Y-%m'),
+        'months': len(monthly),
+        'months_with_mentions': len(with_mentions),
+        'years_with_mentions': sorted(int(year) for year in with_mentions['period'].dt.year.unique()),
+        'monthly': _records(monthly, '%Y-%m'),
+        'yearly': _records(yearly, '%Y'),
+        'versions': _records(version_table(counts), '%Y-%m'),
+    }
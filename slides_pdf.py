@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Print reveal.js slide decks to PDF with one shared headless browser
+
+Launching Chromium and sleeping a fixed two seconds per deck dominates the
+time to regenerate slide PDFs after a data refresh. `SlideRenderer` keeps
+one browser alive for every deck and opens each deck in its own browser
+context, in reveal.js print mode (?print-pdf), where every slide is laid
+out as one printed page. It waits on reveal.js itself instead of a timer:
+the 'pdf-ready' event reveal.js fires once the print layout is done, then
+fonts and images.
+
+Up to `workers` decks render concurrently. A long deck can also be split
+into slide ranges (--split) that render in separate pages at the same
+time; each page drops the slides outside its range before printing and the
+parts are merged back in order with pypdf.
+
+Usage:
+    python slides_pdf.py                                  # every project's slides
+    python slides_pdf.py projects/sibling-feature         # just these projects
+    python slides_pdf.py deck.html --split 4              # one deck, four ranges in parallel
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+from profiling import add_profile_arguments, finish_profile, profile_from_args, stage
+
+DEFAULT_WORKERS = 4
+READY_TIMEOUT_MS = 30000
+
+# reveal.js dispatches its events on the .reveal element and they bubble, so
+# a listener added before the deck's scripts run sees 'pdf-ready'
+READY_LISTENER = """
+document.addEventListener('pdf-ready', () => { window.__slidesPdfReady = true; });
+"""
+
+READY_CHECK = """() => window.__slidesPdfReady === true
+    && window.Reveal && Reveal.isReady()
+    && document.fonts.status === 'loaded'
+    && Array.from(document.images).every(img => img.complete)"""
+
+PRINT_STYLE = """
+.reveal .speaker-notes,
+.reveal aside.notes,
+.reveal .notes {
+    display: none !important;
+}
+.reveal .slide-number {
+    display: block !important;
+}
+"""
+
+# In print mode each slide is wrapped in a .pdf-page, one per printed page
+COUNT_PAGES = "() => document.querySelectorAll('.reveal .pdf-page').length"
+KEEP_PAGES = """([first, last]) => {
+    document.querySelectorAll('.reveal .pdf-page').forEach((page, i) => {
+        if (i < first || i >= last) page.remove();
+    });
+}"""
+
+
+def split_ranges(count, parts):
+    """Split `count` pages into at most `parts` contiguous (first, last) ranges"""
+    parts = max(1, min(parts, count))
+    size, extra = divmod(count, parts)
+    ranges, first = [], 0
+    for i in range(parts):
+        last = first + size + (1 if i < extra else 0)
+        ranges.append((first, last))
+        first = last
+    return ranges
+
+
+def merge_pdfs(parts, output_file):
+    """Concatenate PDF files in order into `output_file`"""
+    from pypdf import PdfWriter
+
+    with stage('merge_pdfs', rows_in=len(parts)):
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(part)
+        with open(output_file, 'wb') as f:
+            writer.write(f)
+
+
+class SlideRenderer:
+    """One headless Chromium shared by every deck; each render gets its own browser context"""
+
+    def __init__(self, workers=DEFAULT_WORKERS, timeout_ms=READY_TIMEOUT_MS):
+        self.workers = workers
+        self.timeout_ms = timeout_ms
+        self.browser = None
+        self._playwright = None
+        self._slots = None
+
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch()
+        self._slots = asyncio.Semaphore(self.workers)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.browser.close()
+        await self._playwright.stop()
+
+    async def _open(self, context, html_file):
+        page = await context.new_page()
+        await page.add_init_script(READY_LISTENER)
+        await page.goto(Path(html_file).resolve().as_uri() + '?print-pdf')
+        await page.wait_for_function(READY_CHECK, timeout=self.timeout_ms)
+        await page.add_style_tag(content=PRINT_STYLE)
+        return page
+
+    async def page_count(self, html_file):
+        async with self._slots:
+            context = await self.browser.new_context()
+            try:
+                page = await self._open(context, html_file)
+                return await page.evaluate(COUNT_PAGES)
+            finally:
+                await context.close()
+
+    async def print_range(self, html_file, output_file, first=0, last=None):
+        """Print pages [first, last) of a deck (all of them by default); returns the page count printed"""
+        async with self._slots:
+            context = await self.browser.new_context()
+            try:
+                page = await self._open(context, html_file)
+                count = await page.evaluate(COUNT_PAGES)
+                last = count if last is None else min(last, count)
+                if (first, last) != (0, count):
+                    await page.evaluate(KEEP_PAGES, [first, last])
+                # reveal.js sets @page to the slide size in print mode
+                await page.pdf(path=output_file, print_background=True, prefer_css_page_size=True)
+                return last - first
+            finally:
+                await context.close()
+
+    async def render_deck(self, html_file, output_file, split=1):
+        """Print a whole deck, as `split` concurrent slide ranges merged in order; returns its page count"""
+        if split <= 1:
+            return await self.print_range(html_file, output_file)
+
+        ranges = split_ranges(await self.page_count(html_file), split)
+        with tempfile.TemporaryDirectory(prefix='slides_pdf_') as tmp_dir:
+            parts = [os.path.join(tmp_dir, f'part_{i:03d}.pdf') for i in range(len(ranges))]
+            counts = await asyncio.gather(*(
+                self.print_range(html_file, part, first, last) for part, (first, last) in zip(parts, ranges)
+            ))
+            merge_pdfs(parts, output_file)
+        return sum(counts)
+
+    async def render_decks(self, decks, split=1):
+        """
+        Print every (html_file, output_file) deck concurrently.
+
+        Returns (printed, errors): (output_file, page count) per deck that
+        printed, in the order of `decks`, and (html_file, error) for the rest.
+        """
+        results = await asyncio.gather(
+            *(self.render_deck(html_file, output_file, split) for html_file, output_file in decks),
+            return_exceptions=True,
+        )
+        printed, errors = [], []
+        for (html_file, output_file), result in zip(decks, results):
+            if isinstance(result, (OSError, PlaywrightError)):
+                errors.append((html_file, result))
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                printed.append((output_file, result))
+        return printed, errors
+
+
+def print_decks(decks, workers=DEFAULT_WORKERS, split=1):
+    """Print (html_file, output_file) decks with one browser; see SlideRenderer.render_decks"""
+    async def run():
+        async with SlideRenderer(workers) as renderer:
+            return await renderer.render_decks(decks, split)
+
+    # Decks print concurrently, so this is one stage; merges are timed inside it
+    with stage('print_decks', rows_in=len(decks)) as s:
+        printed, errors = asyncio.run(run())
+        s.rows_out = sum(pages for _, pages in printed)
+    return printed, errors
+
+
+def pdf_path(html_file):
+    return os.path.splitext(html_file)[0] + '.pdf'
+
+
+def deck_files(targets):
+    """HTML decks for each target: an HTML file itself, or a project directory's slides output"""
+    from report_content import find_projects, load_project
+
+    decks = []
+    for target in targets or find_projects():
+        if os.path.isdir(target):
+            target = load_project(target).output('slides')
+        decks.append((target, pdf_path(target)))
+    return decks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print reveal.js slide decks to PDF with one shared browser')
+    parser.add_argument('targets', nargs='*',
+                        help='Slide HTML files or project directories (default: every projects/* with report content)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Decks or slide ranges rendered at once (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--split', type=int, default=1,
+                        help='Split each deck into this many slide ranges rendered in parallel (default: 1)')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profile_from_args('slides_pdf', args)
+
+    decks = deck_files(args.targets)
+
+    print("=" * 80)
+    print("Printing Slide Decks to PDF")
+    print("=" * 80)
+
+    missing = [html_file for html_file, _ in decks if not os.path.exists(html_file)]
+    for html_file in missing:
+        print(f"   Error: HTML file not found at {html_file}")
+    decks = [deck for deck in decks if deck[0] not in missing]
+
+    start = time.perf_counter()
+    printed, errors = print_decks(decks, args.workers, args.split)
+    for output_file, pages in printed:
+        size = os.path.getsize(output_file) / (1024 * 1024)
+        print(f"   {output_file}: {pages} slides, {size:.1f} MB")
+    for html_file, error in errors:
+        print(f"   Error printing {html_file}: {error}")
+
+    print(f"\nPrinted {len(printed)} of {len(printed) + len(errors) + len(missing)} decks "
+          f"in {time.perf_counter() - start:.2f}s")
+    finish_profile()
+    if errors or missing:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
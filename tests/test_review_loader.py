@@ -0,0 +1,62 @@
+"""
+scan_export on exports in which no review has text (pandas reads the
+'Review Text' column as float64) and on files whose search fails
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_taxonomy import SIBLING_TAXONOMY, LanguageIndex
+from review_loader import ANALYSIS_COLUMNS, has_text, scan_export
+
+
+def write_export(path, texts):
+    """A Play Console export (UTF-16, like the console writes them) with the given review texts"""
+    reviews = pd.DataFrame({
+        'Package Name': 'org.familysearch.mobile',
+        'App Version Name': '5.0',
+        'Reviewer Language': 'en',
+        'Review Submit Date and Time': '2025-01-01T00:00:00Z',
+        'Review Submit Millis Since Epoch': 1735689600000,
+        'Star Rating': 4,
+        'Review Text': texts,
+        'Review Link': [f'https://play.google.com/console/reviews?reviewId=r{i}' for i in range(len(texts))],
+    }, columns=ANALYSIS_COLUMNS)
+    reviews.to_csv(path, index=False, encoding='utf-16')
+
+
+def test_has_text_without_any_text():
+    assert has_text(pd.DataFrame({'Review Text': [np.nan, np.nan]})).tolist() == [False, False]
+    assert has_text(pd.DataFrame({'Review Text': ['siblings', '  ', None]})).tolist() == [True, False, False]
+
+
+def test_scan_export_without_any_text(tmp_path):
+    export = tmp_path / 'reviews_reviews_org.familysearch.mobile_202501.csv'
+    write_export(export, [None, None, None])
+
+    stats, mentions, errors = scan_export(str(export), matcher=LanguageIndex(SIBLING_TAXONOMY))
+
+    assert errors == []
+    assert (stats.total, stats.with_text, stats.mentions) == (3, 0, 0)
+    assert len(mentions) == 0
+
+
+class FailingMatcher:
+    def filter_reviews(self, reviews):
+        raise ValueError('matcher failed')
+
+
+def test_scan_export_reports_search_failures(tmp_path):
+    export = tmp_path / 'reviews_reviews_org.familysearch.mobile_202501.csv'
+    write_export(export, ['I want to see siblings', 'great app'])
+
+    stats, mentions, errors = scan_export(str(export), matcher=FailingMatcher())
+
+    assert errors == [(str(export), 'matcher failed')]
+    assert stats.total == 0
+    assert mentions is None